@@ -0,0 +1,370 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
+from core import metrics
+
+EXIT_STOP_LOSS = 0
+EXIT_TAKE_PROFIT = 1
+EXIT_END_OF_RUN = 2
+EXIT_REASONS = ("Stop Loss", "Take Profit", "End of Run")
+
+@dataclass
+class KernelResult:
+    entry_index: np.ndarray
+    exit_index: np.ndarray
+    entry_price: np.ndarray
+    exit_price: np.ndarray
+    pnl: np.ndarray
+    pnl_pct: np.ndarray
+    exit_reason: np.ndarray
+    equity_curve: np.ndarray
+    final_capital: float
+
+    @property
+    def total_trades(self) -> int:
+        return len(self.pnl)
+
+# relative widening of the exit trigger prices, so float rounding never hides an exit from the price check
+EXIT_TRIGGER_SLACK = 1e-9
+
+class PositionLedger:
+    """Open positions as preallocated NumPy columns with an active mask.
+
+    The float columns are the rows of one table. Slots are filled in entry
+    order and closing a position clears its active flag. Next to P&L inputs
+    each position stores the prices at which it reaches its stop loss or
+    take profit, so one vectorized comparison over all open positions finds
+    the exit candidates of a bar; only those get the exact pnl_pct check.
+    Per symbol trigger prices (the nearest exit prices, possibly stale but
+    never too narrow after a close) let bars with no possible exit skip the
+    comparison entirely. Marking to market adds up the open rows in entry
+    order with the row loop's arithmetic, so the cash checks that follow see
+    exactly the same capital. When the table fills up the open positions are
+    packed to the front (keeping their order) and it grows if still needed.
+    """
+
+    FIELDS = ('entry_index', 'entry_price', 'size', 'value', 'direction', 'exit_low', 'exit_high')
+
+    def __init__(self, stop_loss_pct: float, take_profit_pct: float, num_symbols: int = 1, capacity: int = 64):
+        self.stop_loss_pct = stop_loss_pct
+        self.take_profit_pct = take_profit_pct
+        self.num_symbols = num_symbols
+        self._allocate(np.zeros((len(self.FIELDS), capacity)), np.zeros(capacity, dtype=np.int64),
+                       np.zeros(capacity, dtype=bool))
+        self.count = 0
+        self.end = 0
+
+        self.trigger_low = np.full(num_symbols, -np.inf)
+        self.trigger_high = np.full(num_symbols, np.inf)
+
+    def _allocate(self, table: np.ndarray, symbol: np.ndarray, active: np.ndarray):
+        self.table = table
+        self.symbol = symbol
+        self.active = active
+        for row, name in enumerate(self.FIELDS):
+            setattr(self, name, table[row])
+
+    def _make_room(self):
+        slots = np.flatnonzero(self.active[:self.end])
+        capacity = len(self.active)
+        if len(slots) * 2 > capacity:
+            capacity *= 2
+        table = np.zeros((len(self.FIELDS), capacity))
+        table[:, :len(slots)] = self.table[:, slots]
+        symbol = np.zeros(capacity, dtype=np.int64)
+        symbol[:len(slots)] = self.symbol[slots]
+        active = np.zeros(capacity, dtype=bool)
+        active[:len(slots)] = True
+        self._allocate(table, symbol, active)
+        self.end = len(slots)
+
+    def open(self, symbol: int, entry_index: int, price: float, value: float, direction: int):
+        if self.end == len(self.active):
+            self._make_room()
+        # prices where pnl_pct reaches the stop loss / take profit; a position without value has
+        # pnl_pct 0 at any price, so it is a candidate on every bar
+        low_pct, high_pct = ((self.stop_loss_pct, self.take_profit_pct) if direction > 0
+                             else (self.take_profit_pct, self.stop_loss_pct))
+        exit_low = price * (1 - low_pct / 100 + EXIT_TRIGGER_SLACK) if value != 0 else np.inf
+        exit_high = price * (1 + high_pct / 100 - EXIT_TRIGGER_SLACK)
+        size = value / price
+
+        slot = self.end
+        self.table[:, slot] = (entry_index, price, size, value, direction, exit_low, exit_high)
+        self.symbol[slot] = symbol
+        self.active[slot] = True
+        self.end += 1
+        self.count += 1
+
+        self.trigger_low[symbol] = max(self.trigger_low[symbol], exit_low)
+        self.trigger_high[symbol] = min(self.trigger_high[symbol], exit_high)
+
+    def close(self, slot: int):
+        self.active[slot] = False
+        # a closed slot can never be an exit candidate
+        self.exit_low[slot] = -np.inf
+        self.exit_high[slot] = np.inf
+        self.count -= 1
+        if self.count == 0:
+            self.end = 0
+            self.trigger_low.fill(-np.inf)
+            self.trigger_high.fill(np.inf)
+
+    def market_value(self, prices: np.ndarray) -> float:
+        """Value of the open positions at prices (one per symbol).
+
+        Summed in entry order rather than kept as a running total: the running
+        total drifts by rounding error, which can flip a later position_value
+        <= cash check and change every trade after it.
+        """
+        slots = self.active[:self.end].nonzero()[0]
+        position_prices = prices[self.symbol[slots]] if self.num_symbols > 1 else prices[0]
+        pnl = (position_prices - self.entry_price[slots]) * self.size[slots] * self.direction[slots]
+        return sum((self.value[slots] + pnl).tolist())
+
+    def exit_triggered(self, prices: np.ndarray) -> np.ndarray:
+        """Per symbol: whether some open position may reach its stop loss or take profit at prices"""
+        return (prices <= self.trigger_low) | (prices >= self.trigger_high)
+
+    def exits(self, prices: np.ndarray, tradable: Optional[np.ndarray] = None) -> List[Tuple[int, float, float]]:
+        """(slot, pnl, pnl_pct) of the positions hitting their stop loss or take profit, in entry order.
+
+        prices holds one price per symbol; positions of symbols that are not
+        tradable are left open.
+        """
+        end = self.end
+        symbol = self.symbol[:end]
+        position_prices = prices[symbol] if self.num_symbols > 1 else prices[0]
+        candidates = (position_prices <= self.exit_low[:end]) | (position_prices >= self.exit_high[:end])
+        if tradable is not None:
+            candidates &= tradable[symbol]
+        slots = candidates.nonzero()[0]
+        if len(slots) == 0:
+            self._refresh_triggers()
+            return []
+
+        exits = []
+        rows = zip(slots.tolist(), symbol[slots].tolist(), *self.table[1:5, slots].tolist())
+        for slot, position_symbol, entry_price, size, value, direction in rows:
+            pnl = (float(prices[position_symbol]) - entry_price) * size * direction
+            pnl_pct = (pnl / value) * 100 if value != 0 else 0
+            if pnl_pct <= -self.stop_loss_pct or pnl_pct >= self.take_profit_pct:
+                exits.append((slot, pnl, pnl_pct))
+        return exits
+
+    def _refresh_triggers(self):
+        # a trigger fired without any position at its exit price: narrow the triggers to the open positions
+        end = self.end
+        exit_low = self.exit_low[:end]
+        exit_high = self.exit_high[:end]
+        if self.num_symbols == 1:
+            self.trigger_low[0] = exit_low.max()
+            self.trigger_high[0] = exit_high.min()
+        else:
+            self.trigger_low.fill(-np.inf)
+            self.trigger_high.fill(np.inf)
+            np.maximum.at(self.trigger_low, self.symbol[:end], exit_low)
+            np.minimum.at(self.trigger_high, self.symbol[:end], exit_high)
+
+def _close_exits(ledger: PositionLedger, trades: Dict[str, List], prices: np.ndarray, exit_index: int,
+                 cash: float, tradable: Optional[np.ndarray] = None) -> float:
+    """Close every position that hits its stop loss or take profit; returns the cash afterwards"""
+    for slot, pnl, pnl_pct in ledger.exits(prices, tradable):
+        symbol = int(ledger.symbol[slot])
+        cash += float(ledger.value[slot]) + pnl
+        trades['symbol_index'].append(symbol)
+        trades['entry_index'].append(int(ledger.entry_index[slot]))
+        trades['exit_index'].append(exit_index)
+        trades['entry_price'].append(float(ledger.entry_price[slot]))
+        trades['exit_price'].append(float(prices[symbol]))
+        trades['pnl'].append(pnl)
+        trades['pnl_pct'].append(pnl_pct)
+        trades['exit_reason'].append(EXIT_STOP_LOSS if pnl_pct <= -ledger.stop_loss_pct else EXIT_TAKE_PROFIT)
+        ledger.close(slot)
+    return cash
+
+def _close_all(ledger: PositionLedger, trades: Dict[str, List], price: float, exit_index: int,
+               cash: float) -> float:
+    """Close every open position at price as EXIT_END_OF_RUN; returns the cash afterwards"""
+    for slot in ledger.active[:ledger.end].nonzero()[0].tolist():
+        entry_price, size, value, direction = ledger.table[1:5, slot].tolist()
+        pnl = (price - entry_price) * size * direction
+        cash += value + pnl
+        trades['symbol_index'].append(int(ledger.symbol[slot]))
+        trades['entry_index'].append(int(ledger.entry_index[slot]))
+        trades['exit_index'].append(exit_index)
+        trades['entry_price'].append(entry_price)
+        trades['exit_price'].append(price)
+        trades['pnl'].append(pnl)
+        trades['pnl_pct'].append((pnl / value) * 100 if value != 0 else 0)
+        trades['exit_reason'].append(EXIT_END_OF_RUN)
+        ledger.close(slot)
+    return cash
+
+def run_backtest_kernel(close: np.ndarray, entry_mask: np.ndarray, direction: int,
+                        initial_capital: float, stop_loss_pct: float, take_profit_pct: float,
+                        position_size_pct: float, close_at_end: bool = False) -> KernelResult:
+    """Bar loop of the backtest over plain arrays.
+
+    close and entry_mask are aligned per bar; direction is 1 for BUY and -1 for
+    SELL. Mirrors the row based loop the services used: positions are marked to
+    the bar's close, exits are checked in entry order, and a new position is
+    sized from the capital at the start of the bar.
+
+    With close_at_end nothing is entered on the last bar and the positions
+    still open are closed at its close, so the trades account for the whole
+    change in capital (for runs chained one after the other).
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    bar_prices = close.reshape(-1, 1)
+    prices = close.tolist()
+    entry_mask = np.ascontiguousarray(entry_mask, dtype=bool).tolist()
+
+    ledger = PositionLedger(stop_loss_pct, take_profit_pct)
+    trades: Dict[str, List] = {
+        'symbol_index': [], 'entry_index': [], 'exit_index': [], 'entry_price': [], 'exit_price': [],
+        'pnl': [], 'pnl_pct': [], 'exit_reason': []
+    }
+
+    equity_curve = [initial_capital]
+    cash = initial_capital
+    current_capital = initial_capital
+
+    if close_at_end and len(entry_mask):
+        entry_mask[-1] = False
+
+    for i in range(1, len(prices)):
+        price = prices[i]
+
+        if ledger.count:
+            current_capital = cash + ledger.market_value(bar_prices[i])
+            if price <= ledger.trigger_low[0] or price >= ledger.trigger_high[0]:
+                cash = _close_exits(ledger, trades, bar_prices[i], i, cash)
+        else:
+            current_capital = cash
+
+        if entry_mask[i]:
+            position_value = current_capital * position_size_pct / 100
+            if position_value <= cash:
+                cash -= position_value
+                ledger.open(0, i, price, position_value, direction)
+
+        equity_curve.append(current_capital)
+
+    if close_at_end and ledger.count:
+        current_capital = _close_all(ledger, trades, prices[-1], len(prices) - 1, cash)
+        equity_curve[-1] = current_capital
+
+    return KernelResult(
+        entry_index=np.array(trades['entry_index'], dtype=np.int64),
+        exit_index=np.array(trades['exit_index'], dtype=np.int64),
+        entry_price=np.array(trades['entry_price'], dtype=np.float64),
+        exit_price=np.array(trades['exit_price'], dtype=np.float64),
+        pnl=np.array(trades['pnl'], dtype=np.float64),
+        pnl_pct=np.array(trades['pnl_pct'], dtype=np.float64),
+        exit_reason=np.array(trades['exit_reason'], dtype=np.int8),
+        equity_curve=np.array(equity_curve, dtype=np.float64),
+        final_capital=current_capital
+    )
+
+@dataclass
+class PortfolioKernelResult(KernelResult):
+    symbol_index: np.ndarray
+
+def run_portfolio_kernel(close: np.ndarray, entry_mask: np.ndarray, direction: int,
+                         initial_capital: float, stop_loss_pct: float, take_profit_pct: float,
+                         position_size_pct: float) -> PortfolioKernelResult:
+    """run_backtest_kernel over several symbols sharing one pool of capital.
+
+    close and entry_mask are (symbols x bars) on a common calendar, with NaN
+    close where a symbol has no bar. Open positions are marked to their
+    symbol's last close; exits are only checked on bars where the symbol
+    trades. New positions are sized from the capital at the start of the bar
+    and filled in symbol order while cash lasts. With a single symbol this is
+    exactly run_backtest_kernel.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    num_symbols = close.shape[0]
+    entry_mask = np.asarray(entry_mask, dtype=bool) & ~np.isnan(close)
+    traded = np.ascontiguousarray((~np.isnan(close)).T)
+    # symbols yet to trade have no last close and hold no positions; 0 keeps them out of the mark to market
+    last_close = np.nan_to_num(pd.DataFrame(close.T).ffill().to_numpy(), nan=0.0)
+    entries = [np.flatnonzero(column).tolist() for column in entry_mask.T]
+
+    ledger = PositionLedger(stop_loss_pct, take_profit_pct, num_symbols)
+    trades: Dict[str, List] = {
+        'symbol_index': [], 'entry_index': [], 'exit_index': [], 'entry_price': [], 'exit_price': [],
+        'pnl': [], 'pnl_pct': [], 'exit_reason': []
+    }
+
+    equity_curve = [initial_capital]
+    cash = initial_capital
+    current_capital = initial_capital
+
+    for i in range(1, close.shape[1]):
+        prices = last_close[i]
+
+        if ledger.count:
+            current_capital = cash + ledger.market_value(prices)
+            if (ledger.exit_triggered(prices) & traded[i]).any():
+                cash = _close_exits(ledger, trades, prices, i, cash, traded[i])
+        else:
+            current_capital = cash
+
+        if entries[i]:
+            position_value = current_capital * position_size_pct / 100
+            for symbol in entries[i]:
+                if position_value > cash:
+                    break
+                cash -= position_value
+                ledger.open(symbol, i, float(prices[symbol]), position_value, direction)
+
+        equity_curve.append(current_capital)
+
+    return PortfolioKernelResult(
+        symbol_index=np.array(trades['symbol_index'], dtype=np.int64),
+        entry_index=np.array(trades['entry_index'], dtype=np.int64),
+        exit_index=np.array(trades['exit_index'], dtype=np.int64),
+        entry_price=np.array(trades['entry_price'], dtype=np.float64),
+        exit_price=np.array(trades['exit_price'], dtype=np.float64),
+        pnl=np.array(trades['pnl'], dtype=np.float64),
+        pnl_pct=np.array(trades['pnl_pct'], dtype=np.float64),
+        exit_reason=np.array(trades['exit_reason'], dtype=np.int8),
+        equity_curve=np.array(equity_curve, dtype=np.float64),
+        final_capital=current_capital
+    )
+
+def max_drawdown_pct(equity_curve: np.ndarray) -> float:
+    return float(metrics.max_drawdown_pct(equity_curve)[0])
+
+def summarize_kernel_result(result: KernelResult, initial_capital: float, periods: int = metrics.TRADING_DAYS,
+                            risk_metrics: bool = True) -> Dict[str, Any]:
+    """Summary statistics in the shape the backtest endpoints return (without the trade list).
+
+    periods is the number of bars per year used to annualize the risk
+    metrics; risk_metrics=False leaves them out for callers that compute
+    them for many curves at once.
+    """
+    total_trades = result.total_trades
+    pnl = result.pnl.tolist()
+    profits = [p for p in pnl if p > 0]
+    losses = [p for p in pnl if p <= 0]
+    winning_trades = len(profits)
+    losing_trades = len(losses)
+
+    summary = {
+        'total_trades': total_trades,
+        'winning_trades': winning_trades,
+        'losing_trades': losing_trades,
+        'win_rate': (winning_trades / total_trades) * 100 if total_trades > 0 else 0,
+        'initial_capital': initial_capital,
+        'final_capital': result.final_capital,
+        'total_return_pct': ((result.final_capital - initial_capital) / initial_capital) * 100,
+        'max_drawdown_pct': max_drawdown_pct(result.equity_curve),
+        'avg_profit': sum(profits) / winning_trades if winning_trades else 0,
+        'avg_loss': sum(losses) / losing_trades if losing_trades else 0,
+    }
+    if risk_metrics:
+        summary.update(metrics.summarize_curve(result.equity_curve, periods))
+    return summary
@@ -0,0 +1,161 @@
+import os
+import zlib
+import threading
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from typing import Dict, Optional, Tuple
+from core.metrics import periods_per_year
+
+DEFAULT_PROVIDER = os.getenv("MONTY_DATA_PROVIDER", "yfinance")
+DEFAULT_REPLAY_DIR = os.getenv("MONTY_REPLAY_DIR", os.path.join(os.path.dirname(__file__), "..", "data", "replay"))
+DEFAULT_SYNTHETIC_SEED = int(os.getenv("MONTY_SYNTHETIC_SEED", "0"))
+
+def _slice(df: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    """Rows with start <= index < end for naive start/end, whatever the index's timezone"""
+    if df.index.tz is not None:
+        start = start.tz_localize(df.index.tz)
+        end = end.tz_localize(df.index.tz)
+    return df.iloc[df.index.searchsorted(start):df.index.searchsorted(end)]
+
+class DataProvider:
+    """Source of OHLCV bars behind the OHLCV cache.
+
+    fetch returns the bars of symbol with start <= time < end (naive midnight
+    timestamps) at interval, with Open/High/Low/Close/Volume columns and a
+    sorted DatetimeIndex; an empty frame when there are none. Providers are
+    called as plain fetch functions by OHLCVCache.get_history.
+    """
+    name = "base"
+
+    def fetch(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp, interval: str) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def __call__(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp, interval: str) -> pd.DataFrame:
+        return self.fetch(symbol, start, end, interval)
+
+class YFinanceProvider(DataProvider):
+    name = "yfinance"
+
+    def fetch(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp, interval: str) -> pd.DataFrame:
+        ticker = yf.Ticker(symbol)
+        return ticker.history(start=start, end=end, interval=interval)
+
+class ReplayProvider(DataProvider):
+    """Bars recorded to local files, for running without network access.
+
+    Looks for <data_dir>/<interval>/<SYMBOL>.parquet or .csv, then
+    <data_dir>/<SYMBOL>.parquet or .csv. CSV files have the bar time in their
+    first column; column names are matched case-insensitively.
+    """
+    name = "replay"
+
+    def __init__(self, data_dir: str = DEFAULT_REPLAY_DIR):
+        self.data_dir = data_dir
+        self._frames: Dict[str, Tuple[float, pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, symbol: str, interval: str) -> str:
+        for directory in (os.path.join(self.data_dir, interval), self.data_dir):
+            for extension in (".parquet", ".csv"):
+                path = os.path.join(directory, symbol.upper() + extension)
+                if os.path.exists(path):
+                    return path
+        raise ValueError(f"No replay data for {symbol} ({interval}) in {self.data_dir}")
+
+    def _read(self, path: str) -> pd.DataFrame:
+        if path.endswith(".parquet"):
+            df = pd.read_parquet(path)
+        else:
+            df = pd.read_csv(path, index_col=0)
+        df.index = pd.DatetimeIndex(pd.to_datetime(df.index))
+        df = df.rename(columns={column: str(column).title() for column in df.columns})
+        return df[~df.index.duplicated(keep="last")].sort_index()
+
+    def fetch(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp, interval: str) -> pd.DataFrame:
+        path = self._path(symbol, interval)
+        modified = os.path.getmtime(path)
+        with self._lock:
+            cached = self._frames.get(path)
+        if cached is None or cached[0] != modified:
+            cached = (modified, self._read(path))
+            with self._lock:
+                self._frames[path] = cached
+        return _slice(cached[1], start, end)
+
+# bars per session of the intraday intervals, and the offset of each session's first bar
+INTRADAY_BARS = {'1m': 390, '5m': 78, '15m': 26, '30m': 13, '1h': 7}
+SESSION_OPEN = pd.Timedelta(hours=9, minutes=30)
+CALENDAR_FREQUENCIES = {'1d': 'B', '1wk': 'W-MON', '1mo': 'MS'}
+
+class SyntheticProvider(DataProvider):
+    """Deterministic random-walk bars, for reproducible offline benchmarks and load tests.
+
+    Every symbol gets its own geometric Brownian motion seeded from the
+    symbol and seed, laid out on a fixed calendar starting at epoch, so a bar
+    always has the same values whatever range it is requested in.
+    """
+    name = "synthetic"
+
+    def __init__(self, seed: int = DEFAULT_SYNTHETIC_SEED, initial_price: float = 100.0,
+                 annual_drift: float = 0.07, annual_volatility: float = 0.2, epoch: str = "2000-01-03"):
+        self.seed = seed
+        self.initial_price = initial_price
+        self.annual_drift = annual_drift
+        self.annual_volatility = annual_volatility
+        self.epoch = pd.Timestamp(epoch)
+
+    def calendar(self, end: pd.Timestamp, interval: str) -> pd.DatetimeIndex:
+        """Bar times from epoch up to end"""
+        if interval in INTRADAY_BARS:
+            bars = INTRADAY_BARS[interval]
+            days = pd.bdate_range(self.epoch, end)
+            offsets = SESSION_OPEN + pd.to_timedelta(np.arange(bars) * (390 // bars), unit="min")
+            times = (days.values[:, np.newaxis] + offsets.values[np.newaxis, :]).ravel()
+            return pd.DatetimeIndex(times)
+        if interval not in CALENDAR_FREQUENCIES:
+            raise ValueError(f"Unsupported interval for synthetic data: {interval}")
+        return pd.date_range(self.epoch, end, freq=CALENDAR_FREQUENCIES[interval])
+
+    def fetch(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp, interval: str) -> pd.DataFrame:
+        dates = self.calendar(end, interval)
+        dates = dates[dates < end]
+        if len(dates) == 0 or dates[-1] < start:
+            return pd.DataFrame()
+
+        dt = 1 / periods_per_year(interval)
+        # one stream per symbol, drawn row by row so a longer calendar only appends bars
+        rng = np.random.default_rng([zlib.crc32(symbol.upper().encode()), self.seed])
+        noise = rng.standard_normal((len(dates), 5))
+
+        log_returns = (self.annual_drift - self.annual_volatility ** 2 / 2) * dt \
+            + self.annual_volatility * np.sqrt(dt) * noise[:, 0]
+        close = self.initial_price * np.exp(np.cumsum(log_returns))
+        previous_close = np.concatenate(([self.initial_price], close[:-1]))
+        open_ = previous_close * (1 + 0.1 * self.annual_volatility * np.sqrt(dt) * noise[:, 1])
+        spread = self.annual_volatility * np.sqrt(dt) / 2
+        high = np.maximum(open_, close) * (1 + spread * np.abs(noise[:, 2]))
+        low = np.minimum(open_, close) * (1 - spread * np.abs(noise[:, 3]))
+        volume = np.round(1e6 * np.exp(0.25 * noise[:, 4]))
+
+        df = pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}, index=dates)
+        return _slice(df, start, end)
+
+PROVIDERS = {
+    'yfinance': YFinanceProvider,
+    'replay': ReplayProvider,
+    'synthetic': SyntheticProvider,
+}
+
+_instances: Dict[str, DataProvider] = {}
+_instances_lock = threading.Lock()
+
+def get_provider(name: Optional[str] = None) -> DataProvider:
+    """Shared instance of a registered provider; the deployment's MONTY_DATA_PROVIDER by default"""
+    name = name or DEFAULT_PROVIDER
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown data provider '{name}', choose one of {list(PROVIDERS)}")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = PROVIDERS[name]()
+        return _instances[name]
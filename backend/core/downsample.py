@@ -0,0 +1,81 @@
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+
+DOWNSAMPLE_METHODS = ('lttb', 'minmax')
+MIN_POINTS = 3
+
+def lttb_indices(values: np.ndarray, max_points: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of at most max_points points keeping the curve's shape.
+
+    The first and last points are always kept. The points in between are
+    split into max_points - 2 buckets and from each bucket the point forming
+    the largest triangle with the previously kept point and the average of
+    the next bucket is kept.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+
+    buckets = max_points - 2
+    edges = (np.arange(buckets + 1) * ((n - 2) / buckets)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    # average of every bucket at once, and the last point standing in for the bucket after the last
+    sums = np.add.reduceat(values[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    next_y = np.append((sums / counts)[1:], values[-1])
+    next_x = np.append(((edges[:-1] + edges[1:] - 1) / 2)[1:], n - 1)
+
+    indices = np.empty(max_points, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for bucket in range(buckets):
+        start, end = edges[bucket], edges[bucket + 1]
+        x = np.arange(start, end)
+        y = values[start:end]
+        area = np.abs((a - next_x[bucket]) * (y - values[a]) - (a - x) * (next_y[bucket] - values[a]))
+        a = start + int(np.argmax(area))
+        indices[bucket + 1] = a
+    return indices
+
+def minmax_indices(values: np.ndarray, max_points: int) -> np.ndarray:
+    """Indices of the lowest and highest point of each bucket plus the first and last point"""
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+
+    buckets = (max_points - 2) // 2
+    interior = np.arange(1, n - 1)
+    if buckets == 0:
+        return np.array([0, n - 1])
+    bucket = (interior - 1) * buckets // (n - 2)
+    # sorted by bucket then value: each bucket's first entry is its minimum and its last its maximum
+    order = interior[np.lexsort((values[interior], bucket))]
+    first = np.flatnonzero(np.diff(bucket[order - 1], prepend=-1))
+    last = np.append(first[1:] - 1, len(order) - 1)
+    kept = np.union1d(order[first], order[last])
+    return np.concatenate(([0], kept, [n - 1]))
+
+def check_downsampling(max_points: Optional[int], method: str):
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown downsampling method '{method}', choose one of {list(DOWNSAMPLE_METHODS)}")
+    if max_points is not None and max_points < MIN_POINTS:
+        raise ValueError(f"max_points must be at least {MIN_POINTS}")
+
+def downsample(values, max_points: int, method: str = 'lttb') -> Tuple[np.ndarray, np.ndarray]:
+    """(indices, values) of a shape preserving subset of at most max_points points"""
+    check_downsampling(max_points, method)
+    values = np.asarray(values, dtype=np.float64)
+    indices = lttb_indices(values, max_points) if method == 'lttb' else minmax_indices(values, max_points)
+    return indices, values[indices]
+
+def downsample_results(results: Dict[str, Any], max_points: Optional[int], method: str = 'lttb') -> Dict[str, Any]:
+    """results with equity_curve reduced to max_points points and equity_curve_index giving their bars.
+
+    Without max_points the results are returned unchanged, at full resolution.
+    """
+    if max_points is None or 'equity_curve' not in results:
+        return results
+    indices, values = downsample(results['equity_curve'], max_points, method)
+    return {**results, 'equity_curve': values.tolist(), 'equity_curve_index': indices.tolist()}
@@ -0,0 +1,86 @@
+import os
+import threading
+import pandas as pd
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+
+Indicator = Union[pd.Series, pd.DataFrame]
+
+def snapshot_key(df: pd.DataFrame) -> Optional[Tuple]:
+    """Identity of the market data in df, from the attrs get_history stamps on its frames.
+
+    The same provider, symbol, interval and cache version plus the same first/last bar
+    and row count means the same bars. Frames without the stamp (simulated
+    paths, hand built frames) have no key and are never cached.
+    """
+    attrs = df.attrs
+    if 'symbol' not in attrs or 'data_version' not in attrs or df.empty:
+        return None
+    return (attrs.get('provider'), attrs['symbol'], attrs['interval'], attrs['data_version'],
+            df.index[0], df.index[-1], len(df))
+
+class IndicatorCache:
+    """LRU of computed indicator columns under a byte budget.
+
+    Entries are keyed by (namespace, indicator, params) on top of the data
+    snapshot, so popular symbol/indicator pairs are computed once per new bar
+    instead of once per request. Namespaces keep services whose indicator
+    implementations differ apart.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Indicator, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, df: pd.DataFrame, indicator: str, params: Tuple,
+                       compute: Callable[[], Indicator], namespace: str = "core") -> Indicator:
+        snapshot = snapshot_key(df)
+        if snapshot is None:
+            return compute()
+
+        key = snapshot + (namespace, indicator, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        value = compute()
+        size = int(value.memory_usage(index=False, deep=False).sum()) if isinstance(value, pd.DataFrame) \
+            else int(value.memory_usage(index=False, deep=False))
+        if size > self.max_bytes:
+            return value
+
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+indicator_cache = IndicatorCache(
+    max_bytes=int(float(os.getenv("MONTY_INDICATOR_CACHE_MB", "256")) * 1024 * 1024)
+)
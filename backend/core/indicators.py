@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 from typing import Dict, Any
+from core.indicator_cache import indicator_cache
 
 class Indicators:
     @staticmethod
@@ -40,7 +41,7 @@ class Indicators:
         return None
     
     @staticmethod
-    def calculate_adx(self, data: pd.DataFrame, period: int) -> pd.Series:
+    def calculate_adx(data: pd.DataFrame, period: int) -> pd.Series:
         data['TR'] = np.maximum(
             data['High'] - data['Low'],
             np.maximum(
@@ -73,7 +74,8 @@ class Indicators:
 
         return adx
 
-    def calculate_bollinger_bands(self, data: pd.DataFrame, period: int, std_dev: float) -> pd.DataFrame:
+    @staticmethod
+    def calculate_bollinger_bands(data: pd.DataFrame, period: int, std_dev: float) -> pd.DataFrame:
         middle = data['Close'].rolling(window=period).mean()
         std = data['Close'].rolling(window=period).std()
         upper = middle + (std * std_dev)
@@ -98,6 +100,13 @@ class Indicators:
         })
 
 
+    @staticmethod
+    def adx_columns(data: pd.DataFrame, period: int) -> pd.DataFrame:
+        """ADX with the +DI14/-DI14 columns the DI cross signals read"""
+        data = data[['High', 'Low', 'Close']].copy()
+        adx = Indicators.calculate_adx(data, period)
+        return pd.DataFrame({'ADX': adx, '+DI14': data['+DI14'], '-DI14': data['-DI14']})
+
     @staticmethod
     def add_indicators(df: pd.DataFrame, ma_condition=None, rsi_condition=None, 
                     macd_condition=None, bb_condition=None, adx_condition=None) -> pd.DataFrame:
@@ -106,9 +115,11 @@ class Indicators:
             period = ma_condition.period
             
             if ma_condition.ma_type == "SMA":
-                df[f'MA_{period}'] = Indicators.calculate_sma(df, period)
+                df[f'MA_{period}'] = indicator_cache.get_or_compute(
+                    df, 'SMA', (period,), lambda: Indicators.calculate_sma(df, period))
             else:  # EMA
-                df[f'MA_{period}'] = Indicators.calculate_ema(df, period)
+                df[f'MA_{period}'] = indicator_cache.get_or_compute(
+                    df, 'EMA', (period,), lambda: Indicators.calculate_ema(df, period))
                 
             deviation = ma_condition.deviation_pct / 100
             df[f'MA_{period}_upper'] = df[f'MA_{period}'] * (1 + deviation)
@@ -116,12 +127,15 @@ class Indicators:
 
         if rsi_condition:
             period = rsi_condition.period
-            df[f'RSI_{period}'] = Indicators.calculate_rsi(df, period)
+            df[f'RSI_{period}'] = indicator_cache.get_or_compute(
+                df, 'RSI', (period,), lambda: Indicators.calculate_rsi(df, period))
 
         if macd_condition:
             # MACD and signal line
-            df['MACD'] = Indicators.calculate_macd(df)
-            df['Signal_Line'] = Indicators.calculate_signal_line(df)
+            df['MACD'] = indicator_cache.get_or_compute(
+                df, 'MACD', (12, 26), lambda: Indicators.calculate_macd(df))
+            df['Signal_Line'] = indicator_cache.get_or_compute(
+                df, 'Signal_Line', (12, 26, 9), lambda: Indicators.calculate_signal_line(df))
             df['MACD_Histogram'] = df['MACD'] - df['Signal_Line']
 
             if hasattr(macd_condition, 'crossover'):
@@ -147,7 +161,8 @@ class Indicators:
             period = bb_condition.params.get('period', 20)
             std_dev = bb_condition.params.get('std_dev', 2.0)
             
-            bb_df = Indicators.calculate_bollinger_bands(df, period, std_dev)
+            bb_df = indicator_cache.get_or_compute(
+                df, 'BB', (period, std_dev), lambda: Indicators.calculate_bollinger_bands(df, period, std_dev))
             df['BB_middle'] = bb_df['BB_middle']
             df['BB_upper'] = bb_df['BB_upper']
             df['BB_lower'] = bb_df['BB_lower']
@@ -163,7 +178,10 @@ class Indicators:
 
         if adx_condition:
             period = adx_condition.params.get('period', 14)
-            df['ADX'] = Indicators.calculate_adx(df, period)
+            adx_df = indicator_cache.get_or_compute(
+                df, 'ADX', (period,), lambda: Indicators.adx_columns(df, period))
+            for column in adx_df.columns:
+                df[column] = adx_df[column]
             
             # add ADX signals
             df['ADX_Strong_Trend'] = df['ADX'] > 25
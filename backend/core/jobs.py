@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict, replace
+from typing import Any, Callable, Dict, Optional
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+FINISHED_STATES = (JOB_COMPLETED, JOB_FAILED)
+
+ProgressCallback = Callable[[int, int], None]
+JobFunction = Callable[[ProgressCallback], Dict[str, Any]]
+
+class JobQueueFull(Exception):
+    pass
+
+@dataclass
+class Job:
+    job_id: str
+    kind: str
+    status: str
+    created_at: float
+    updated_at: float
+    completed: int = 0
+    total: int = 0
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    def status_dict(self) -> Dict[str, Any]:
+        """Everything but the result, for polling"""
+        status = asdict(self)
+        status.pop('result')
+        status['progress_pct'] = (self.completed / self.total) * 100 if self.total else 0
+        return status
+
+class JobStore:
+    """Where job state lives; implementations must be safe to call from several threads"""
+
+    def create(self, job: Job):
+        raise NotImplementedError
+
+    def update(self, job_id: str, **fields):
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[Job]:
+        raise NotImplementedError
+
+class InMemoryJobStore(JobStore):
+    """Jobs kept in process; the oldest finished jobs are dropped beyond max_jobs"""
+
+    def __init__(self, max_jobs: int = 1000):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, job: Job):
+        with self._lock:
+            self._jobs[job.job_id] = job
+            if len(self._jobs) > self.max_jobs:
+                for job_id in [j.job_id for j in self._jobs.values() if j.status in FINISHED_STATES]:
+                    del self._jobs[job_id]
+                    if len(self._jobs) <= self.max_jobs:
+                        break
+
+    def update(self, job_id: str, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id] = replace(self._jobs[job_id], updated_at=time.time(), **fields)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+class SQLiteJobStore(JobStore):
+    """Jobs persisted in a SQLite file, so they survive restarts and can be read by other processes.
+
+    Jobs that were still queued or running when the previous process stopped
+    are marked as failed on startup.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    completed INTEGER NOT NULL DEFAULT 0,
+                    total INTEGER NOT NULL DEFAULT 0,
+                    result TEXT,
+                    error TEXT
+                )
+            """)
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE status IN (?, ?)",
+                (JOB_FAILED, "Interrupted by a server restart", time.time(), JOB_QUEUED, JOB_RUNNING)
+            )
+
+    def create(self, job: Job):
+        row = asdict(job)
+        row['result'] = json.dumps(job.result) if job.result is not None else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO jobs ({', '.join(row)}) VALUES ({', '.join('?' for _ in row)})",
+                tuple(row.values())
+            )
+
+    def update(self, job_id: str, **fields):
+        fields['updated_at'] = time.time()
+        if fields.get('result') is not None:
+            fields['result'] = json.dumps(fields['result'])
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {', '.join(f'{name} = ?' for name in fields)} WHERE job_id = ?",
+                tuple(fields.values()) + (job_id,)
+            )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,))
+            row = cursor.fetchone()
+            columns = [c[0] for c in cursor.description]
+        if row is None:
+            return None
+        job = dict(zip(columns, row))
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return Job(**job)
+
+def create_job_store() -> JobStore:
+    """Job store picked by MONTY_JOB_STORE: "memory" (default) or "sqlite" at MONTY_JOB_DB"""
+    kind = os.getenv("MONTY_JOB_STORE", "memory").lower()
+    if kind == "sqlite":
+        return SQLiteJobStore(os.getenv("MONTY_JOB_DB", os.path.join(tempfile.gettempdir(), "monty-jobs.sqlite3")))
+    if kind != "memory":
+        raise ValueError(f"Unknown job store: {kind}")
+    return InMemoryJobStore()
+
+class JobManager:
+    """Runs submitted jobs on a bounded pool of worker threads and records them in a JobStore.
+
+    A job function receives a report_progress(completed, total) callback and
+    returns a JSON serializable result. At most max_pending jobs may be queued
+    or running at once; submit raises JobQueueFull beyond that.
+    """
+
+    def __init__(self, store: JobStore, max_workers: int = 2, max_pending: int = 100):
+        self.store = store
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="monty-job")
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+    def submit(self, kind: str, fn: JobFunction) -> Job:
+        with self._pending_lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"Too many pending jobs ({self._pending}), try again later")
+            self._pending += 1
+
+        now = time.time()
+        job = Job(job_id=uuid.uuid4().hex, kind=kind, status=JOB_QUEUED, created_at=now, updated_at=now)
+        self.store.create(job)
+        self._executor.submit(self._run, job.job_id, fn)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.store.get(job_id)
+
+    def _run(self, job_id: str, fn: JobFunction):
+        try:
+            self.store.update(job_id, status=JOB_RUNNING)
+
+            def report_progress(completed: int, total: int):
+                self.store.update(job_id, completed=completed, total=total)
+
+            result = fn(report_progress)
+            self.store.update(job_id, status=JOB_COMPLETED, result=result)
+        except Exception as e:
+            print(f"Job {job_id} failed: {str(e)}")
+            self.store.update(job_id, status=JOB_FAILED, error=str(e))
+        finally:
+            with self._pending_lock:
+                self._pending -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+job_manager = JobManager(
+    create_job_store(),
+    max_workers=int(os.getenv("MONTY_JOB_WORKERS", "2")),
+    max_pending=int(os.getenv("MONTY_JOB_MAX_PENDING", "100"))
+)
@@ -0,0 +1,329 @@
+import os
+import json
+import time
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from core.data_providers import DataProvider, get_provider
+from core.resample import resample_base, resample_history, storage_interval
+
+DateLike = Union[str, datetime, pd.Timestamp]
+Fetcher = Callable[[str, pd.Timestamp, pd.Timestamp, str], pd.DataFrame]
+
+DEFAULT_CACHE_DIR = os.getenv("MONTY_CACHE_DIR", os.path.join(tempfile.gettempdir(), "monty-cache"))
+
+# how long the first request missing the cache waits for others to join its upstream fetch
+DEFAULT_COALESCE_SECONDS = float(os.getenv("MONTY_FETCH_COALESCE_MS", "20")) / 1000
+
+# columns and dtype of the stored bars; provider columns outside these (dividends, splits) are not kept
+OHLCV_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+OHLCV_DTYPE = np.float64
+
+def _frame(values: np.ndarray, index: np.ndarray, tz: Optional[str]) -> pd.DataFrame:
+    """DataFrame over stored bar arrays without copying the values"""
+    dates = pd.DatetimeIndex(np.asarray(index).view("datetime64[ns]"))
+    if tz is not None:
+        dates = dates.tz_localize("UTC").tz_convert(tz)
+    return pd.DataFrame(values, index=dates, columns=list(OHLCV_COLUMNS), copy=False)
+
+def _to_day(value: DateLike, round_up: bool = False) -> pd.Timestamp:
+    """Naive midnight timestamp; round_up moves a time inside a day to the next midnight"""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_localize(None)
+    day = ts.normalize()
+    if round_up and day != ts:
+        day += pd.Timedelta(days=1)
+    return day
+
+def _bounds(index: pd.DatetimeIndex, start: pd.Timestamp, end: pd.Timestamp) -> Tuple[int, int]:
+    if index.tz is not None:
+        start = start.tz_localize(index.tz)
+        end = end.tz_localize(index.tz)
+    return int(index.searchsorted(start)), int(index.searchsorted(end))
+
+def slice_range(df: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    """Rows with start <= index < end, comparing in the index's own timezone; a view, not a copy"""
+    if df.empty:
+        return df
+    lo, hi = _bounds(df.index, start, end)
+    return df.iloc[lo:hi]
+
+class _Flight:
+    """An upstream fetch of one symbol/interval that concurrent requests wait on"""
+
+    def __init__(self, start: pd.Timestamp, end: pd.Timestamp):
+        self.start = start
+        self.end = end
+        self.started = False
+        self.done = threading.Event()
+        self.bars: Optional[pd.DataFrame] = None
+        self.version = 0
+        self.error: Optional[Exception] = None
+
+class OHLCVCache:
+    """Per symbol/interval memory-mapped store of provider bars.
+
+    Each entry is a fixed dtype (bars x OHLCV_COLUMNS) float64 .npy array, an
+    .index.npy of int64 UTC nanosecond bar times and a .json manifest with the
+    date range already fetched, the timezone and a version. Reads memory-map
+    the arrays and slice them without copying or parsing, so the OS page cache
+    holds one copy of a symbol's bars for every worker process.
+
+    Each cache fronts one data provider. A request is served from disk and
+    only the missing head or tail of the range is pulled from the provider.
+    Today's bars are refetched once they are older than max_staleness_seconds,
+    since the provider keeps updating them during the session. Concurrent
+    requests missing the same symbol/interval share one upstream fetch.
+
+    Only the base intervals are stored; other timeframes are resampled from
+    the stored bars of their base (see core.resample), so trying another
+    timeframe costs no provider round trip.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_staleness_seconds: float = 900,
+                 provider: Optional[DataProvider] = None, coalesce_seconds: float = DEFAULT_COALESCE_SECONDS):
+        self.cache_dir = cache_dir
+        self.max_staleness_seconds = max_staleness_seconds
+        self.provider = provider or get_provider()
+        self.coalesce_seconds = coalesce_seconds
+        self.fetches = 0
+        self.coalesced = 0
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._flights: Dict[Tuple[str, str], _Flight] = {}
+        self._flights_guard = threading.Lock()
+
+    def _paths(self, symbol: str, interval: str) -> Tuple[str, str, str]:
+        base = os.path.join(self.cache_dir, interval, symbol.upper())
+        return base + ".npy", base + ".index.npy", base + ".json"
+
+    def _lock(self, symbol: str, interval: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault((symbol.upper(), interval), threading.Lock())
+
+    def _load_meta(self, symbol: str, interval: str) -> Optional[dict]:
+        *_, meta_path = self._paths(symbol, interval)
+        try:
+            with open(meta_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _load(self, symbol: str, interval: str) -> Tuple[Optional[pd.DataFrame], Optional[dict]]:
+        """The whole entry as a DataFrame over the memory-mapped arrays, and its manifest"""
+        values_path, index_path, _ = self._paths(symbol, interval)
+        meta = self._load_meta(symbol, interval)
+        if meta is None:
+            return None, None
+        try:
+            values = np.load(values_path, mmap_mode="r")
+            index = np.load(index_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None, meta
+        # another process may be halfway through replacing the files, treat that as a miss
+        if len(values) != meta.get("rows") or len(index) != len(values):
+            return None, meta
+        return _frame(values, index, meta.get("tz")), meta
+
+    def _store(self, symbol: str, interval: str, df: pd.DataFrame, meta: dict):
+        values_path, index_path, meta_path = self._paths(symbol, interval)
+        index = df.index.tz_convert("UTC") if df.index.tz is not None else df.index
+        try:
+            os.makedirs(os.path.dirname(values_path), exist_ok=True)
+            # write to temp files and rename so readers in other processes never see a partial file,
+            # the manifest goes last as it is what marks the new bars as present
+            for path, array in ((values_path, df.reindex(columns=list(OHLCV_COLUMNS)).to_numpy(dtype=OHLCV_DTYPE)),
+                                (index_path, index.as_unit("ns").asi8)):
+                with open(path + ".tmp", "wb") as f:
+                    np.save(f, np.ascontiguousarray(array))
+                os.replace(path + ".tmp", path)
+            with open(meta_path + ".tmp", "w") as f:
+                json.dump({**meta, "tz": str(df.index.tz) if df.index.tz is not None else None}, f)
+            os.replace(meta_path + ".tmp", meta_path)
+        except OSError as e:
+            print(f"Could not write OHLCV cache for {symbol}: {str(e)}")
+
+    def _stamp(self, df: pd.DataFrame, symbol: str, interval: str, version: int) -> pd.DataFrame:
+        """Record which snapshot df came from so derived results (e.g. indicators) can be cached"""
+        df = df.copy(deep=False)
+        df.attrs = {"symbol": symbol.upper(), "interval": interval, "data_version": version,
+                    "provider": self.provider.name}
+        return df
+
+    def version(self, symbol: str, interval: str = "1d") -> int:
+        """Increases every time new bars are written for symbol/interval; 0 when nothing is cached"""
+        meta = self._load_meta(symbol, storage_interval(interval))
+        return meta["version"] if meta else 0
+
+    def manifest(self) -> Dict[str, Dict[str, dict]]:
+        """Manifest of every stored entry, by interval and symbol"""
+        entries: Dict[str, Dict[str, dict]] = {}
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for interval in sorted(os.listdir(self.cache_dir)):
+            directory = os.path.join(self.cache_dir, interval)
+            if not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(".json"):
+                    meta = self._load_meta(name[:-len(".json")], interval)
+                    if meta is not None:
+                        entries.setdefault(interval, {})[name[:-len(".json")]] = meta
+        return entries
+
+    def _missing(self, meta: Optional[dict], start: pd.Timestamp, end: pd.Timestamp,
+                 today: pd.Timestamp) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """Parts of start..end that have to come from the provider, given the entry's manifest"""
+        if meta is None:
+            return [(start, end)]
+        missing = []
+        covered_start = pd.Timestamp(meta["start"])
+        covered_end = pd.Timestamp(meta["end"])
+        if start < covered_start:
+            missing.append((start, covered_start))
+        stale = time.time() - meta.get("fetched_at", 0) > self.max_staleness_seconds
+        if end > covered_end and (covered_end < today or stale):
+            missing.append((covered_end, end))
+        return missing
+
+    def _fill(self, symbol: str, interval: str, start: pd.Timestamp, end: pd.Timestamp,
+              fetch: Fetcher) -> Tuple[Optional[pd.DataFrame], int]:
+        """Fetch whatever start..end is missing and store it; the entry's bars afterwards and their version"""
+        today = _to_day(datetime.now())
+        with self._lock(symbol, interval):
+            cached, meta = self._load(symbol, interval)
+            missing = self._missing(meta if cached is not None else None, start, end, today)
+            if not missing:
+                return cached, meta["version"]
+
+            frames = [] if cached is None else [cached]
+            for fetch_start, fetch_end in missing:
+                self.fetches += 1
+                fetched = fetch(symbol, fetch_start, fetch_end, interval)
+                if fetched is not None and not fetched.empty:
+                    frames.append(fetched.reindex(columns=list(OHLCV_COLUMNS)).astype(OHLCV_DTYPE))
+
+            if not frames:
+                return None, 0
+            added_bars = len(frames) > (0 if cached is None else 1)
+
+            merged = pd.concat(frames)
+            merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+
+            # never record today as fully covered, its bars are still changing
+            covered = [] if cached is None else [meta]
+            new_start = min([start] + [pd.Timestamp(m["start"]) for m in covered])
+            new_end = max([min(end, today)] + [pd.Timestamp(m["end"]) for m in covered])
+            version = (meta["version"] if meta else 0) + int(added_bars)
+            self._store(symbol, interval, merged, {
+                "start": new_start.isoformat(),
+                "end": new_end.isoformat(),
+                "rows": len(merged),
+                "fetched_at": time.time(),
+                "version": version
+            })
+            return merged, version
+
+    def get_history(self, symbol: str, start: DateLike, end: DateLike, interval: str = "1d",
+                    fetch: Optional[Fetcher] = None) -> pd.DataFrame:
+        """Bars of symbol with start <= time < end.
+
+        Served from disk when the entry covers the range. Otherwise the
+        request joins the upstream fetch in flight for symbol/interval: a
+        fetch still gathering requests for coalesce_seconds is widened to the
+        union of their ranges, a running fetch that covers the range is waited
+        for, and a new fetch is started when neither applies. Every waiter
+        gets its slice of the one result.
+
+        Timeframes that are not stored are resampled from their base interval.
+        """
+        base = resample_base(interval)
+        if base is not None:
+            return resample_history(self.get_history(symbol, start, end, base, fetch), interval)
+
+        fetch = fetch or self.provider
+        start = _to_day(start)
+        end = _to_day(end, round_up=True)
+        key = (symbol.upper(), interval)
+
+        while True:
+            cached, meta = self._load(symbol, interval)
+            if cached is not None and not self._missing(meta, start, end, _to_day(datetime.now())):
+                return self._stamp(slice_range(cached, start, end), symbol, interval, meta["version"])
+
+            with self._flights_guard:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight(start, end)
+                elif not flight.started:
+                    flight.start, flight.end = min(flight.start, start), max(flight.end, end)
+                if not leader and flight.start <= start and end <= flight.end:
+                    self.coalesced += 1
+                    joined = True
+                else:
+                    joined = leader
+
+            if not leader:
+                flight.done.wait()
+                if not joined:
+                    # the fetch that was running did not cover this range, go again with the cache it left
+                    continue
+                if flight.error is not None:
+                    raise flight.error
+                break
+
+            if self.coalesce_seconds > 0:
+                time.sleep(self.coalesce_seconds)
+            with self._flights_guard:
+                flight.started = True
+            try:
+                flight.bars, flight.version = self._fill(symbol, interval, flight.start, flight.end, fetch)
+            except Exception as e:
+                flight.error = e
+                raise
+            finally:
+                with self._flights_guard:
+                    del self._flights[key]
+                flight.done.set()
+            break
+
+        if flight.bars is None:
+            return pd.DataFrame()
+        return self._stamp(slice_range(flight.bars, start, end), symbol, interval, flight.version)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._flights_guard:
+            in_flight = len(self._flights)
+        return {
+            'provider': self.provider.name,
+            'upstream_fetches': self.fetches,
+            'coalesced_requests': self.coalesced,
+            'in_flight': in_flight
+        }
+
+_caches: Dict[str, OHLCVCache] = {}
+_caches_guard = threading.Lock()
+
+def cache_for(provider: Optional[str] = None) -> OHLCVCache:
+    """The OHLCV cache of a data provider, each kept in its own directory; the deployment default without one"""
+    source = get_provider(provider)
+    with _caches_guard:
+        if source.name not in _caches:
+            _caches[source.name] = OHLCVCache(os.path.join(DEFAULT_CACHE_DIR, source.name), provider=source)
+        return _caches[source.name]
+
+ohlcv_cache = cache_for()
+
+def market_data_stats() -> Dict[str, Dict[str, Any]]:
+    with _caches_guard:
+        return {name: cache.stats() for name, cache in _caches.items()}
+
+def get_history(symbol: str, start: DateLike, end: DateLike, interval: str = "1d",
+                provider: Optional[str] = None) -> pd.DataFrame:
+    """Historical OHLCV bars for symbol, served through the provider's shared on-disk cache"""
+    return cache_for(provider).get_history(symbol, start, end, interval)
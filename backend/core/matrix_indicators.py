@@ -0,0 +1,142 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, Tuple
+
+class MatrixIndicators:
+    """Indicator calculations over a (paths x days) block of prices.
+
+    Every method takes 2D arrays with one simulated path per row and returns
+    arrays of the same shape, matching the pandas based versions in
+    MonteCarloSimulator / Indicators column for column (leading values are NaN
+    while the window fills up).
+    """
+
+    @staticmethod
+    def rolling_mean(values: np.ndarray, period: int) -> np.ndarray:
+        out = np.full(values.shape, np.nan)
+        if period <= values.shape[1]:
+            out[:, period - 1:] = sliding_window_view(values, period, axis=1).mean(axis=2)
+        return out
+
+    @staticmethod
+    def rolling_std(values: np.ndarray, period: int) -> np.ndarray:
+        out = np.full(values.shape, np.nan)
+        if 1 < period <= values.shape[1]:
+            out[:, period - 1:] = sliding_window_view(values, period, axis=1).std(axis=2, ddof=1)
+        return out
+
+    @staticmethod
+    def ewm_mean(values: np.ndarray, span: int, adjust: bool = False, min_periods: int = 0) -> np.ndarray:
+        """Row-wise equivalent of Series.ewm(span=span, adjust=adjust, min_periods=min_periods).mean()"""
+        alpha = 2.0 / (span + 1.0)
+        old_wt_factor = 1.0 - alpha
+        new_wt = 1.0 if adjust else alpha
+
+        out = np.empty(values.shape)
+        weighted = values[:, 0].copy()
+        old_wt = np.ones(values.shape[0])
+        nobs = (~np.isnan(weighted)).astype(int)
+        out[:, 0] = np.where(nobs >= max(min_periods, 1), weighted, np.nan)
+
+        for t in range(1, values.shape[1]):
+            cur = values[:, t]
+            is_obs = ~np.isnan(cur)
+            nobs += is_obs
+            has_weight = ~np.isnan(weighted)
+
+            # NaNs still age the existing weights, they just don't contribute a value
+            old_wt = np.where(has_weight, old_wt * old_wt_factor, old_wt)
+            update = has_weight & is_obs & (weighted != cur)
+            with np.errstate(invalid='ignore'):
+                blended = (old_wt * weighted + new_wt * cur) / (old_wt + new_wt)
+            weighted = np.where(update, blended, weighted)
+            if adjust:
+                old_wt = np.where(has_weight & is_obs, old_wt + new_wt, old_wt)
+            else:
+                old_wt = np.where(has_weight & is_obs, 1.0, old_wt)
+
+            weighted = np.where(~has_weight & is_obs, cur, weighted)
+            out[:, t] = np.where(nobs >= max(min_periods, 1), weighted, np.nan)
+
+        return out
+
+    @staticmethod
+    def shift(values: np.ndarray, periods: int = 1) -> np.ndarray:
+        out = np.full(values.shape, np.nan)
+        out[:, periods:] = values[:, :-periods]
+        return out
+
+    @staticmethod
+    def calculate_sma(close: np.ndarray, period: int) -> np.ndarray:
+        return MatrixIndicators.rolling_mean(close, period)
+
+    @staticmethod
+    def calculate_ema(close: np.ndarray, period: int) -> np.ndarray:
+        return MatrixIndicators.ewm_mean(close, period)
+
+    @staticmethod
+    def calculate_rsi(close: np.ndarray, period: int) -> np.ndarray:
+        delta = close - MatrixIndicators.shift(close)
+        # the leading NaN delta counts as a zero gain/loss, same as Series.where
+        gain = MatrixIndicators.rolling_mean(np.where(delta > 0, delta, 0.0), period)
+        loss = MatrixIndicators.rolling_mean(np.where(delta < 0, -delta, 0.0), period)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = gain / loss
+            return 100 - (100 / (1 + rs))
+
+    @staticmethod
+    def calculate_macd(close: np.ndarray, short_period=12, long_period=26) -> np.ndarray:
+        return MatrixIndicators.ewm_mean(close, short_period) - MatrixIndicators.ewm_mean(close, long_period)
+
+    @staticmethod
+    def calculate_signal_line(macd: np.ndarray, signal_period=9) -> np.ndarray:
+        return MatrixIndicators.ewm_mean(macd, signal_period)
+
+    @staticmethod
+    def calculate_bollinger_bands(close: np.ndarray, high: np.ndarray, low: np.ndarray,
+                                  period: int, std_dev: float) -> Dict[str, np.ndarray]:
+        middle = MatrixIndicators.rolling_mean(close, period)
+        std = MatrixIndicators.rolling_std(close, period)
+        upper = middle + (std * std_dev)
+        lower = middle - (std * std_dev)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bandwidth = ((upper - lower) / middle) * 100
+            percent_b = (close - lower) / (upper - lower)
+        typical_price = (high + low + close) / 3
+
+        return {
+            'BB_middle': middle,
+            'BB_upper': upper,
+            'BB_lower': lower,
+            'BB_bandwidth': bandwidth,
+            'BB_percent_b': percent_b,
+            'BB_typical_price': typical_price
+        }
+
+    @staticmethod
+    def calculate_adx(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                      period: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns (ADX, +DI, -DI)"""
+        prev_close = MatrixIndicators.shift(close)
+        prev_high = MatrixIndicators.shift(high)
+        prev_low = MatrixIndicators.shift(low)
+
+        tr = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+        up_move = high - prev_high
+        down_move = prev_low - low
+        plus_dm = np.where(up_move > down_move, np.maximum(up_move, 0), 0.0)
+        minus_dm = np.where(down_move > up_move, np.maximum(down_move, 0), 0.0)
+
+        tr_smooth = MatrixIndicators.ewm_mean(tr, period, adjust=True, min_periods=period)
+        plus_dm_smooth = MatrixIndicators.ewm_mean(plus_dm, period, adjust=True, min_periods=period)
+        minus_dm_smooth = MatrixIndicators.ewm_mean(minus_dm, period, adjust=True, min_periods=period)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            plus_di = 100 * (plus_dm_smooth / tr_smooth)
+            minus_di = 100 * (minus_dm_smooth / tr_smooth)
+            dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+
+        adx = MatrixIndicators.ewm_mean(dx, period, adjust=True, min_periods=period)
+        return adx, plus_di, minus_di
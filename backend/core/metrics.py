@@ -0,0 +1,177 @@
+import numpy as np
+from typing import Dict, Optional, Sequence
+from core.resample import MINUTES_PER_UNIT, parse_timeframe
+
+TRADING_DAYS = 252
+RISK_FREE_RATE = 0.02
+VAR_CONFIDENCE = 0.95
+
+# bars per year of the request timeframes, for annualizing
+PERIODS_PER_YEAR = {
+    '1m': TRADING_DAYS * 390,
+    '5m': TRADING_DAYS * 78,
+    '15m': TRADING_DAYS * 26,
+    '30m': TRADING_DAYS * 13,
+    '1h': TRADING_DAYS * 7,
+    '4h': TRADING_DAYS * 2,
+    '1d': TRADING_DAYS,
+    '1wk': 52,
+    '1mo': 12,
+}
+SESSION_MINUTES = 390
+# annualizing a few intraday bars can overflow the return to inf, which JSON responses cannot carry
+MAX_CALMAR_RATIO = 1e6
+
+CURVE_METRICS = ('max_drawdown_pct', 'drawdown_duration', 'volatility_pct', 'sharpe_ratio', 'sortino_ratio',
+                 'calmar_ratio', 'var_pct', 'cvar_pct')
+
+def periods_per_year(timeframe: Optional[str]) -> int:
+    timeframe = timeframe or '1d'
+    if timeframe in PERIODS_PER_YEAR:
+        return PERIODS_PER_YEAR[timeframe]
+    try:
+        count, unit = parse_timeframe(timeframe)
+    except ValueError:
+        return TRADING_DAYS
+    if unit in MINUTES_PER_UNIT:
+        # a session's last bar is counted even when it is cut short by the close
+        return TRADING_DAYS * -(-SESSION_MINUTES // (count * MINUTES_PER_UNIT[unit]))
+    return max({'d': TRADING_DAYS, 'wk': 52, 'mo': 12}[unit] // count, 1)
+
+def as_curves(equity_curves) -> np.ndarray:
+    """Equity curves as a float (curves x bars) array; a single curve becomes one row.
+
+    Curves of different lengths are padded at the end with NaN, which every
+    metric below ignores.
+    """
+    if isinstance(equity_curves, np.ndarray):
+        curves = equity_curves.astype(np.float64, copy=False)
+        return curves[np.newaxis] if curves.ndim == 1 else curves
+    equity_curves = list(equity_curves)
+    if not equity_curves or np.ndim(equity_curves[0]) == 0:
+        return np.asarray(equity_curves, dtype=np.float64).reshape(1, -1)
+    width = max(len(curve) for curve in equity_curves)
+    curves = np.full((len(equity_curves), width), np.nan)
+    for row, curve in zip(curves, equity_curves):
+        row[:len(curve)] = curve
+    return curves
+
+def drawdowns_pct(curves: np.ndarray) -> np.ndarray:
+    """Percentage below the running maximum at every bar, NaN on padding"""
+    curves = as_curves(curves)
+    # fmax skips the NaN padding so the running peak carries over it
+    peak = np.fmax.accumulate(curves, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(peak > 0, (peak - curves) / peak * 100, np.where(np.isnan(curves), np.nan, 0.0))
+
+def max_drawdown_pct(curves: np.ndarray) -> np.ndarray:
+    drawdowns = drawdowns_pct(curves)
+    if drawdowns.shape[1] == 0:
+        return np.zeros(len(drawdowns))
+    return np.maximum(np.nan_to_num(drawdowns, nan=0.0).max(axis=1), 0.0)
+
+def drawdown_duration(curves: np.ndarray) -> np.ndarray:
+    """Longest run of bars spent below a previous peak"""
+    underwater = np.nan_to_num(drawdowns_pct(curves), nan=0.0) > 0
+    if underwater.shape[1] == 0:
+        return np.zeros(len(underwater), dtype=np.int64)
+    bars = np.arange(underwater.shape[1])
+    # bars since the last bar at a peak, taken at every underwater bar
+    last_peak = np.maximum.accumulate(np.where(underwater, -1, bars), axis=1)
+    return np.where(underwater, bars - last_peak, 0).max(axis=1)
+
+def period_returns(curves: np.ndarray) -> np.ndarray:
+    """Simple returns between consecutive bars, (curves x bars - 1)"""
+    curves = as_curves(curves)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = curves[:, 1:] / curves[:, :-1] - 1
+    return np.where(np.isfinite(returns), returns, np.where(np.isnan(curves[:, 1:]), np.nan, 0.0))
+
+def _row_mean(values: np.ndarray) -> np.ndarray:
+    counts = np.sum(~np.isnan(values), axis=1)
+    totals = np.nansum(values, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(counts > 0, totals / np.maximum(counts, 1), 0.0)
+
+def _row_std(values: np.ndarray) -> np.ndarray:
+    mean = _row_mean(values)
+    return np.sqrt(_row_mean((values - mean[:, np.newaxis]) ** 2))
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / denominator, 0.0)
+
+def volatility_pct(returns: np.ndarray, periods: int = TRADING_DAYS) -> np.ndarray:
+    """Annualized standard deviation of the bar returns, in percent"""
+    return _row_std(returns) * np.sqrt(periods) * 100
+
+def sharpe_ratio(returns: np.ndarray, risk_free_rate: float = RISK_FREE_RATE,
+                 periods: int = TRADING_DAYS) -> np.ndarray:
+    excess = returns - risk_free_rate / periods
+    return _ratio(_row_mean(excess), _row_std(excess)) * np.sqrt(periods)
+
+def sortino_ratio(returns: np.ndarray, risk_free_rate: float = RISK_FREE_RATE,
+                  periods: int = TRADING_DAYS) -> np.ndarray:
+    """Sharpe ratio with only the returns below the risk free rate counted as risk"""
+    excess = returns - risk_free_rate / periods
+    downside = np.sqrt(_row_mean(np.minimum(excess, 0.0) ** 2))
+    return _ratio(_row_mean(excess), downside) * np.sqrt(periods)
+
+def calmar_ratio(curves: np.ndarray, periods: int = TRADING_DAYS) -> np.ndarray:
+    """Annualized return over max drawdown, clamped to +-MAX_CALMAR_RATIO"""
+    curves = as_curves(curves)
+    bars = np.sum(~np.isnan(curves), axis=1)
+    if curves.shape[1] == 0:
+        return np.zeros(len(curves))
+    first = curves[:, 0]
+    last = curves[np.arange(len(curves)), np.maximum(bars - 1, 0)]
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        annual_return = np.where((first > 0) & (last > 0) & (bars > 1),
+                                 (last / first) ** (periods / np.maximum(bars - 1, 1)) - 1, 0.0)
+    return np.clip(_ratio(annual_return * 100, max_drawdown_pct(curves)), -MAX_CALMAR_RATIO, MAX_CALMAR_RATIO)
+
+def _row_quantile(values: np.ndarray, q: float) -> np.ndarray:
+    """Linearly interpolated quantile of every row, ignoring NaN (0 for rows without values)"""
+    ordered = np.sort(values, axis=1)  # NaN sorts to the end of each row
+    counts = np.sum(~np.isnan(values), axis=1)
+    position = np.maximum(counts - 1, 0) * q
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, np.maximum(counts - 1, 0))
+    rows = np.arange(len(values))
+    below, above = ordered[rows, lower], ordered[rows, upper]
+    quantile = below + (above - below) * (position - lower)
+    return np.where(counts > 0, quantile, 0.0)
+
+def value_at_risk_pct(returns: np.ndarray, confidence: float = VAR_CONFIDENCE) -> np.ndarray:
+    """Historical one-bar VaR: the loss only exceeded on (1 - confidence) of the bars, in percent"""
+    if returns.shape[1] == 0:
+        return np.zeros(len(returns))
+    return np.maximum(-_row_quantile(returns, 1 - confidence), 0.0) * 100
+
+def conditional_value_at_risk_pct(returns: np.ndarray, confidence: float = VAR_CONFIDENCE) -> np.ndarray:
+    """Expected shortfall: the average loss over the bars at or beyond the VaR, in percent"""
+    if returns.shape[1] == 0:
+        return np.zeros(len(returns))
+    var = value_at_risk_pct(returns, confidence)
+    tail = np.where(returns <= -var[:, np.newaxis] / 100, returns, np.nan)
+    return np.maximum(-_row_mean(tail), 0.0) * 100
+
+def curve_metrics(equity_curves, risk_free_rate: float = RISK_FREE_RATE, periods: int = TRADING_DAYS,
+                  confidence: float = VAR_CONFIDENCE) -> Dict[str, np.ndarray]:
+    """Every metric of CURVE_METRICS for a batch of equity curves in one pass, one value per curve"""
+    curves = as_curves(equity_curves)
+    returns = period_returns(curves)
+    return {
+        'max_drawdown_pct': max_drawdown_pct(curves),
+        'drawdown_duration': drawdown_duration(curves),
+        'volatility_pct': volatility_pct(returns, periods),
+        'sharpe_ratio': sharpe_ratio(returns, risk_free_rate, periods),
+        'sortino_ratio': sortino_ratio(returns, risk_free_rate, periods),
+        'calmar_ratio': calmar_ratio(curves, periods),
+        'var_pct': value_at_risk_pct(returns, confidence),
+        'cvar_pct': conditional_value_at_risk_pct(returns, confidence),
+    }
+
+def summarize_curve(equity_curve: Sequence[float], periods: int = TRADING_DAYS) -> Dict[str, float]:
+    """curve_metrics of a single curve as plain numbers"""
+    return {name: values[0].item() for name, values in curve_metrics(equity_curve, periods=periods).items()}
@@ -1,13 +1,42 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
 import random
-from dataclasses import dataclass
-from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+import os
+import secrets
+from statistics import NormalDist
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
 
 from core.helpers.backtest_service import MonteCarloBacktestService, BacktestRequest
+from core.matrix_indicators import MatrixIndicators
+from core.market_data import get_history
+from core.indicator_cache import indicator_cache
+from core.metrics import curve_metrics
+
+# per-simulation metrics returned by workers, in column order
+TRADE_FIELDS = ('return', 'drawdown', 'win_rate', 'trade_count', 'avg_profit', 'avg_loss')
+# risk metrics of each path's equity curve, computed for a whole chunk at once
+RISK_FIELDS = ('sharpe_ratio', 'sortino_ratio', 'calmar_ratio', 'volatility_pct', 'var_pct', 'cvar_pct',
+               'drawdown_duration')
+RESULT_FIELDS = TRADE_FIELDS + RISK_FIELDS
+
+def simulation_rng(seed: int, simulation_index: int) -> np.random.Generator:
+    """Independent stream for one simulation, identical to SeedSequence(seed).spawn(n)[simulation_index]"""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(simulation_index,)))
+
+def new_seed() -> int:
+    # 53 bits so the seed survives a round trip through JSON in the browser
+    return secrets.randbits(53)
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
 
 @dataclass
 class MonteCarloResults:
@@ -22,19 +51,33 @@ class MonteCarloResults:
     sharpe_ratio: float
     simulation_count: int
     successful_simulations: int
+    seed: Optional[int] = None
+    # only set by adaptive runs: achieved confidence interval widths of the mean return / mean drawdown
+    return_ci_width: Optional[float] = None
+    drawdown_ci_width: Optional[float] = None
+    converged: Optional[bool] = None
+    # averages over the successful paths of the per-path risk metrics
+    sortino_ratio: Optional[float] = None
+    calmar_ratio: Optional[float] = None
+    volatility_pct: Optional[float] = None
+    var_pct: Optional[float] = None
+    cvar_pct: Optional[float] = None
+    avg_drawdown_duration: Optional[float] = None
 
 class MonteCarloSimulator:
-    def __init__(self, lookback_years: int = 10, simulation_length_days: int = 252):
+    def __init__(self, lookback_years: int = 10, simulation_length_days: int = 252,
+                 execution_mode: str = "thread", max_workers: Optional[int] = None):
         self.lookback_years = lookback_years
         self.simulation_length_days = simulation_length_days
+        self.execution_mode = execution_mode
+        self.max_workers = max_workers or available_cpus()
 
-    def get_historical_data(self, symbol: str) -> pd.DataFrame:
+    def get_historical_data(self, symbol: str, provider: Optional[str] = None) -> pd.DataFrame:
         try:
             end_date = datetime.now()
             start_date = end_date - timedelta(days=self.lookback_years * 365)
             
-            ticker = yf.Ticker(symbol)
-            df = ticker.history(start=start_date, end=end_date, interval="1d")
+            df = get_history(symbol, start_date, end_date, "1d", provider)
             
             if df.empty:
                 raise ValueError(f"No historical data found for symbol {symbol}")
@@ -146,19 +189,6 @@ class MonteCarloSimulator:
             df['Signal_Line'] = self.calculate_signal_line(df)
             df['MACD_Histogram'] = df['MACD'] - df['Signal_Line']
 
-            if hasattr(entry_conditions.macd_condition, 'crossover'):
-                if entry_conditions.macd_condition.crossover == "BULLISH":
-                    df['MACD_Crossover'] = (df['MACD'].shift(1) < df['Signal_Line'].shift(1)) & (df['MACD'] > df['Signal_Line'])
-                elif entry_conditions.macd_condition.crossover == "BEARISH":
-                    df['MACD_Crossover'] = (df['MACD'].shift(1) > df['Signal_Line'].shift(1)) & (df['MACD'] < df['Signal_Line'])
-
-            if hasattr(entry_conditions.macd_condition, 'histogram_positive'):
-                df['MACD_Histogram_Positive'] = df['MACD_Histogram'] > 0
-
-            if hasattr(entry_conditions.macd_condition, 'macd_comparison'):
-                if entry_conditions.macd_condition.macd_comparison == "ABOVE_ZERO":
-                    df['MACD_Above_Zero'] = df['MACD'] > 0
-
         if entry_conditions.bb_condition:
             bb_cond = entry_conditions.bb_condition
             bb_df = self.calculate_bollinger_bands(df, bb_cond.period, bb_cond.std_dev)
@@ -172,105 +202,157 @@ class MonteCarloSimulator:
 
         return df
 
-    def calculate_sharpe_ratio(self, returns: List[float], risk_free_rate: float = 0.02) -> float:
-        """Calculate Sharpe ratio for the simulation results"""
-        returns_array = np.array(returns)
-        excess_returns = returns_array - risk_free_rate
-        if len(excess_returns) > 0:
-            return np.mean(excess_returns) / np.std(excess_returns) if np.std(excess_returns) != 0 else 0
-        return 0
-    
-    def generate_simulation_data(self, historical_data: pd.DataFrame, entry_conditions) -> pd.DataFrame:
+    def get_bootstrap_returns(self, historical_data: pd.DataFrame) -> np.ndarray:
+        """Daily returns the simulated paths are resampled from, with outliers beyond 5 std removed.
+
+        Computed once per data snapshot of a symbol and shared by every
+        simulation request on it (and prepared at startup for MONTY_WARMUP_SYMBOLS).
+        """
+        if historical_data.empty:
+            raise ValueError("Historical data is empty")
+        
+        required_columns = ['Open', 'High', 'Low', 'Close']
+        missing_columns = [col for col in required_columns if col not in historical_data.columns]
+        if missing_columns:
+            raise ValueError(f"Missing required columns: {missing_columns}")
+
+        return indicator_cache.get_or_compute(historical_data, 'bootstrap_returns', (),
+                                              lambda: self._bootstrap_returns(historical_data),
+                                              namespace=__name__).values
+
+    def _bootstrap_returns(self, historical_data: pd.DataFrame) -> pd.Series:
+        returns = historical_data['Close'].pct_change().dropna()
+        if len(returns) == 0:
+            raise ValueError("No valid returns calculated from historical data")
+        
+        std_dev = returns.std()
+        returns = returns[abs(returns) <= 5 * std_dev]
+        
+        if len(returns) < 100:
+            raise ValueError("Insufficient valid return data points after filtering")
+        
+        return returns
+
+    def get_initial_price(self, historical_data: pd.DataFrame) -> float:
+        initial_price = historical_data['Close'].iloc[-1]
+        if pd.isna(initial_price) or initial_price <= 0:
+            raise ValueError("Invalid initial price")
+        return float(initial_price)
+
+    def generate_price_paths(self, historical_data: pd.DataFrame, num_simulations: int,
+                             seed: Optional[int] = None) -> np.ndarray:
+        """Generate all simulated close paths at once as a (num_simulations, simulation_length_days + 1) array"""
+        returns = self.get_bootstrap_returns(historical_data)
+        initial_price = self.get_initial_price(historical_data)
+        return self.price_paths_from_returns(returns, initial_price, num_simulations, seed)
+
+    def price_paths_from_returns(self, returns: np.ndarray, initial_price: float, num_simulations: int,
+                                 seed: Optional[int] = None, first_simulation: int = 0) -> np.ndarray:
+        """Paths for simulations first_simulation .. first_simulation + num_simulations - 1.
+
+        With a seed every path comes from its own simulation_rng stream, so a
+        path only depends on (seed, simulation index) and not on how the run was
+        split into chunks or workers.
+        """
+        if seed is None:
+            random_returns = np.random.choice(returns, size=(num_simulations, self.simulation_length_days))
+        else:
+            random_returns = np.empty((num_simulations, self.simulation_length_days))
+            for i in range(num_simulations):
+                rng = simulation_rng(seed, first_simulation + i)
+                random_returns[i] = rng.choice(returns, size=self.simulation_length_days)
+        
+        # a step that would take the price to zero or below halves the previous price instead
+        growth = 1 + random_returns
+        growth = np.where(growth > 0, growth, 0.5)
+        
+        steps = np.empty((num_simulations, self.simulation_length_days + 1))
+        steps[:, 0] = initial_price
+        steps[:, 1:] = growth
+        return np.cumprod(steps, axis=1)
+
+    def generate_simulation_data(self, historical_data: pd.DataFrame, entry_conditions,
+                                 seed: Optional[int] = None, simulation_index: int = 0) -> pd.DataFrame:
+        """Single simulated frame; with a seed this regenerates simulation simulation_index of that run"""
         try:
-            if historical_data.empty:
-                raise ValueError("Historical data is empty")
-            
-            required_columns = ['Open', 'High', 'Low', 'Close']
-            missing_columns = [col for col in required_columns if col not in historical_data.columns]
-            if missing_columns:
-                raise ValueError(f"Missing required columns: {missing_columns}")
-                    
-            returns = historical_data['Close'].pct_change().dropna()
-            if len(returns) == 0:
-                raise ValueError("No valid returns calculated from historical data")
-            
-            std_dev = returns.std()
-            returns = returns[abs(returns) <= 5 * std_dev]
-            
-            if len(returns) < 100:
-                raise ValueError("Insufficient valid return data points after filtering")
-                    
-            random_returns = np.random.choice(returns.values, size=self.simulation_length_days)
+            returns = self.get_bootstrap_returns(historical_data)
+            initial_price = self.get_initial_price(historical_data)
+            prices = self.price_paths_from_returns(returns, initial_price, 1, seed, simulation_index)[0]
+            return self.build_simulated_frame(prices, entry_conditions)
+        except Exception as e:
+            raise ValueError(f"Error generating simulation data: {str(e)}")
+
+    def build_simulated_columns(self, price_paths: np.ndarray, entry_conditions) -> Dict[str, np.ndarray]:
+        """OHLC and indicator columns for a whole (paths x days) block of simulated closes"""
+        close = price_paths
+        open_ = MatrixIndicators.shift(close)
+        open_[:, 0] = close[:, 0]
+        columns = {
+            'Close': close,
+            'Open': open_,
+            'High': np.maximum(open_, close) * 1.002,
+            'Low': np.minimum(open_, close) * 0.998
+        }
+
+        if entry_conditions.ma_condition:
+            ma_cond = entry_conditions.ma_condition
+            period = ma_cond.period
             
-            initial_price = historical_data['Close'].iloc[-1]
-            if pd.isna(initial_price) or initial_price <= 0:
-                raise ValueError("Invalid initial price")
+            if ma_cond.ma_type == "SMA":
+                ma = MatrixIndicators.calculate_sma(close, period)
+            else:
+                ma = MatrixIndicators.calculate_ema(close, period)
                 
-            prices = [initial_price]
-            for r in random_returns:
-                new_price = prices[-1] * (1 + r)
-                if new_price <= 0:
-                    new_price = prices[-1] * 0.5
-                prices.append(new_price)
-            
-            dates = pd.date_range(start=datetime.now(), periods=self.simulation_length_days + 1, freq='B')
-            simulated_data = pd.DataFrame(index=dates)
-            simulated_data['Close'] = prices
-            
-            simulated_data['Open'] = simulated_data['Close'].shift(1)
-            simulated_data['High'] = simulated_data[['Open', 'Close']].max(axis=1) * 1.002
-            simulated_data['Low'] = simulated_data[['Open', 'Close']].min(axis=1) * 0.998
-            
-            simulated_data.iloc[0, simulated_data.columns.get_loc('Open')] = initial_price
+            deviation = ma_cond.deviation_pct / 100
+            columns[f'MA_{period}'] = ma
+            columns[f'MA_{period}_upper'] = ma * (1 + deviation)
+            columns[f'MA_{period}_lower'] = ma * (1 - deviation)
 
-            # Add indicators based on entry conditions
-            if entry_conditions.ma_condition:
-                ma_cond = entry_conditions.ma_condition
-                period = ma_cond.period
-                
-                if ma_cond.ma_type == "SMA":
-                    simulated_data[f'MA_{period}'] = simulated_data['Close'].rolling(window=period).mean()
-                else:
-                    simulated_data[f'MA_{period}'] = simulated_data['Close'].ewm(span=period, adjust=False).mean()
-                    
-                deviation = ma_cond.deviation_pct / 100
-                simulated_data[f'MA_{period}_upper'] = simulated_data[f'MA_{period}'] * (1 + deviation)
-                simulated_data[f'MA_{period}_lower'] = simulated_data[f'MA_{period}'] * (1 - deviation)
-
-            if entry_conditions.rsi_condition:
-                period = entry_conditions.rsi_condition.period
-                simulated_data[f'RSI_{period}'] = self.calculate_rsi(simulated_data, period)
-
-            if entry_conditions.macd_condition:
-                simulated_data['MACD'] = self.calculate_macd(simulated_data)
-                simulated_data['Signal_Line'] = self.calculate_signal_line(simulated_data)
-                simulated_data['MACD_Histogram'] = simulated_data['MACD'] - simulated_data['Signal_Line']
-                
-                if hasattr(entry_conditions.macd_condition, 'crossover'):
-                    if entry_conditions.macd_condition.crossover == "BULLISH":
-                        simulated_data['MACD_Crossover'] = (simulated_data['MACD'].shift(1) < simulated_data['Signal_Line'].shift(1)) & (simulated_data['MACD'] > simulated_data['Signal_Line'])
-                    elif entry_conditions.macd_condition.crossover == "BEARISH":
-                        simulated_data['MACD_Crossover'] = (simulated_data['MACD'].shift(1) > simulated_data['Signal_Line'].shift(1)) & (simulated_data['MACD'] < simulated_data['Signal_Line'])
-
-            if entry_conditions.bb_condition:
-                bb_cond = entry_conditions.bb_condition
-                bb_df = self.calculate_bollinger_bands(simulated_data, bb_cond.period, bb_cond.std_dev)
-                for col in bb_df.columns:
-                    simulated_data[col] = bb_df[col]
-
-            if entry_conditions.adx_condition:
-                period = entry_conditions.adx_condition.period
-                adx = self.calculate_adx(simulated_data, period)
-                simulated_data['ADX'] = adx
-                
-            return simulated_data.dropna()
-            
+        if entry_conditions.rsi_condition:
+            period = entry_conditions.rsi_condition.period
+            columns[f'RSI_{period}'] = MatrixIndicators.calculate_rsi(close, period)
+
+        if entry_conditions.macd_condition:
+            macd = MatrixIndicators.calculate_macd(close)
+            signal_line = MatrixIndicators.calculate_signal_line(macd)
+            columns['MACD'] = macd
+            columns['Signal_Line'] = signal_line
+            columns['MACD_Histogram'] = macd - signal_line
+
+        if entry_conditions.bb_condition:
+            bb_cond = entry_conditions.bb_condition
+            columns.update(MatrixIndicators.calculate_bollinger_bands(
+                close, columns['High'], columns['Low'], bb_cond.period, bb_cond.std_dev))
+
+        if entry_conditions.adx_condition:
+            period = entry_conditions.adx_condition.period
+            adx, plus_di, minus_di = MatrixIndicators.calculate_adx(columns['High'], columns['Low'], close, period)
+            columns['ADX'] = adx
+            columns['+DI14'] = plus_di
+            columns['-DI14'] = minus_di
+
+        return columns
+
+    def build_simulated_frame(self, prices: np.ndarray, entry_conditions) -> pd.DataFrame:
+        """Turn one simulated close path into an OHLC frame with the indicators the entry conditions need"""
+        try:
+            columns = self.build_simulated_columns(prices[np.newaxis, :], entry_conditions)
+            return self.simulated_frame_at(columns, 0)
         except Exception as e:
-            raise ValueError(f"Error generating simulation data: {str(e)}")
+            raise ValueError(f"Error building simulation data: {str(e)}")
+
+    def simulated_frame_at(self, columns: Dict[str, np.ndarray], path: int) -> pd.DataFrame:
+        """Frame for a single path of a simulated column block, without the indicator warm-up rows"""
+        num_days = columns['Close'].shape[1]
+        dates = pd.date_range(start=datetime.now(), periods=num_days, freq='B')
+        simulated_data = pd.DataFrame({name: values[path] for name, values in columns.items()}, index=dates)
+        return simulated_data.dropna()
     
-    def run_single_simulation(self, historical_data: pd.DataFrame, backtest_request: BacktestRequest) -> Dict[str, float]:
+    def run_single_simulation(self, historical_data: pd.DataFrame, backtest_request: BacktestRequest,
+                              simulated_data: Optional[pd.DataFrame] = None) -> Dict[str, float]:
         try:
-            simulated_data = self.generate_simulation_data(historical_data, backtest_request.entry_conditions)
+            if simulated_data is None:
+                simulated_data = self.generate_simulation_data(historical_data, backtest_request.entry_conditions)
             
             simulation_request = BacktestRequest(
                 symbol=backtest_request.symbol,
@@ -302,75 +384,295 @@ class MonteCarloSimulator:
             print(f"Simulation failed: {str(e)}")
             return None
     
-    def run_simulations(self, backtest_request: BacktestRequest, num_simulations: int = 500) -> MonteCarloResults:
-        """Run multiple simulations and aggregate results"""
+    def simulate_chunk(self, returns: np.ndarray, initial_price: float, backtest_request: BacktestRequest,
+                       seed: int, first_simulation: int, num_simulations: int) -> np.ndarray:
+        """Run a chunk of simulations; one row of RESULT_FIELDS per simulation, NaN where it failed"""
+        price_paths = self.price_paths_from_returns(returns, initial_price, num_simulations, seed, first_simulation)
+        columns = self.build_simulated_columns(price_paths, backtest_request.entry_conditions)
+        # same rows simulated_frame_at keeps: the indicator warm-up and any other bar with a NaN are dropped
+        complete = ~np.isnan(np.stack(list(columns.values()))).any(axis=0)
+        backtester = MonteCarloBacktestService(debug=False)
+        
+        metrics = np.full((num_simulations, len(RESULT_FIELDS)), np.nan)
+        equity_curves = {}
+        for i in range(num_simulations):
+            try:
+                path_columns = {name: values[i, complete[i]] for name, values in columns.items()}
+                results = backtester.run_backtest_on_simulated_columns(path_columns, backtest_request)
+            except Exception as e:
+                print(f"Simulation failed: {str(e)}")
+                continue
+            
+            if 'total_return_pct' in results:
+                metrics[i, :len(TRADE_FIELDS)] = [
+                    results['total_return_pct'],
+                    results['max_drawdown_pct'],
+                    results.get('win_rate', 0.0),
+                    results['total_trades'],
+                    results['avg_profit'],
+                    results['avg_loss']
+                ]
+                equity_curves[i] = results['equity_curve']
+        
+        if equity_curves:
+            paths = list(equity_curves)
+            risk = curve_metrics(list(equity_curves.values()))
+            metrics[paths, len(TRADE_FIELDS):] = np.column_stack([risk[name] for name in RISK_FIELDS])
+        return metrics
+
+    def run_simulations(self, backtest_request: BacktestRequest, num_simulations: int = 500,
+                        seed: Optional[int] = None) -> MonteCarloResults:
+        """Run multiple simulations and aggregate results; the same seed always gives the same results"""
         try:
-            historical_data = self.get_historical_data(backtest_request.symbol)
+            historical_data = self.get_historical_data(backtest_request.symbol, backtest_request.data_provider)
             print(f"Running {num_simulations} simulations for {backtest_request.symbol}")
             
-            simulation_results = []
-            failed_simulations = 0
-            
-            # Run simulations in parallel
-            with ThreadPoolExecutor(max_workers=min(num_simulations, 10)) as executor:
-                futures = []
-                for i in range(num_simulations):
-                    future = executor.submit(self.run_single_simulation, historical_data, backtest_request)
-                    futures.append(future)
-                
-                for future in futures:
-                    try:
-                        result = future.result()
-                        if result is not None:
-                            simulation_results.append(result)
-                        else:
-                            failed_simulations += 1
-                    except Exception as e:
-                        print(f"Simulation failed: {str(e)}")
-                        failed_simulations += 1
-            
-            if not simulation_results:
-                raise ValueError(f"All {num_simulations} simulations failed to complete")
-            
-            print(f"Completed {len(simulation_results)} successful simulations")
-            print(f"Failed simulations: {failed_simulations}")
+            returns = self.get_bootstrap_returns(historical_data)
+            initial_price = self.get_initial_price(historical_data)
+            if seed is None:
+                seed = new_seed()
             
-            # Extract metrics
-            returns = [r['return'] for r in simulation_results]
-            drawdowns = [r['drawdown'] for r in simulation_results]
-            win_rates = [r['win_rate'] for r in simulation_results]
-            
-            # Calculate additional statistics
-            avg_trade_count = np.mean([r['trade_count'] for r in simulation_results])
-            avg_profit = np.mean([r['avg_profit'] for r in simulation_results])
-            avg_loss = np.mean([r['avg_loss'] for r in simulation_results])
-            
-            # Calculate Sharpe ratio
-            sharpe_ratio = self.calculate_sharpe_ratio(returns)
+            metrics = self.execute_simulations(returns, initial_price, backtest_request, num_simulations, seed)
+            results = self.aggregate_results(metrics, num_simulations)
+            results.seed = seed
+            return results
+        except Exception as e:
+            raise ValueError(f"Error running simulations: {str(e)}")
+
+    def run_adaptive_simulations(self, backtest_request: BacktestRequest, tolerance: float,
+                                 max_simulations: int = 500, batch_size: int = 100, confidence: float = 0.95,
+                                 seed: Optional[int] = None) -> MonteCarloResults:
+        """Run simulations in batches until the mean return and mean max drawdown are pinned down.
+
+        Stops once the confidence intervals of both means are narrower than
+        tolerance (in percentage points, full width) or max_simulations is
+        reached. With a seed the simulations used are exactly the first N of a
+        fixed size run, so the results match run_simulations(N, seed).
+        """
+        try:
+            historical_data = self.get_historical_data(backtest_request.symbol, backtest_request.data_provider)
+            returns = self.get_bootstrap_returns(historical_data)
+            initial_price = self.get_initial_price(historical_data)
+            if seed is None:
+                seed = new_seed()
+            z = NormalDist().inv_cdf(0.5 + confidence / 2)
             
-            # Print summary statistics
-            print("\nMonte Carlo Simulation Summary:")
-            print(f"Average Trade Count: {avg_trade_count:.2f}")
-            print(f"Average Win Rate: {np.mean(win_rates):.2f}%")
-            print(f"Average Profit per Trade: ${avg_profit:.2f}")
-            print(f"Average Loss per Trade: ${avg_loss:.2f}")
+            metrics = np.empty((0, len(RESULT_FIELDS)))
+            widths = (None, None)
+            converged = False
+            while len(metrics) < max_simulations:
+                count = min(batch_size, max_simulations - len(metrics))
+                batch = self.execute_simulations(returns, initial_price, backtest_request, count, seed,
+                                                 first_simulation=len(metrics))
+                metrics = np.vstack([metrics, batch])
+                
+                widths = self.confidence_interval_widths(metrics, z)
+                print(f"{len(metrics)} simulations, CI widths: return {widths[0]}, drawdown {widths[1]}")
+                if widths[0] is not None and max(widths) <= tolerance:
+                    converged = True
+                    break
             
-            return MonteCarloResults(
-                avg_return=np.mean(returns),
-                median_return=np.median(returns),
-                highest_return=max(returns),
-                worst_return=min(returns),
-                avg_drawdown=np.mean(drawdowns),
-                median_drawdown=np.median(drawdowns),
-                worst_drawdown=max(drawdowns),
-                win_rate=np.mean(win_rates),
-                sharpe_ratio=sharpe_ratio,
-                simulation_count=num_simulations,
-                successful_simulations=len(simulation_results)
-            )
+            results = self.aggregate_results(metrics, len(metrics))
+            results.seed = seed
+            results.return_ci_width, results.drawdown_ci_width = widths
+            results.converged = converged
+            return results
         except Exception as e:
             raise ValueError(f"Error running simulations: {str(e)}")
-    
+
+    def confidence_interval_widths(self, metrics: np.ndarray, z: float) -> Tuple[Optional[float], Optional[float]]:
+        """Full widths of the normal confidence intervals for the mean return and mean drawdown"""
+        successful = metrics[~np.isnan(metrics).any(axis=1)]
+        if len(successful) < 2:
+            return None, None
+        std_errors = successful[:, :2].std(axis=0, ddof=1) / np.sqrt(len(successful))
+        return_width, drawdown_width = (2 * z * std_errors).tolist()
+        return return_width, drawdown_width
+
+    def iter_simulations(self, backtest_request: BacktestRequest, num_simulations: int = 500,
+                         seed: Optional[int] = None, report_every: int = 50) -> Iterator[Dict[str, Any]]:
+        """Run simulations, yielding running aggregates every report_every completed simulations.
+
+        Yields {'type': 'progress', ...partial_summary} events and finally
+        {'type': 'result', ...MonteCarloResults}. Closing the generator early
+        cancels the simulations that have not started yet.
+        """
+        historical_data = self.get_historical_data(backtest_request.symbol, backtest_request.data_provider)
+        returns = self.get_bootstrap_returns(historical_data)
+        initial_price = self.get_initial_price(historical_data)
+        if seed is None:
+            seed = new_seed()
+        report_every = max(1, report_every)
+        
+        metrics = np.full((num_simulations, len(RESULT_FIELDS)), np.nan)
+        done = np.zeros(num_simulations, dtype=bool)
+        next_report = report_every
+        
+        for start, chunk_metrics in self.iter_chunk_metrics(returns, initial_price, backtest_request,
+                                                            num_simulations, seed, max_chunk_size=report_every):
+            metrics[start:start + len(chunk_metrics)] = chunk_metrics
+            done[start:start + len(chunk_metrics)] = True
+            completed = int(done.sum())
+            
+            if completed >= next_report and completed < num_simulations:
+                yield {'type': 'progress', 'seed': seed, **self.partial_summary(metrics[done], num_simulations)}
+                next_report = (completed // report_every + 1) * report_every
+        
+        results = self.aggregate_results(metrics, num_simulations)
+        results.seed = seed
+        yield {'type': 'result', **asdict(results)}
+
+    def partial_summary(self, metrics: np.ndarray, num_simulations: int) -> Dict[str, Any]:
+        """Running aggregates over the simulations completed so far"""
+        successful = metrics[~np.isnan(metrics).any(axis=1)]
+        summary = {
+            'completed_simulations': len(metrics),
+            'simulation_count': num_simulations,
+            'successful_simulations': len(successful)
+        }
+        if len(successful):
+            returns, drawdowns, win_rates = successful[:, 0], successful[:, 1], successful[:, 2]
+            summary.update({
+                'avg_return': float(np.mean(returns)),
+                'median_return': float(np.median(returns)),
+                'avg_drawdown': float(np.mean(drawdowns)),
+                'median_drawdown': float(np.median(drawdowns)),
+                'worst_drawdown': float(np.max(drawdowns)),
+                'win_rate': float(np.mean(win_rates)),
+                'sharpe_ratio': float(np.mean(successful[:, RESULT_FIELDS.index('sharpe_ratio')]))
+            })
+        return summary
+
+    def execute_simulations(self, returns: np.ndarray, initial_price: float, backtest_request: BacktestRequest,
+                            num_simulations: int, seed: int, first_simulation: int = 0) -> np.ndarray:
+        """Run simulations first_simulation .. first_simulation + num_simulations - 1 and stack their metrics"""
+        metrics = np.full((num_simulations, len(RESULT_FIELDS)), np.nan)
+        for start, chunk_metrics in self.iter_chunk_metrics(returns, initial_price, backtest_request,
+                                                            num_simulations, seed, first_simulation):
+            offset = start - first_simulation
+            metrics[offset:offset + len(chunk_metrics)] = chunk_metrics
+        return metrics
+
+    def iter_chunk_metrics(self, returns: np.ndarray, initial_price: float, backtest_request: BacktestRequest,
+                           num_simulations: int, seed: int, first_simulation: int = 0,
+                           max_chunk_size: Optional[int] = None) -> Iterator[Tuple[int, np.ndarray]]:
+        """Spread the simulations over the worker pool in chunks, yielding (first index, metrics) as chunks finish"""
+        workers = min(self.max_workers, num_simulations)
+        # a few chunks per worker keeps the pool busy when chunks finish unevenly
+        chunk_size = max(1, -(-num_simulations // (workers * 4)))
+        if max_chunk_size:
+            chunk_size = min(chunk_size, max_chunk_size)
+        pending = {
+            first_simulation + start: min(chunk_size, num_simulations - start)
+            for start in range(0, num_simulations, chunk_size)
+        }
+        
+        if self.execution_mode == "process" and workers > 1:
+            try:
+                for start, chunk_metrics in self._iter_process_chunks(returns, initial_price, backtest_request,
+                                                                      seed, list(pending.items()), workers):
+                    del pending[start]
+                    yield start, chunk_metrics
+            except (OSError, BrokenProcessPool) as e:
+                # e.g. AWS Lambda has no /dev/shm for shared memory or process pool semaphores
+                print(f"Process pool unavailable ({str(e)}), falling back to threads")
+        
+        if not pending:
+            return
+        
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = {
+                executor.submit(self.simulate_chunk, returns, initial_price, backtest_request,
+                                seed, start, count): start
+                for start, count in pending.items()
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _iter_process_chunks(self, returns: np.ndarray, initial_price: float,
+                             backtest_request: BacktestRequest, seed: int,
+                             chunks: List[Tuple[int, int]], workers: int) -> Iterator[Tuple[int, np.ndarray]]:
+        returns = np.ascontiguousarray(returns, dtype=np.float64)
+        shm = shared_memory.SharedMemory(create=True, size=max(returns.nbytes, 1))
+        try:
+            np.ndarray(returns.shape, dtype=np.float64, buffer=shm.buf)[:] = returns
+            
+            executor = ProcessPoolExecutor(max_workers=workers)
+            try:
+                futures = {
+                    executor.submit(_simulate_chunk_from_shared_returns, shm.name, len(returns), initial_price,
+                                    self.lookback_years, self.simulation_length_days, backtest_request,
+                                    seed, start, count): start
+                    for start, count in chunks
+                }
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def aggregate_results(self, metrics: np.ndarray, num_simulations: int) -> MonteCarloResults:
+        successful = metrics[~np.isnan(metrics).any(axis=1)]
+        failed_simulations = num_simulations - len(successful)
+        
+        if len(successful) == 0:
+            raise ValueError(f"All {num_simulations} simulations failed to complete")
+        
+        print(f"Completed {len(successful)} successful simulations")
+        print(f"Failed simulations: {failed_simulations}")
+        
+        returns, drawdowns, win_rates, trade_counts, avg_profits, avg_losses = successful[:, :len(TRADE_FIELDS)].T
+        risk = dict(zip(RISK_FIELDS, successful[:, len(TRADE_FIELDS):].mean(axis=0).tolist()))
+        
+        # Print summary statistics
+        print("\nMonte Carlo Simulation Summary:")
+        print(f"Average Trade Count: {np.mean(trade_counts):.2f}")
+        print(f"Average Win Rate: {np.mean(win_rates):.2f}%")
+        print(f"Average Profit per Trade: ${np.mean(avg_profits):.2f}")
+        print(f"Average Loss per Trade: ${np.mean(avg_losses):.2f}")
+        
+        return MonteCarloResults(
+            avg_return=np.mean(returns),
+            median_return=np.median(returns),
+            highest_return=max(returns),
+            worst_return=min(returns),
+            avg_drawdown=np.mean(drawdowns),
+            median_drawdown=np.median(drawdowns),
+            worst_drawdown=max(drawdowns),
+            win_rate=np.mean(win_rates),
+            sharpe_ratio=risk['sharpe_ratio'],
+            simulation_count=num_simulations,
+            successful_simulations=len(successful),
+            sortino_ratio=risk['sortino_ratio'],
+            calmar_ratio=risk['calmar_ratio'],
+            volatility_pct=risk['volatility_pct'],
+            var_pct=risk['var_pct'],
+            cvar_pct=risk['cvar_pct'],
+            avg_drawdown_duration=risk['drawdown_duration']
+        )
+
+def _simulate_chunk_from_shared_returns(shm_name: str, num_returns: int, initial_price: float,
+                                        lookback_years: int, simulation_length_days: int,
+                                        backtest_request: BacktestRequest, seed: int,
+                                        first_simulation: int, num_simulations: int) -> np.ndarray:
+    """Process pool entry point: attach to the published return pool and run one chunk"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        returns = np.ndarray((num_returns,), dtype=np.float64, buffer=shm.buf)
+        simulator = MonteCarloSimulator(lookback_years=lookback_years,
+                                        simulation_length_days=simulation_length_days)
+        metrics = simulator.simulate_chunk(returns, initial_price, backtest_request,
+                                           seed, first_simulation, num_simulations)
+        del returns
+        return metrics
+    finally:
+        shm.close()
+
 """
 
 {
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+from core.backtest_kernel import run_portfolio_kernel, summarize_kernel_result
+from core.metrics import periods_per_year
+from core.signals import compile_entry_mask
+from core.trade_log import TradeLog
+
+MAX_FETCH_WORKERS = 32
+
+class PortfolioBacktest:
+    """One strategy run over a list of symbols with a shared pool of capital.
+
+    Data loading, indicators and entry masks are prepared per symbol on a
+    thread pool (the fetches are I/O bound and go through the OHLCV cache),
+    then all symbols are aligned on one calendar and traded together by
+    run_portfolio_kernel with the usual position_size_pct sizing.
+
+    service is the app's BacktestService; mask_options are passed through to
+    compile_entry_mask for services with their own column names.
+    """
+
+    def __init__(self, service, mask_options: Optional[Dict[str, Any]] = None,
+                 max_workers: Optional[int] = None):
+        self.service = service
+        self.mask_options = mask_options or {}
+        self.max_workers = max_workers or MAX_FETCH_WORKERS
+
+    def prepare_symbol(self, symbol: str, request) -> Tuple[pd.Series, pd.Series]:
+        """Close prices and entry signals for one symbol"""
+        df = self.service.get_historical_data(symbol, request.start_date, request.end_date, request.timeframe,
+                                              request.data_provider)
+        if df.empty:
+            raise ValueError(f"No data found for {symbol}")
+        df = self.service.calculate_indicators(df, request.entry_conditions)
+        entry_mask = compile_entry_mask(df, request.entry_conditions, **self.mask_options)
+        return df['Close'], pd.Series(entry_mask, index=df.index)
+
+    def run_columns(self, request) -> Tuple[Dict[str, Any], TradeLog]:
+        """Portfolio results without the trade list, and the trades as a TradeLog"""
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in request.symbols))
+        if not symbols:
+            raise ValueError("No symbols given")
+
+        prepared: Dict[str, Tuple[pd.Series, pd.Series]] = {}
+        failed: Dict[str, str] = {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(symbols))) as executor:
+            futures = {symbol: executor.submit(self.prepare_symbol, symbol, request) for symbol in symbols}
+            for symbol, future in futures.items():
+                try:
+                    prepared[symbol] = future.result()
+                except Exception as e:
+                    print(f"Skipping {symbol}: {str(e)}")
+                    failed[symbol] = str(e)
+
+        if not prepared:
+            raise ValueError(f"No data could be loaded for any of {len(symbols)} symbols")
+
+        symbols = list(prepared)
+        close = pd.DataFrame({symbol: prepared[symbol][0] for symbol in symbols}).sort_index()
+        entry_mask = pd.DataFrame({symbol: prepared[symbol][1] for symbol in symbols}).reindex(close.index)
+        dates = close.index
+
+        trade_direction = request.entry_conditions.trade_direction
+        result = run_portfolio_kernel(
+            close=close.to_numpy(dtype=np.float64).T,
+            entry_mask=entry_mask.fillna(False).to_numpy(dtype=bool).T,
+            direction=1 if trade_direction == "BUY" else -1,
+            initial_capital=request.initial_capital,
+            stop_loss_pct=request.exit_conditions.stop_loss_pct,
+            take_profit_pct=request.exit_conditions.take_profit_pct,
+            position_size_pct=request.exit_conditions.position_size_pct
+        )
+
+        trade_log = TradeLog.from_kernel(result, dates, trade_direction, symbols)
+
+        per_symbol = {}
+        for index, symbol in enumerate(symbols):
+            pnl = result.pnl[result.symbol_index == index]
+            per_symbol[symbol] = {
+                'total_trades': len(pnl),
+                'winning_trades': int((pnl > 0).sum()),
+                'total_pnl': float(pnl.sum())
+            }
+
+        return {
+            **summarize_kernel_result(result, request.initial_capital, periods_per_year(request.timeframe)),
+            'symbols': symbols,
+            'failed_symbols': failed,
+            'per_symbol': per_symbol,
+            'equity_curve': result.equity_curve.tolist()
+        }, trade_log
+
+    def run(self, request) -> Dict[str, Any]:
+        results, trade_log = self.run_columns(request)
+        equity_curve = results.pop('equity_curve')
+        return {**results, 'trades': trade_log.to_dicts(), 'equity_curve': equity_curve}
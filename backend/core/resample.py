@@ -0,0 +1,123 @@
+import os
+import re
+import numpy as np
+import pandas as pd
+from typing import Optional, Tuple
+from core.indicator_cache import indicator_cache
+
+# intervals stored per symbol; every other timeframe that is a whole multiple of one is built from it
+BASE_INTERVALS = tuple(os.getenv("MONTY_BASE_INTERVALS", "5m,1h,1d").split(","))
+
+TIMEFRAME_PATTERN = re.compile(r"^(\d+)(m|h|d|wk|mo)$")
+MINUTES_PER_UNIT = {'m': 1, 'h': 60}
+
+def parse_timeframe(timeframe: str) -> Tuple[int, str]:
+    """(count, unit) of a timeframe like 15m, 4h, 2d, 1wk or 1mo"""
+    match = TIMEFRAME_PATTERN.match(timeframe or "")
+    if match is None or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid timeframe '{timeframe}', expected a count and one of m, h, d, wk, mo (e.g. 4h)")
+    return int(match.group(1)), match.group(2)
+
+def _derives(base: str, timeframe: str) -> bool:
+    """Whether timeframe bars are whole groups of base bars (a group of one for a base spelled differently)"""
+    count, unit = parse_timeframe(timeframe)
+    base_count, base_unit = parse_timeframe(base)
+    if unit in MINUTES_PER_UNIT:
+        minutes = count * MINUTES_PER_UNIT[unit]
+        base_minutes = base_count * MINUTES_PER_UNIT[base_unit] if base_unit in MINUTES_PER_UNIT else 0
+        return 0 < base_minutes <= minutes and minutes % base_minutes == 0
+    # calendar bins (days, weeks, months) are built from daily bars
+    return base == "1d"
+
+def resample_base(timeframe: str) -> Optional[str]:
+    """The stored interval timeframe is resampled from, None when it is fetched as is.
+
+    Base intervals and timeframes no base divides (e.g. 1m) come straight from
+    the provider; of the bases that divide a timeframe the coarsest is used.
+    """
+    parse_timeframe(timeframe)
+    if timeframe in BASE_INTERVALS:
+        return None
+    bases = [base for base in BASE_INTERVALS if _derives(base, timeframe)]
+    return bases[-1] if bases else None
+
+def storage_interval(timeframe: str) -> str:
+    """The interval whose stored bars back timeframe"""
+    return resample_base(timeframe) or timeframe
+
+def _bin_starts(wall: np.ndarray, timeframe: str) -> np.ndarray:
+    """Start of the bin of every bar, as wall clock datetime64[ns].
+
+    Intraday bins are anchored at each day's first bar, so 4h bars of a
+    session opening at 9:30 start at 9:30 and 13:30. Day bins are counted
+    from the epoch, weeks start on Monday and months on the 1st.
+    """
+    count, unit = parse_timeframe(timeframe)
+    if unit in MINUTES_PER_UNIT:
+        width = np.timedelta64(count * MINUTES_PER_UNIT[unit], "m").astype("timedelta64[ns]")
+        new_day = np.diff(wall.astype("datetime64[D]").view(np.int64), prepend=np.iinfo(np.int64).min) != 0
+        # the first bar of every bar's day
+        session_open = wall[new_day][np.cumsum(new_day) - 1]
+        return session_open + (wall - session_open) // width * width
+    days = wall.astype("datetime64[D]").view(np.int64)
+    if unit == "d":
+        starts = (days // count * count).view("datetime64[D]")
+    elif unit == "wk":
+        # 1970-01-01 was a Thursday, so shifting by 3 days makes weeks start on Monday
+        starts = (((days + 3) // (7 * count)) * (7 * count) - 3).view("datetime64[D]")
+    else:
+        months = wall.astype("datetime64[M]").view(np.int64)
+        starts = (months // count * count).view("datetime64[M]")
+    return starts.astype("datetime64[ns]")
+
+def resample_ohlcv(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """OHLCV bars of df aggregated to timeframe: first open, highest high, lowest low, last close, summed volume.
+
+    Bars without a close are dropped and bins without bars are left out. Each
+    bin is labelled with its start, in the timezone of df's index.
+    """
+    df = df[df['Close'].notna()]
+    if df.empty:
+        return df.copy()
+    index = df.index
+    wall = (index.tz_localize(None) if index.tz is not None else index).as_unit("ns").values
+    starts = _bin_starts(wall, timeframe)
+
+    # bars are sorted so every bin is one run of bars; reduce each run in one call per column
+    first = np.flatnonzero(np.diff(starts.view(np.int64), prepend=np.iinfo(np.int64).min))
+    last = np.append(first[1:], len(df)) - 1
+    columns = {'Open': df['Open'].to_numpy(dtype=np.float64)[first],
+               'High': np.fmax.reduceat(df['High'].to_numpy(dtype=np.float64), first),
+               'Low': np.fmin.reduceat(df['Low'].to_numpy(dtype=np.float64), first),
+               'Close': df['Close'].to_numpy(dtype=np.float64)[last],
+               'Volume': np.add.reduceat(np.nan_to_num(df['Volume'].to_numpy(dtype=np.float64)), first)}
+
+    labels = starts[first]
+    if index.tz is None:
+        dates = pd.DatetimeIndex(labels)
+    elif parse_timeframe(timeframe)[1] in MINUTES_PER_UNIT:
+        # an intraday label is a fixed time before its bin's first bar, whatever the DST changes of that day
+        offsets = wall[first] - index[first].tz_convert("UTC").tz_localize(None).as_unit("ns").values
+        dates = pd.DatetimeIndex(labels - offsets).tz_localize("UTC").tz_convert(index.tz)
+    else:
+        dates = pd.DatetimeIndex(labels).tz_localize(index.tz, ambiguous=True, nonexistent="shift_forward")
+    return pd.DataFrame(columns, index=dates)
+
+def resample_history(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """resample_ohlcv of bars from get_history, memoized per data snapshot.
+
+    The result carries df's attrs with the interval set to timeframe, so
+    indicators computed on it are cached like those of fetched bars.
+    """
+    if df.empty:
+        return df
+    interval = df.attrs.get("interval")
+    if interval is not None and _derives(interval, timeframe) and _derives(timeframe, interval):
+        # the same bars spelled differently (60m of 1h bars), which binning could merge when they are off the hour
+        resampled = df.copy(deep=False)
+        resampled.attrs = {**df.attrs, "interval": timeframe}
+        return resampled
+    resampled = indicator_cache.get_or_compute(df, "resample", (timeframe,), lambda: resample_ohlcv(df, timeframe),
+                                               namespace="resample").copy(deep=False)
+    resampled.attrs = {**df.attrs, "interval": timeframe}
+    return resampled
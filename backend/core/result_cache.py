@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Optional, Tuple
+from core.market_data import cache_for
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if hasattr(value, 'dict'):
+        return value.dict()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def canonical_json(value: Any) -> str:
+    """Stable JSON form of a request payload: sorted keys, no whitespace"""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), default=_json_default)
+
+def request_key(kind: str, payload: Dict[str, Any], data_version: int) -> str:
+    """Content address of a request against a given snapshot of its market data"""
+    content = canonical_json({'kind': kind, 'request': payload, 'data_version': data_version})
+    return hashlib.sha256(content.encode()).hexdigest()
+
+def reaches_today(end_date: str) -> bool:
+    """Whether a request's date range includes bars that may still change"""
+    return date.fromisoformat(str(end_date)[:10]) >= date.today()
+
+class ResultCache:
+    """LRU of serialized endpoint results under a memory budget, with an optional disk tier.
+
+    Keys come from request_key, so they change whenever the OHLCV cache
+    writes new bars for the request's symbol and stale entries simply stop
+    being looked up. Results whose data range reaches today also expire after
+    the OHLCV cache's staleness window.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, disk_dir: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key + ".json")
+
+    def _remember(self, key: str, data: bytes, expires_at: Optional[float]):
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key)[0])
+            if len(data) > self.max_bytes:
+                return
+            self._entries[key] = (data, expires_at)
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None and self.disk_dir:
+            try:
+                with open(self._disk_path(key), 'rb') as f:
+                    stored = json.loads(f.read())
+                entry = (stored['result'].encode(), stored['expires_at'])
+                self._remember(key, *entry)
+            except (OSError, ValueError, KeyError):
+                entry = None
+
+        if entry is None or (entry[1] is not None and entry[1] < time.time()):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(entry[0])
+
+    def put(self, key: str, value: Any, ttl: Optional[float] = None):
+        result = json.dumps(value, default=_json_default)
+        expires_at = time.time() + ttl if ttl is not None else None
+        self._remember(key, result.encode(), expires_at)
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path + ".tmp", 'w') as f:
+                    json.dump({'result': result, 'expires_at': expires_at}, f)
+                os.replace(path + ".tmp", path)
+            except OSError as e:
+                print(f"Could not write result cache entry {key}: {str(e)}")
+
+    def get_or_compute(self, kind: str, payload: Dict[str, Any], symbol: str, interval: str,
+                       compute: Callable[[], Any], live: bool = False, provider: Optional[str] = None) -> Any:
+        """Cached result of compute() for payload, keyed on the current data version of symbol/interval at provider.
+
+        live marks requests whose data range reaches today; their results
+        expire with the OHLCV cache's staleness window.
+        """
+        data = cache_for(provider)
+        cached = self.get(request_key(kind, payload, data.version(symbol, interval)))
+        if cached is not None:
+            return cached
+
+        result = compute()
+        # compute() may have pulled new bars, store against the version it actually used
+        key = request_key(kind, payload, data.version(symbol, interval))
+        self.put(key, result, ttl=data.max_staleness_seconds if live else None)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+result_cache = ResultCache(
+    max_bytes=int(float(os.getenv("MONTY_RESULT_CACHE_MB", "64")) * 1024 * 1024),
+    disk_dir=os.getenv("MONTY_RESULT_CACHE_DIR") or None
+)
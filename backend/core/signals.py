@@ -0,0 +1,104 @@
+import numpy as np
+from typing import Any, Mapping, Tuple
+
+ColumnMap = Mapping[str, Any]
+
+def _column(columns: ColumnMap, name: str) -> np.ndarray:
+    return np.asarray(columns[name], dtype=np.float64)
+
+def previous(values: np.ndarray) -> np.ndarray:
+    """values shifted one bar later along the last axis, NaN on the first bar"""
+    out = np.full(values.shape, np.nan)
+    out[..., 1:] = values[..., :-1]
+    return out
+
+def crosses_above(values: np.ndarray, level: np.ndarray) -> np.ndarray:
+    return (previous(values) <= previous(level)) & (values > level)
+
+def crosses_below(values: np.ndarray, level: np.ndarray) -> np.ndarray:
+    return (previous(values) >= previous(level)) & (values < level)
+
+def compile_entry_mask(columns: ColumnMap, entry_conditions,
+                       bb_columns: Tuple[str, str, str] = ('BB_upper', 'BB_middle', 'BB_lower'),
+                       di_columns: Tuple[str, str] = ('+DI14', '-DI14')) -> np.ndarray:
+    """Boolean entry mask for an EntryCondition over a whole block of bars.
+
+    columns maps the indicator column names calculate_indicators produces to
+    1D arrays (one series) or 2D arrays (one path per row); a DataFrame works
+    as well. Each configured condition becomes one vectorized comparison and
+    the results are ANDed. Cross conditions compare against the previous bar,
+    so the first bar never signals. NaN warm-up values compare as False.
+    """
+    close = _column(columns, 'Close')
+    mask = np.ones(close.shape, dtype=bool)
+
+    ma_cond = entry_conditions.ma_condition
+    if ma_cond:
+        upper = _column(columns, f'MA_{ma_cond.period}_upper')
+        lower = _column(columns, f'MA_{ma_cond.period}_lower')
+        if ma_cond.comparison == "CROSS_ABOVE":
+            mask &= crosses_above(close, upper)
+        elif ma_cond.comparison == "CROSS_BELOW":
+            mask &= crosses_below(close, lower)
+        elif ma_cond.comparison == "ABOVE":
+            mask &= close > upper
+        else:
+            mask &= close < lower
+
+    rsi_cond = entry_conditions.rsi_condition
+    if rsi_cond:
+        rsi = _column(columns, f'RSI_{rsi_cond.period}')
+        mask &= rsi > rsi_cond.value if rsi_cond.comparison == "ABOVE" else rsi < rsi_cond.value
+
+    macd_cond = entry_conditions.macd_condition
+    if macd_cond:
+        macd = _column(columns, 'MACD')
+        signal_line = _column(columns, 'Signal_Line')
+
+        # MACD crossovers are strict on the previous bar, unlike the price crosses
+        if macd_cond.crossover == "BULLISH":
+            mask &= (previous(macd) < previous(signal_line)) & (macd > signal_line)
+        elif macd_cond.crossover == "BEARISH":
+            mask &= (previous(macd) > previous(signal_line)) & (macd < signal_line)
+
+        if macd_cond.histogram_positive is not None:
+            mask &= (_column(columns, 'MACD_Histogram') > 0) == macd_cond.histogram_positive
+
+        if macd_cond.macd_comparison == "ABOVE_ZERO":
+            mask &= macd > 0
+        elif macd_cond.macd_comparison == "BELOW_ZERO":
+            mask &= macd < 0
+
+        if macd_cond.macd_signal_deviation_pct:
+            deviation = macd_cond.macd_signal_deviation_pct / 100
+            mask &= np.abs(macd - signal_line) > (signal_line * deviation)
+
+    bb_cond = entry_conditions.bb_condition
+    if bb_cond:
+        upper_col, middle_col, lower_col = bb_columns
+        if bb_cond.comparison == "ABOVE_UPPER":
+            mask &= close > _column(columns, upper_col)
+        elif bb_cond.comparison == "BELOW_LOWER":
+            mask &= close < _column(columns, lower_col)
+        elif bb_cond.comparison == "CROSS_MIDDLE_UP":
+            mask &= crosses_above(close, _column(columns, middle_col))
+        else:
+            mask &= crosses_below(close, _column(columns, middle_col))
+
+    adx_cond = entry_conditions.adx_condition
+    if adx_cond:
+        if adx_cond.comparison == "ABOVE":
+            mask &= _column(columns, 'ADX') > adx_cond.value
+        elif adx_cond.comparison == "BELOW":
+            mask &= _column(columns, 'ADX') < adx_cond.value
+        else:
+            plus_di = _column(columns, di_columns[0])
+            minus_di = _column(columns, di_columns[1])
+            if adx_cond.comparison == "DI_CROSS_ABOVE":
+                mask &= crosses_above(plus_di, minus_di)
+            else:
+                mask &= crosses_below(plus_di, minus_di)
+
+    # the bar loop starts on the second bar, there is no previous bar to enter from
+    mask[..., 0] = False
+    return mask
@@ -0,0 +1,251 @@
+import math
+import numpy as np
+from collections import deque
+from typing import Dict, Optional
+from core.signals import compile_entry_mask
+
+NAN = float('nan')
+
+def _divide(numerator: float, denominator: float) -> float:
+    """Float division with NumPy semantics (x/0 is +-inf, 0/0 and NaN give NaN)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return float(np.float64(numerator) / np.float64(denominator))
+
+class StreamingEWM:
+    """One step of Series.ewm(span=span, adjust=adjust, min_periods=min_periods).mean() per value"""
+
+    def __init__(self, span: int, adjust: bool = False, min_periods: int = 0):
+        alpha = 2.0 / (span + 1.0)
+        self.adjust = adjust
+        self.min_periods = max(min_periods, 1)
+        self._old_wt_factor = 1.0 - alpha
+        self._new_wt = 1.0 if adjust else alpha
+        self._weighted = NAN
+        self._old_wt = 1.0
+        self._nobs = 0
+        self._started = False
+
+    def update(self, value: float) -> float:
+        is_obs = not math.isnan(value)
+        if not self._started:
+            self._started = True
+            self._weighted = value
+        elif not math.isnan(self._weighted):
+            # NaNs still age the existing weights, they just don't contribute a value
+            self._old_wt *= self._old_wt_factor
+            if is_obs:
+                if self._weighted != value:
+                    self._weighted = ((self._old_wt * self._weighted + self._new_wt * value) /
+                                      (self._old_wt + self._new_wt))
+                self._old_wt = self._old_wt + self._new_wt if self.adjust else 1.0
+        elif is_obs:
+            self._weighted = value
+
+        self._nobs += is_obs
+        return self._weighted if self._nobs >= self.min_periods else NAN
+
+class StreamingRollingStats:
+    """Mean and sample standard deviation over the last period values, updated in O(1).
+
+    Keeps the window in a ring buffer with a running mean and sum of squared
+    deviations (Welford), adding the new value and removing the one that falls
+    out of the window, like pandas' rolling mean/std.
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self._window = deque(maxlen=period)
+        self._nobs = 0
+        self._mean = 0.0
+        self._ssqdm = 0.0
+
+    def _add(self, value: float):
+        self._nobs += 1
+        delta = value - self._mean
+        self._mean += delta / self._nobs
+        self._ssqdm += delta * (value - self._mean)
+
+    def _remove(self, value: float):
+        self._nobs -= 1
+        if self._nobs == 0:
+            self._mean = 0.0
+            self._ssqdm = 0.0
+            return
+        delta = value - self._mean
+        self._mean -= delta / self._nobs
+        self._ssqdm -= delta * (value - self._mean)
+
+    def update(self, value: float):
+        if len(self._window) == self.period and not math.isnan(self._window[0]):
+            self._remove(self._window[0])
+        self._window.append(value)
+        if not math.isnan(value):
+            self._add(value)
+
+    @property
+    def mean(self) -> float:
+        return self._mean if self._nobs == self.period else NAN
+
+    @property
+    def std(self) -> float:
+        if self._nobs != self.period or self.period < 2:
+            return NAN
+        return math.sqrt(max(self._ssqdm, 0.0) / (self.period - 1))
+
+class StreamingSMA:
+    def __init__(self, period: int):
+        self._stats = StreamingRollingStats(period)
+
+    def update(self, close: float) -> float:
+        self._stats.update(close)
+        return self._stats.mean
+
+class StreamingEMA:
+    def __init__(self, period: int):
+        self._ewm = StreamingEWM(period)
+
+    def update(self, close: float) -> float:
+        return self._ewm.update(close)
+
+class StreamingRSI:
+    """RSI from simple rolling means of gains and losses, same as Indicators.calculate_rsi"""
+
+    def __init__(self, period: int):
+        self._gains = StreamingRollingStats(period)
+        self._losses = StreamingRollingStats(period)
+        self._prev_close: Optional[float] = None
+
+    def update(self, close: float) -> float:
+        # the first bar has no change and counts as a zero gain/loss
+        delta = close - self._prev_close if self._prev_close is not None else 0.0
+        self._prev_close = close
+        self._gains.update(delta if delta > 0 else 0.0)
+        self._losses.update(-delta if delta < 0 else 0.0)
+        rs = _divide(self._gains.mean, self._losses.mean)
+        return 100 - _divide(100, 1 + rs)
+
+class StreamingMACD:
+    """Returns (MACD, signal line, histogram)"""
+
+    def __init__(self, short_period: int = 12, long_period: int = 26, signal_period: int = 9):
+        self._short = StreamingEWM(short_period)
+        self._long = StreamingEWM(long_period)
+        self._signal = StreamingEWM(signal_period)
+
+    def update(self, close: float):
+        macd = self._short.update(close) - self._long.update(close)
+        signal_line = self._signal.update(macd)
+        return macd, signal_line, macd - signal_line
+
+class StreamingBollingerBands:
+    def __init__(self, period: int, std_dev: float):
+        self.std_dev = std_dev
+        self._stats = StreamingRollingStats(period)
+
+    def update(self, high: float, low: float, close: float) -> Dict[str, float]:
+        self._stats.update(close)
+        middle = self._stats.mean
+        std = self._stats.std
+        upper = middle + (std * self.std_dev)
+        lower = middle - (std * self.std_dev)
+        return {
+            'BB_middle': middle,
+            'BB_upper': upper,
+            'BB_lower': lower,
+            'BB_bandwidth': _divide(upper - lower, middle) * 100,
+            'BB_percent_b': _divide(close - lower, upper - lower),
+            'BB_typical_price': (high + low + close) / 3
+        }
+
+class StreamingADX:
+    """Returns (ADX, +DI, -DI), same smoothing as Indicators.calculate_adx"""
+
+    def __init__(self, period: int):
+        self._tr = StreamingEWM(period, adjust=True, min_periods=period)
+        self._plus_dm = StreamingEWM(period, adjust=True, min_periods=period)
+        self._minus_dm = StreamingEWM(period, adjust=True, min_periods=period)
+        self._adx = StreamingEWM(period, adjust=True, min_periods=period)
+        self._prev = None
+
+    def update(self, high: float, low: float, close: float):
+        if self._prev is None:
+            # no previous bar: the true range is undefined and there is no directional move
+            tr, plus_dm, minus_dm = NAN, 0.0, 0.0
+        else:
+            prev_high, prev_low, prev_close = self._prev
+            tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+            up_move = high - prev_high
+            down_move = prev_low - low
+            plus_dm = max(up_move, 0.0) if up_move > down_move else 0.0
+            minus_dm = max(down_move, 0.0) if down_move > up_move else 0.0
+        self._prev = (high, low, close)
+
+        tr_smooth = self._tr.update(tr)
+        plus_di = 100 * _divide(self._plus_dm.update(plus_dm), tr_smooth)
+        minus_di = 100 * _divide(self._minus_dm.update(minus_dm), tr_smooth)
+        dx = 100 * _divide(abs(plus_di - minus_di), plus_di + minus_di)
+        return self._adx.update(dx), plus_di, minus_di
+
+class StreamingIndicators:
+    """Live indicator state for one symbol and one set of entry conditions.
+
+    update() takes one bar and returns that bar's indicator columns, named
+    like BacktestService.calculate_indicators, in constant time. entry_signal()
+    evaluates the entry conditions on the latest bar with the same rules as
+    the backtests. Keep one instance per symbol; prime it with history once
+    and then feed it each new bar.
+    """
+
+    def __init__(self, entry_conditions):
+        self.entry_conditions = entry_conditions
+        self._prev_row: Optional[Dict[str, float]] = None
+        self._row: Optional[Dict[str, float]] = None
+
+        ma_cond = entry_conditions.ma_condition
+        self._ma = None
+        if ma_cond:
+            self._ma = StreamingSMA(ma_cond.period) if ma_cond.ma_type == "SMA" else StreamingEMA(ma_cond.period)
+        self._rsi = StreamingRSI(entry_conditions.rsi_condition.period) if entry_conditions.rsi_condition else None
+        self._macd = StreamingMACD() if entry_conditions.macd_condition else None
+        bb_cond = entry_conditions.bb_condition
+        self._bb = StreamingBollingerBands(bb_cond.period, bb_cond.std_dev) if bb_cond else None
+        self._adx = StreamingADX(entry_conditions.adx_condition.period) if entry_conditions.adx_condition else None
+
+    def update(self, open_: float, high: float, low: float, close: float) -> Dict[str, float]:
+        row = {'Open': open_, 'High': high, 'Low': low, 'Close': close}
+
+        if self._ma:
+            period = self.entry_conditions.ma_condition.period
+            deviation = self.entry_conditions.ma_condition.deviation_pct / 100
+            ma = self._ma.update(close)
+            row[f'MA_{period}'] = ma
+            row[f'MA_{period}_upper'] = ma * (1 + deviation)
+            row[f'MA_{period}_lower'] = ma * (1 - deviation)
+
+        if self._rsi:
+            row[f'RSI_{self.entry_conditions.rsi_condition.period}'] = self._rsi.update(close)
+
+        if self._macd:
+            row['MACD'], row['Signal_Line'], row['MACD_Histogram'] = self._macd.update(close)
+
+        if self._bb:
+            row.update(self._bb.update(high, low, close))
+
+        if self._adx:
+            row['ADX'], row['+DI14'], row['-DI14'] = self._adx.update(high, low, close)
+
+        self._prev_row, self._row = self._row, row
+        return row
+
+    def prime(self, df) -> 'StreamingIndicators':
+        """Feed historical OHLC bars, oldest first"""
+        for open_, high, low, close in df[['Open', 'High', 'Low', 'Close']].itertuples(index=False):
+            self.update(open_, high, low, close)
+        return self
+
+    def entry_signal(self) -> bool:
+        """Whether the latest bar triggers an entry"""
+        if self._prev_row is None:
+            return False
+        columns = {name: np.array([self._prev_row[name], value]) for name, value in self._row.items()}
+        return bool(compile_entry_mask(columns, self.entry_conditions)[-1])
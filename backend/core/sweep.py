@@ -0,0 +1,272 @@
+import copy
+import json
+import itertools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple, Union
+from core.backtest_kernel import run_backtest_kernel, summarize_kernel_result
+from core.metrics import TRADING_DAYS, curve_metrics, periods_per_year
+from core.signals import compile_entry_mask
+from core.monte_carlo import available_cpus
+
+# fields of each entry sub-condition that change its indicator columns; the rest are signal thresholds
+INDICATOR_PARAMS = {
+    'ma_condition': ('period', 'ma_type', 'deviation_pct'),
+    'rsi_condition': ('period',),
+    'macd_condition': ('macd_signal_deviation_pct',),
+    'bb_condition': ('period', 'std_dev'),
+    'adx_condition': ('period',),
+}
+
+MAX_COMBINATIONS = 20000
+
+# below this many bars times backtests, starting a process pool costs more than it saves
+MIN_PROCESS_BAR_RUNS = 200000
+
+# (combination index, initial_capital, stop_loss_pct, take_profit_pct, position_size_pct)
+ExitRun = Tuple[int, float, float, float, float]
+
+# (entry mask row, first bar, end bar, direction, exit runs): backtests of one entry mask on a range of bars
+Task = Tuple[int, int, int, int, List[ExitRun]]
+
+def parameter_values(spec: Union[List[Any], Dict[str, float]]) -> List[Any]:
+    """Values of one swept parameter: an explicit list or {"start", "stop", "step"} with stop included"""
+    if isinstance(spec, dict):
+        start, stop, step = spec['start'], spec['stop'], spec.get('step', 1)
+        if step <= 0:
+            raise ValueError(f"Range step must be positive: {spec}")
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        values = [round(start + i * step, 10) for i in range(max(count, 0))]
+        if all(isinstance(v, int) for v in (start, stop, step)):
+            values = [int(v) for v in values]
+        return values
+    return list(spec)
+
+def expand_grid(parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Every combination of the swept parameters, keyed by dotted request path"""
+    names = list(parameters)
+    values = [parameter_values(parameters[name]) for name in names]
+    return [dict(zip(names, combination)) for combination in itertools.product(*values)]
+
+def apply_parameters(base_request: Dict[str, Any], combination: Dict[str, Any]) -> Dict[str, Any]:
+    request = copy.deepcopy(base_request)
+    for path, value in combination.items():
+        target = request
+        *parents, field = path.split('.')
+        for parent in parents:
+            if target.get(parent) is None:
+                raise ValueError(f"Cannot sweep {path}: '{parent}' is not set in the backtest request")
+            target = target[parent]
+        target[field] = value
+    return request
+
+def _run_exit_grid(close: np.ndarray, entry_mask: np.ndarray, direction: int, runs: List[ExitRun],
+                   periods: int = TRADING_DAYS) -> List[Tuple[int, Dict[str, Any]]]:
+    """Backtest one entry mask under several exit settings (runs in worker processes)"""
+    results, equity_curves = [], []
+    for index, initial_capital, stop_loss_pct, take_profit_pct, position_size_pct in runs:
+        result = run_backtest_kernel(close, entry_mask, direction, initial_capital,
+                                     stop_loss_pct, take_profit_pct, position_size_pct)
+        results.append((index, summarize_kernel_result(result, initial_capital, risk_metrics=False)))
+        equity_curves.append(result.equity_curve)
+
+    # risk metrics of the whole group in one pass over its equity curves
+    risk = curve_metrics(equity_curves, periods=periods)
+    for row, (_, summary) in enumerate(results):
+        summary.update({name: values[row].item() for name, values in risk.items()})
+    return results
+
+def _shared_arrays(buffer, num_bars: int, num_masks: int) -> Tuple[np.ndarray, np.ndarray]:
+    """The close prices and the (masks x bars) entry masks laid out one after the other in buffer"""
+    close = np.ndarray((num_bars,), dtype=np.float64, buffer=buffer)
+    masks = np.ndarray((num_masks, num_bars), dtype=bool, buffer=buffer, offset=close.nbytes)
+    return close, masks
+
+def _run_task_from_shared_arrays(shm_name: str, num_bars: int, num_masks: int, task: Task,
+                                 periods: int) -> List[Tuple[int, Dict[str, Any]]]:
+    """Process pool entry point: attach to the published close prices and entry masks and run one task"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        close, masks = _shared_arrays(shm.buf, num_bars, num_masks)
+        mask_row, start, end, direction, runs = task
+        results = _run_exit_grid(close[start:end], masks[mask_row, start:end], direction, runs, periods)
+        del close, masks
+        return results
+    finally:
+        shm.close()
+
+class ParameterSweep:
+    """Grid search over backtest parameters on a single load of market data.
+
+    Indicator columns are computed once per distinct indicator configuration
+    and entry masks once per distinct set of entry conditions; only the bar
+    loop runs per combination. The bar loop is pure Python and holds the GIL,
+    so with execution_mode "process" it is spread over a process pool that
+    reads the close prices and entry masks from one shared memory block.
+    Grids too small to pay for the pool, execution_mode "thread" and hosts
+    without shared memory or process pools run on a thread pool instead.
+
+    service is the app's BacktestService and request_model its BacktestRequest;
+    mask_options are passed through to compile_entry_mask for services with
+    their own column names.
+    """
+
+    def __init__(self, service, request_model, mask_options: Optional[Dict[str, Any]] = None,
+                 execution_mode: str = "process", max_workers: Optional[int] = None):
+        self.service = service
+        self.request_model = request_model
+        self.mask_options = mask_options or {}
+        self.execution_mode = execution_mode
+        self.max_workers = max_workers or available_cpus()
+        self.indicator_configurations = 0
+
+    def _indicator_columns(self, df: pd.DataFrame, entry_conditions, cache: Dict) -> Dict[str, np.ndarray]:
+        columns = {name: df[name].to_numpy() for name in df.columns}
+        for name, params in INDICATOR_PARAMS.items():
+            condition = getattr(entry_conditions, name)
+            if condition is None:
+                continue
+            key = (name,) + tuple(getattr(condition, param) for param in params)
+            if key not in cache:
+                single = type(entry_conditions)(**{name: condition, 'trade_direction': entry_conditions.trade_direction})
+                computed = self.service.calculate_indicators(df.copy(), single)
+                cache[key] = {col: computed[col].to_numpy() for col in computed.columns if col not in df.columns}
+                self.indicator_configurations += 1
+            columns.update(cache[key])
+        return columns
+
+    def _execute(self, close: np.ndarray, masks: np.ndarray, tasks: List[Task], periods: int):
+        """Run tasks on close and the rows of masks, yielding (run index, summary) as they finish"""
+        # split big groups so the pool stays busy when a few entry masks carry most of the grid
+        total = sum(len(runs) for *_, runs in tasks)
+        chunk_size = max(1, -(-total // (self.max_workers * 4)))
+        chunks = [
+            (mask_row, start, end, direction, runs[i:i + chunk_size])
+            for mask_row, start, end, direction, runs in tasks
+            for i in range(0, len(runs), chunk_size)
+        ]
+        pending = dict(enumerate(chunks))
+
+        bar_runs = sum((end - start) * len(runs) for _, start, end, _, runs in tasks)
+        if self.execution_mode == "process" and self.max_workers > 1 and len(chunks) > 1 \
+                and bar_runs >= MIN_PROCESS_BAR_RUNS:
+            try:
+                for chunk_id, results in self._iter_process_chunks(close, masks, pending, periods):
+                    del pending[chunk_id]
+                    yield from results
+            except (OSError, BrokenProcessPool) as e:
+                # e.g. AWS Lambda has no /dev/shm for shared memory or process pool semaphores
+                print(f"Process pool unavailable ({str(e)}), falling back to threads")
+
+        if not pending:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = [executor.submit(_run_exit_grid, close[start:end], masks[mask_row, start:end], direction,
+                                       runs, periods)
+                       for mask_row, start, end, direction, runs in pending.values()]
+            for future in as_completed(futures):
+                yield from future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _iter_process_chunks(self, close: np.ndarray, masks: np.ndarray, chunks: Dict[int, Task], periods: int):
+        close = np.ascontiguousarray(close, dtype=np.float64)
+        shm = shared_memory.SharedMemory(create=True, size=max(close.nbytes + masks.size, 1))
+        try:
+            shared_close, shared_masks = _shared_arrays(shm.buf, len(close), len(masks))
+            shared_close[:] = close
+            shared_masks[:] = masks
+            del shared_close, shared_masks
+
+            executor = ProcessPoolExecutor(max_workers=min(self.max_workers, len(chunks)))
+            try:
+                futures = {
+                    executor.submit(_run_task_from_shared_arrays, shm.name, len(close), len(masks), task,
+                                    periods): chunk_id
+                    for chunk_id, task in chunks.items()
+                }
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def prepare(self, base_request: Dict[str, Any], parameters: Dict[str, Any]):
+        """Expand the grid and load its data once.
+
+        Returns the combinations, their requests, the market data and the
+        entry mask groups: (entry_mask, direction, exit runs) per distinct set
+        of entry conditions, with run indices pointing into requests.
+        """
+        combinations = expand_grid(parameters)
+        if not combinations:
+            raise ValueError("The parameter grid is empty")
+        if len(combinations) > MAX_COMBINATIONS:
+            raise ValueError(f"{len(combinations)} combinations exceeds the limit of {MAX_COMBINATIONS}")
+
+        requests = [self.request_model(**apply_parameters(base_request, c)) for c in combinations]
+        first = requests[0]
+        for request in requests:
+            if (request.symbol, request.start_date, request.end_date, request.timeframe, request.data_provider) != \
+                    (first.symbol, first.start_date, first.end_date, first.timeframe, first.data_provider):
+                raise ValueError("symbol, dates, timeframe and data provider cannot be swept")
+
+        df = self.service.get_historical_data(first.symbol, first.start_date, first.end_date, first.timeframe,
+                                              first.data_provider)
+        if len(df) < 2:
+            raise ValueError("Insufficient data points for backtest")
+
+        # one entry mask per distinct set of entry conditions
+        indicator_cache: Dict = {}
+        groups: Dict[str, Tuple[np.ndarray, int, List[ExitRun]]] = {}
+        for index, request in enumerate(requests):
+            entry_conditions = request.entry_conditions
+            key = json.dumps(entry_conditions.dict(), sort_keys=True, default=str)
+            if key not in groups:
+                columns = self._indicator_columns(df, entry_conditions, indicator_cache)
+                direction = 1 if entry_conditions.trade_direction == "BUY" else -1
+                groups[key] = (compile_entry_mask(columns, entry_conditions, **self.mask_options), direction, [])
+            exits = request.exit_conditions
+            groups[key][2].append((index, request.initial_capital, exits.stop_loss_pct,
+                                   exits.take_profit_pct, exits.position_size_pct))
+        return combinations, requests, df, list(groups.values())
+
+    def run(self, base_request: Dict[str, Any], parameters: Dict[str, Any], rank_by: str = "total_return_pct",
+            ascending: bool = False, top_n: Optional[int] = None) -> Dict[str, Any]:
+        try:
+            combinations, requests, df, groups = self.prepare(base_request, parameters)
+            first = requests[0]
+            close = df['Close'].to_numpy(dtype=np.float64)
+
+            masks = np.array([mask for mask, _, _ in groups])
+            summaries: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+            tasks = [(row, 0, len(close), direction, runs) for row, (_, direction, runs) in enumerate(groups)]
+            for index, summary in self._execute(close, masks, tasks, periods_per_year(first.timeframe)):
+                summaries[index] = summary
+
+            if rank_by not in summaries[0]:
+                raise ValueError(f"Cannot rank by '{rank_by}', choose one of {list(summaries[0])}")
+            order = sorted(range(len(requests)), key=lambda i: summaries[i][rank_by], reverse=not ascending)
+            if top_n:
+                order = order[:top_n]
+
+            return {
+                'symbol': first.symbol,
+                'combinations': len(requests),
+                'entry_configurations': len(groups),
+                'indicator_configurations': self.indicator_configurations,
+                'rank_by': rank_by,
+                'results': [
+                    {'rank': rank + 1, 'parameters': combinations[i], **summaries[i]}
+                    for rank, i in enumerate(order)
+                ]
+            }
+        except Exception as e:
+            raise ValueError(f"Error running parameter sweep: {str(e)}")
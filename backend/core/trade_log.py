@@ -0,0 +1,145 @@
+import io
+import json
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+from core.backtest_kernel import KernelResult, EXIT_REASONS
+
+# response formats for trade logs and their media types
+TRADE_LOG_FORMATS = {
+    'json': 'application/json',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet',
+}
+ACCEPT_ALIASES = {
+    'application/vnd.apache.arrow.file': 'arrow',
+    'application/x-parquet': 'parquet',
+}
+
+def response_format(format: Optional[str] = None, accept: Optional[str] = None) -> str:
+    """Trade log format for a request: an explicit format wins over the Accept header, JSON by default"""
+    if format:
+        format = format.lower()
+        if format not in TRADE_LOG_FORMATS:
+            raise ValueError(f"Unknown format '{format}', choose one of {list(TRADE_LOG_FORMATS)}")
+        return format
+
+    for media_range in (accept or '').split(','):
+        media_type = media_range.split(';')[0].strip().lower()
+        for name, candidate in TRADE_LOG_FORMATS.items():
+            if media_type == candidate:
+                return name
+        if media_type in ACCEPT_ALIASES:
+            return ACCEPT_ALIASES[media_type]
+    return 'json'
+
+@dataclass
+class TradeLog:
+    """Closed trades of a backtest as typed columns.
+
+    Dates are kept as the bars' DatetimeIndex and exit reasons as codes into
+    EXIT_REASONS; trades are only turned into per-trade dicts when a JSON
+    response asks for them. symbol is set for portfolio backtests.
+    """
+    entry_date: pd.DatetimeIndex
+    exit_date: pd.DatetimeIndex
+    direction: str
+    entry_price: np.ndarray
+    exit_price: np.ndarray
+    pnl: np.ndarray
+    pnl_pct: np.ndarray
+    exit_reason: np.ndarray
+    symbol: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_kernel(cls, result: KernelResult, dates: Sequence, direction,
+                    symbols: Optional[Sequence[str]] = None) -> 'TradeLog':
+        dates = pd.DatetimeIndex(dates)
+        symbol = None
+        if symbols is not None:
+            symbol = np.asarray(symbols, dtype=object)[result.symbol_index]
+        return cls(
+            entry_date=dates[result.entry_index],
+            exit_date=dates[result.exit_index],
+            direction=getattr(direction, 'value', direction),
+            entry_price=result.entry_price,
+            exit_price=result.exit_price,
+            pnl=result.pnl,
+            pnl_pct=result.pnl_pct,
+            exit_reason=result.exit_reason,
+            symbol=symbol
+        )
+
+    def __len__(self) -> int:
+        return len(self.pnl)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Trade list in the row format the endpoints have always returned"""
+        iso_dates = {}
+
+        def isoformat(values: pd.DatetimeIndex) -> List[str]:
+            # trades share bars, format each distinct timestamp once
+            out = []
+            for value in values:
+                text = iso_dates.get(value)
+                if text is None:
+                    text = iso_dates[value] = value.isoformat()
+                out.append(text)
+            return out
+
+        columns = {
+            'entry_date': isoformat(self.entry_date),
+            'exit_date': isoformat(self.exit_date),
+            'direction': [self.direction] * len(self),
+            'entry_price': self.entry_price.tolist(),
+            'exit_price': self.exit_price.tolist(),
+            'pnl': self.pnl.tolist(),
+            'pnl_pct': self.pnl_pct.tolist(),
+            'exit_reason': [EXIT_REASONS[reason] for reason in self.exit_reason.tolist()]
+        }
+        if self.symbol is not None:
+            columns = {'symbol': self.symbol.tolist(), **columns}
+        names = list(columns)
+        return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+    def to_arrow(self, metadata: Optional[Dict[str, Any]] = None):
+        """pyarrow Table of the trades; metadata is stored JSON encoded in the schema"""
+        # pyarrow is only needed for the binary formats, keep it off the import path of the app
+        import pyarrow as pa
+
+        columns = {}
+        if self.symbol is not None:
+            columns['symbol'] = pa.array(self.symbol.tolist(), type=pa.string()).dictionary_encode()
+        columns.update({
+            'entry_date': pa.array(self.entry_date),
+            'exit_date': pa.array(self.exit_date),
+            'direction': pa.DictionaryArray.from_arrays(
+                pa.array(np.zeros(len(self), dtype=np.int8)), pa.array([self.direction])),
+            'entry_price': pa.array(self.entry_price, type=pa.float64()),
+            'exit_price': pa.array(self.exit_price, type=pa.float64()),
+            'pnl': pa.array(self.pnl, type=pa.float64()),
+            'pnl_pct': pa.array(self.pnl_pct, type=pa.float64()),
+            'exit_reason': pa.DictionaryArray.from_arrays(
+                pa.array(self.exit_reason, type=pa.int8()), pa.array(list(EXIT_REASONS))),
+        })
+        table = pa.table(columns)
+        if metadata:
+            table = table.replace_schema_metadata(
+                {key: json.dumps(value, default=str) for key, value in metadata.items()})
+        return table
+
+    def to_bytes(self, format: str, metadata: Optional[Dict[str, Any]] = None) -> bytes:
+        """Arrow IPC stream or Parquet file of the trades"""
+        table = self.to_arrow(metadata)
+        sink = io.BytesIO()
+        if format == 'arrow':
+            import pyarrow as pa
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+        elif format == 'parquet':
+            import pyarrow.parquet as pq
+            pq.write_table(table, sink)
+        else:
+            raise ValueError(f"Unsupported binary format: {format}")
+        return sink.getvalue()
@@ -0,0 +1,147 @@
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+from core.backtest_kernel import KernelResult, run_backtest_kernel, summarize_kernel_result
+from core.metrics import periods_per_year
+from core.sweep import ParameterSweep
+from core.trade_log import TradeLog
+
+MIN_WINDOW_BARS = 2
+
+# (in-sample start, in-sample end, out-of-sample start, out-of-sample end), bar positions with the ends excluded
+Window = Tuple[int, int, int, int]
+
+def walk_forward_windows(num_bars: int, in_sample_bars: int, out_of_sample_bars: int,
+                         anchored: bool = False) -> List[Window]:
+    """Consecutive in-sample/out-of-sample splits of num_bars bars.
+
+    Each out-of-sample window directly follows its in-sample window and the
+    splits move forward by out_of_sample_bars, so the out-of-sample windows
+    tile the history after the first in-sample window. Anchored windows keep
+    every in-sample window starting at the first bar. The last out-of-sample
+    window may be shorter.
+    """
+    if in_sample_bars < MIN_WINDOW_BARS or out_of_sample_bars < MIN_WINDOW_BARS:
+        raise ValueError(f"in_sample_bars and out_of_sample_bars must be at least {MIN_WINDOW_BARS}")
+
+    windows = []
+    start = 0
+    while start + in_sample_bars + MIN_WINDOW_BARS <= num_bars:
+        in_sample_end = start + in_sample_bars
+        windows.append((0 if anchored else start, in_sample_end,
+                        in_sample_end, min(in_sample_end + out_of_sample_bars, num_bars)))
+        start += out_of_sample_bars
+    if not windows:
+        raise ValueError(f"{num_bars} bars are not enough for a {in_sample_bars} bar in-sample window "
+                         f"and a {MIN_WINDOW_BARS} bar out-of-sample window")
+    return windows
+
+def stitch_kernel_results(results: List[KernelResult], offsets: List[int]) -> KernelResult:
+    """One KernelResult of chained runs, with bar indices shifted by each run's offset.
+
+    Each run after the first starts on the last bar of the one before it
+    (its one bar of lookback), so the first point of its equity curve
+    repeats that bar and is dropped.
+    """
+    def joined(field: str, dtype) -> np.ndarray:
+        return np.concatenate([getattr(result, field) for result in results]).astype(dtype, copy=False)
+
+    return KernelResult(
+        entry_index=np.concatenate([r.entry_index + offset for r, offset in zip(results, offsets)]),
+        exit_index=np.concatenate([r.exit_index + offset for r, offset in zip(results, offsets)]),
+        entry_price=joined('entry_price', np.float64),
+        exit_price=joined('exit_price', np.float64),
+        pnl=joined('pnl', np.float64),
+        pnl_pct=joined('pnl_pct', np.float64),
+        exit_reason=joined('exit_reason', np.int8),
+        equity_curve=np.concatenate([results[0].equity_curve] + [r.equity_curve[1:] for r in results[1:]]),
+        final_capital=results[-1].final_capital
+    )
+
+class WalkForwardOptimization(ParameterSweep):
+    """Rolling out-of-sample validation of a parameter grid.
+
+    The data is loaded and the indicators and entry masks are computed once
+    over the full range, exactly as for a sweep; each window only slices the
+    close prices and masks. The grid is backtested on every in-sample window
+    at once over the sweep's pool, the best combination of each window by
+    rank_by is then traded on the out-of-sample window that follows it.
+
+    Out-of-sample windows are chained: each runs from the bar before it, so
+    its first bar can enter like any other, and starts with the capital the
+    previous one ended with. Positions still open at the end of a window are
+    closed at its last close ("End of Run") and the next window starts flat,
+    so the stitched trades account for the whole out-of-sample equity curve.
+    """
+
+    def run(self, base_request: Dict[str, Any], parameters: Dict[str, Any], in_sample_bars: int = 252,
+            out_of_sample_bars: int = 63, anchored: bool = False, rank_by: str = "total_return_pct",
+            ascending: bool = False) -> Dict[str, Any]:
+        try:
+            combinations, requests, df, groups = self.prepare(base_request, parameters)
+            first = requests[0]
+            close = df['Close'].to_numpy(dtype=np.float64)
+            dates = df.index
+            periods = periods_per_year(first.timeframe)
+            windows = walk_forward_windows(len(df), in_sample_bars, out_of_sample_bars, anchored)
+
+            # every in-sample window runs the whole grid; run indices are window * combinations + combination
+            count = len(requests)
+            masks = np.array([mask for mask, _, _ in groups])
+            tasks = []
+            for window, (start, end, _, _) in enumerate(windows):
+                for row, (_, direction, runs) in enumerate(groups):
+                    window_runs = [(window * count + index, *exits) for index, *exits in runs]
+                    tasks.append((row, start, end, direction, window_runs))
+
+            summaries: List[Optional[Dict[str, Any]]] = [None] * (len(windows) * count)
+            for index, summary in self._execute(close, masks, tasks, periods):
+                summaries[index] = summary
+            if rank_by not in summaries[0]:
+                raise ValueError(f"Cannot rank by '{rank_by}', choose one of {list(summaries[0])}")
+
+            entry_masks = {index: (mask, direction) for mask, direction, runs in groups for index, *_ in runs}
+            capital = first.initial_capital
+            window_results, offsets, trades, window_reports = [], [], [], []
+            for window, (start, end, oos_start, oos_end) in enumerate(windows):
+                window_summaries = summaries[window * count:(window + 1) * count]
+                best = sorted(range(count), key=lambda i: window_summaries[i][rank_by], reverse=not ascending)[0]
+                mask, direction = entry_masks[best]
+                exits = requests[best].exit_conditions
+
+                # the bar before the window is the kernel's first bar, which never trades
+                result = run_backtest_kernel(close[oos_start - 1:oos_end], mask[oos_start - 1:oos_end], direction,
+                                             capital, exits.stop_loss_pct, exits.take_profit_pct,
+                                             exits.position_size_pct, close_at_end=True)
+                trades.extend(TradeLog.from_kernel(result, dates[oos_start - 1:oos_end],
+                                                   requests[best].entry_conditions.trade_direction).to_dicts())
+                window_reports.append({
+                    'window': window + 1,
+                    'in_sample_start': dates[start].isoformat(),
+                    'in_sample_end': dates[end - 1].isoformat(),
+                    'out_of_sample_start': dates[oos_start].isoformat(),
+                    'out_of_sample_end': dates[oos_end - 1].isoformat(),
+                    'parameters': combinations[best],
+                    'in_sample': window_summaries[best],
+                    'out_of_sample': summarize_kernel_result(result, capital, periods)
+                })
+                window_results.append(result)
+                offsets.append(oos_start - 1)
+                capital = result.final_capital
+
+            stitched = stitch_kernel_results(window_results, offsets)
+            return {
+                'symbol': first.symbol,
+                'combinations': count,
+                'rank_by': rank_by,
+                'in_sample_bars': in_sample_bars,
+                'out_of_sample_bars': out_of_sample_bars,
+                'anchored': anchored,
+                'out_of_sample_start': dates[windows[0][2]].isoformat(),
+                'out_of_sample_end': dates[windows[-1][3] - 1].isoformat(),
+                **summarize_kernel_result(stitched, first.initial_capital, periods),
+                'windows': window_reports,
+                'trades': trades,
+                'equity_curve': stitched.equity_curve.tolist()
+            }
+        except Exception as e:
+            raise ValueError(f"Error running walk-forward optimization: {str(e)}")
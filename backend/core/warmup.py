@@ -0,0 +1,101 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+from core.indicator_cache import indicator_cache
+from core.market_data import get_history, market_data_stats
+
+MAX_WARMUP_WORKERS = 8
+
+def _seconds(started: float) -> float:
+    return round(time.perf_counter() - started, 4)
+
+def warm_symbol(symbol: str, timeframe: str, start_date: str, end_date: str,
+                provider: Optional[str] = None) -> Dict[str, Any]:
+    """Load one symbol/timeframe into the on-disk OHLCV cache"""
+    report: Dict[str, Any] = {'symbol': symbol, 'timeframe': timeframe}
+    started = time.perf_counter()
+    try:
+        report['bars'] = len(get_history(symbol, start_date, end_date, timeframe, provider))
+        report['fetch_seconds'] = _seconds(started)
+    except Exception as e:
+        report['error'] = str(e)
+    return report
+
+def warm_returns(simulator, symbol: str, provider: Optional[str] = None) -> Dict[str, Any]:
+    """Load the simulator's lookback history of symbol and its bootstrap return distribution"""
+    report: Dict[str, Any] = {'symbol': symbol}
+    started = time.perf_counter()
+    try:
+        returns = simulator.get_bootstrap_returns(simulator.get_historical_data(symbol, provider))
+        report['returns'] = len(returns)
+        report['seconds'] = _seconds(started)
+    except Exception as e:
+        report['error'] = str(e)
+    return report
+
+def warm_up(symbols: Sequence[str], timeframes: Sequence[str], start_date: str, end_date: str,
+            simulator=None, provider: Optional[str] = None,
+            max_workers: int = MAX_WARMUP_WORKERS) -> Dict[str, Any]:
+    """Prefetch a universe into the caches of this process, with at most max_workers loads at once.
+
+    Every symbol/timeframe is loaded into the on-disk OHLCV cache, which
+    serves any date range inside the loaded one. With a MonteCarloSimulator
+    the bootstrap returns of each symbol are prepared as well; simulations
+    look back from today, so same-day requests with the simulator's
+    lookback_years reuse them. Indicators are not precomputed: the indicator
+    cache keys on the exact bars a request covers, which a warm-up range
+    cannot anticipate. Failures are reported per symbol instead of stopping
+    the run.
+    """
+    symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(symbols) * (len(timeframes) + 1)))) as executor:
+        loads = [executor.submit(warm_symbol, symbol, timeframe, start_date, end_date, provider)
+                 for symbol in symbols for timeframe in timeframes]
+        simulations = [executor.submit(warm_returns, simulator, symbol, provider)
+                       for symbol in symbols] if simulator is not None else []
+        data: List[Dict[str, Any]] = [future.result() for future in loads]
+        monte_carlo: List[Dict[str, Any]] = [future.result() for future in simulations]
+
+    return {
+        'symbols': len(symbols),
+        'timeframes': list(timeframes),
+        'total_seconds': _seconds(started),
+        'failed': sorted({report['symbol'] for report in data + monte_carlo if 'error' in report}),
+        'data': data,
+        'monte_carlo': monte_carlo,
+        'market_data': market_data_stats(),
+        'indicators': indicator_cache.stats()
+    }
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Plain text timing report of warm_up"""
+    def cell(value) -> str:
+        return "-" if value is None else f"{value:.3f}" if isinstance(value, float) else str(value)
+
+    lines = [f"{'symbol':<10} {'timeframe':<10} {'bars':>8} {'fetch s':>9}  error"]
+    for row in report['data']:
+        lines.append(f"{row['symbol']:<10} {row['timeframe']:<10} {cell(row.get('bars')):>8} "
+                     f"{cell(row.get('fetch_seconds')):>9}  {row.get('error', '')}")
+    if report['monte_carlo']:
+        lines.append("")
+        lines.append(f"{'symbol':<10} {'returns':>8} {'seconds':>9}  error")
+        for row in report['monte_carlo']:
+            lines.append(f"{row['symbol']:<10} {cell(row.get('returns')):>8} {cell(row.get('seconds')):>9}  "
+                         f"{row.get('error', '')}")
+
+    fetch_times = [row['fetch_seconds'] for row in report['data'] if 'fetch_seconds' in row]
+    lines.append("")
+    lines.append(f"{report['symbols']} symbols x {len(report['timeframes'])} timeframes in "
+                 f"{report['total_seconds']:.2f}s, {len(report['failed'])} failed")
+    if fetch_times:
+        lines.append(f"fetch: total {sum(fetch_times):.2f}s, slowest {max(fetch_times):.2f}s")
+    for name, stats in report['market_data'].items():
+        lines.append(f"market data ({name}): {stats['upstream_fetches']} upstream fetches, "
+                     f"{stats['coalesced_requests']} coalesced")
+    lines.append(f"indicator cache: {report['indicators']['entries']} entries, "
+                 f"{report['indicators']['bytes'] / 1024 / 1024:.1f} MB (indicators are computed per request range, "
+                 f"not warmed)")
+    if report['failed']:
+        lines.append(f"failed: {', '.join(report['failed'])}")
+    return "\n".join(lines)
@@ -1,10 +1,13 @@
 import os
 from mangum import Mangum
-from main_lambda import app
+from main_lambda import app, start_warm_up
 
 # Create the Lambda handler
 handler = Mangum(app, lifespan="off")
 
+# Mangum would run the lifespan on every invocation, so the warm-up starts here, once per cold start
+start_warm_up()
+
 def lambda_handler(event, context):
     """
     AWS Lambda handler function
@@ -1,14 +1,32 @@
-from fastapi import FastAPI, HTTPException
-import yfinance as yf
+import os
+import threading
+from fastapi import FastAPI, HTTPException, Header
+import json
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any, Optional, Literal
+from typing import List, Dict, Any, Optional, Literal, Tuple
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, Response
+from fastapi.concurrency import run_in_threadpool
+from dataclasses import asdict
 from core.monte_carlo import MonteCarloSimulator
 from core.helpers.backtest_service import BacktestRequest
+from core.market_data import get_history, market_data_stats
+from core.indicator_cache import indicator_cache
+from core.result_cache import result_cache, reaches_today
+from core.jobs import job_manager, JobQueueFull, JOB_COMPLETED, JOB_FAILED
+from core.backtest_kernel import run_backtest_kernel, summarize_kernel_result, max_drawdown_pct
+from core.metrics import periods_per_year
+from core.trade_log import TradeLog, TRADE_LOG_FORMATS, response_format
+from core.downsample import check_downsampling, downsample_results
+from core.signals import compile_entry_mask
+from core.sweep import ParameterSweep
+from core.walk_forward import WalkForwardOptimization
+from core.portfolio import PortfolioBacktest
+from core.warmup import format_report, warm_up
 import google.generativeai as genai
 import ssl
 
@@ -34,6 +52,12 @@ class MonteCarloRequest(BaseModel):
     lookback_years: int = 10
     simulation_length_days: int = 252
     num_simulations: int = 500
+    execution_mode: Literal["thread", "process"] = "thread"
+    seed: Optional[int] = None
+    # adaptive mode: stop once the mean return / drawdown confidence intervals are narrower than tolerance
+    tolerance: Optional[float] = None
+    max_simulations: Optional[int] = None
+    confidence: float = 0.95
     backtest_request: BacktestRequest
 
 class TradeDirection(str, Enum):
@@ -120,6 +144,19 @@ class BacktestRequest(BaseModel):
     initial_capital: float = 10000.0
     entry_conditions: EntryCondition
     exit_conditions: ExitCondition
+    # market data provider (yfinance, replay, synthetic); the deployment's MONTY_DATA_PROVIDER when not set
+    data_provider: Optional[str] = None
+
+class PortfolioBacktestRequest(BaseModel):
+    symbols: List[str]
+    start_date: str
+    end_date: str
+    timeframe: str = "1d"
+    initial_capital: float = 10000.0
+    entry_conditions: EntryCondition
+    exit_conditions: ExitCondition
+    # market data provider (yfinance, replay, synthetic); the deployment's MONTY_DATA_PROVIDER when not set
+    data_provider: Optional[str] = None
 
 class Position:
     def __init__(self, entry_price: float, entry_date: datetime, size: float, 
@@ -143,9 +180,9 @@ class BacktestService:
     def __init__(self, debug=True):
         self.debug = debug
     
-    def get_historical_data(self, symbol: str, start_date: str, end_date: str, timeframe="1d") -> pd.DataFrame:
-        ticker = yf.Ticker(symbol)
-        df = ticker.history(start=start_date, end=end_date, interval=timeframe)
+    def get_historical_data(self, symbol: str, start_date: str, end_date: str, timeframe="1d",
+                            provider: Optional[str] = None) -> pd.DataFrame:
+        df = get_history(symbol, start_date, end_date, timeframe, provider)
         if self.debug:
             print(f"\nFetched {len(df)} data points for {symbol}")
         return df
@@ -214,6 +251,12 @@ class BacktestService:
 
         return adx
 
+    def _adx_columns(self, df: pd.DataFrame, period: int) -> pd.DataFrame:
+        """ADX with the directional indicators the DI cross conditions read"""
+        data = df[['High', 'Low', 'Close']].copy()
+        adx = self.calculate_adx(data, period)
+        return pd.DataFrame({'ADX': adx, '+DI14': data['+DI14'], '-DI14': data['-DI14']})
+
     def calculate_bollinger_bands(self, data: pd.DataFrame, period: int, std_dev: float) -> pd.DataFrame:
         middle = data['Close'].rolling(window=period).mean()
         std = data['Close'].rolling(window=period).std()
@@ -245,9 +288,9 @@ class BacktestService:
             period = ma_cond.period
             
             if ma_cond.ma_type == MAType.SMA:
-                df[f'MA_{period}'] = self.calculate_sma(df, period)
+                df[f'MA_{period}'] = self._cached(df, 'SMA', (period,), lambda: self.calculate_sma(df, period))
             else:
-                df[f'MA_{period}'] = self.calculate_ema(df, period)
+                df[f'MA_{period}'] = self._cached(df, 'EMA', (period,), lambda: self.calculate_ema(df, period))
                 
             deviation = ma_cond.deviation_pct / 100
             df[f'MA_{period}_upper'] = df[f'MA_{period}'] * (1 + deviation)
@@ -255,39 +298,21 @@ class BacktestService:
 
         if entry_conditions.rsi_condition:
             period = entry_conditions.rsi_condition.period
-            df[f'RSI_{period}'] = self.calculate_rsi(df, period)
+            df[f'RSI_{period}'] = self._cached(df, 'RSI', (period,), lambda: self.calculate_rsi(df, period))
         
         if entry_conditions.macd_condition:
             #macd and signal line
-            df['MACD'] = self.calculate_macd(df)
-            df['Signal_Line'] = self.calculate_signal_line(df)
+            df['MACD'] = self._cached(df, 'MACD', (12, 26), lambda: self.calculate_macd(df))
+            df['Signal_Line'] = self._cached(df, 'Signal_Line', (12, 26, 9), lambda: self.calculate_signal_line(df))
 
             #histogram
             df['MACD_Histogram'] = df['MACD'] - df['Signal_Line']
+            # the MACD conditions themselves are evaluated by compile_entry_mask
 
-            ###macd conditions
-            if entry_conditions.macd_condition and entry_conditions.macd_condition.crossover: # hasattribute
-                if entry_conditions.macd_condition.crossover == "BULLISH":
-                    df['MACD_Crossover'] = (df['MACD'].shift(1) < df['Signal_Line'].shift(1)) & (df['MACD'] > df['Signal_Line'])
-                elif entry_conditions.macd_condition.crossover == "BEARISH":
-                    df['MACD_Crossover'] = (df['MACD'].shift(1) > df['Signal_Line'].shift(1)) & (df['MACD'] < df['Signal_Line'])
-
-            if hasattr(entry_conditions.macd_condition, 'histogram_positive'):
-                df['MACD_Histogram_Positive'] = df['MACD_Histogram'] > 0
-
-            if entry_conditions.macd_condition and entry_conditions.macd_condition.macd_comparison == MACDComparisonType.ABOVE_ZERO:
-                df['MACD_Above_Zero'] = df['MACD'] > 0
-
-            if hasattr(entry_conditions.macd_condition, 'divergence'):
-                df['MACD_Divergence'] = self.calculate_macd_divergence(df, entry_conditions.macd_condition.divergence)
-
-            if hasattr(entry_conditions.macd_condition, 'macd_signal_deviation_pct'):
-                deviation = entry_conditions.macd_condition.macd_signal_deviation_pct / 100
-                df['MACD_Signal_Deviation'] = abs(df['MACD'] - df['Signal_Line']) > (df['Signal_Line'] * deviation)
-        
         if entry_conditions.bb_condition:
             bb_cond = entry_conditions.bb_condition
-            bb_df = self.calculate_bollinger_bands(df, bb_cond.period, bb_cond.std_dev)
+            bb_df = self._cached(df, 'BB', (bb_cond.period, bb_cond.std_dev),
+                                 lambda: self.calculate_bollinger_bands(df, bb_cond.period, bb_cond.std_dev))
             
             # Add all BB indicators
             df['BB_middle'] = bb_df['BB_middle']
@@ -299,238 +324,88 @@ class BacktestService:
 
         if entry_conditions.adx_condition:
             adx_cond = entry_conditions.adx_condition
-            adx_data = self.calculate_adx(df, adx_cond.period)
-            df['ADX'] = adx_data
+            adx_data = self._cached(df, 'ADX', (adx_cond.period,), lambda: self._adx_columns(df, adx_cond.period))
+            for column in adx_data.columns:
+                df[column] = adx_data[column]
 
         return df
 
-    def check_entry_conditions(self, row: pd.Series, prev_row: pd.Series, entry_conditions: EntryCondition) -> Optional[TradeDirection]:
-        ma_condition_met = False
-        rsi_condition_met = False
-        macd_condition_met = False
-        bb_condition_met = False
-        adx_condition_met = False
-        
-        if entry_conditions.ma_condition:
-            ma_cond = entry_conditions.ma_condition
-            period = ma_cond.period
-            ma_col = f'MA_{period}'
-            
-            if ma_cond.comparison == MAComparisonType.CROSS_ABOVE:
-                ma_condition_met = (prev_row['Close'] <= prev_row[f'{ma_col}_upper'] and 
-                                   row['Close'] > row[f'{ma_col}_upper'])
-            elif ma_cond.comparison == MAComparisonType.CROSS_BELOW:
-                ma_condition_met = (prev_row['Close'] >= prev_row[f'{ma_col}_lower'] and 
-                                   row['Close'] < row[f'{ma_col}_lower'])
-            elif ma_cond.comparison == MAComparisonType.ABOVE:
-                ma_condition_met = row['Close'] > row[f'{ma_col}_upper']
-            elif ma_cond.comparison == MAComparisonType.BELOW:
-                ma_condition_met = row['Close'] < row[f'{ma_col}_lower']
-
-        if entry_conditions.rsi_condition:
-            rsi_cond = entry_conditions.rsi_condition
-            rsi_col = f'RSI_{rsi_cond.period}'
-            
-            if rsi_cond.comparison == "ABOVE":
-                rsi_condition_met = row[rsi_col] > rsi_cond.value
-            else:
-                rsi_condition_met = row[rsi_col] < rsi_cond.value
-
-        if entry_conditions.macd_condition:
-            macd_cond = entry_conditions.macd_condition
-            conditions_met = []
-
-            if macd_cond.crossover:
-                if macd_cond.crossover == MACDCrossoverType.BULLISH:
-                    conditions_met.append(row['MACD_Crossover'])
-                elif macd_cond.crossover == MACDCrossoverType.BEARISH:
-                    conditions_met.append(row['MACD_Crossover'])
-
-            if macd_cond.histogram_positive is not None:
-                conditions_met.append(row['MACD_Histogram_Positive'] == macd_cond.histogram_positive)
-
-            if macd_cond.macd_comparison:
-                if macd_cond.macd_comparison == MACDComparisonType.ABOVE_ZERO:
-                    conditions_met.append(row['MACD'] > 0)
-                elif macd_cond.macd_comparison == MACDComparisonType.BELOW_ZERO:
-                    conditions_met.append(row['MACD'] < 0)
-
-            if macd_cond.macd_signal_deviation_pct:
-                conditions_met.append(row['MACD_Signal_Deviation'])
-
-            macd_condition_met = all(conditions_met) if conditions_met else True
-        
-        if entry_conditions.bb_condition:
-            bb_cond = entry_conditions.bb_condition
-            
-            if bb_cond.comparison == BBComparisonType.ABOVE_UPPER:
-                bb_condition_met = row['Close'] > row['BB_upper']
-            elif bb_cond.comparison == BBComparisonType.BELOW_LOWER:
-                bb_condition_met = row['Close'] < row['BB_lower']
-            elif bb_cond.comparison == BBComparisonType.CROSS_MIDDLE_UP:
-                bb_condition_met = (prev_row['Close'] <= prev_row['BB_middle'] and row['Close'] > row['BB_middle'])
-            elif bb_cond.comparison == BBComparisonType.CROSS_MIDDLE_DOWN:
-                bb_condition_met = (prev_row['Close'] >= prev_row['BB_middle'] and row['Close'] < row['BB_middle'])
-
-        if entry_conditions.adx_condition:
-            adx_cond = entry_conditions.adx_condition
-            
-            if adx_cond.comparison == ADXComparisonType.ABOVE:
-                adx_condition_met = row['ADX'] > adx_cond.value
-            elif adx_cond.comparison == ADXComparisonType.BELOW:
-                adx_condition_met = row['ADX'] < adx_cond.value
-            elif adx_cond.comparison == ADXComparisonType.DI_CROSS_ABOVE:
-                adx_condition_met = (prev_row['+DI14'] <= prev_row['-DI14'] and row['+DI14'] > row['-DI14'])
-            elif adx_cond.comparison == ADXComparisonType.DI_CROSS_BELOW:
-                adx_condition_met = (prev_row['+DI14'] >= prev_row['-DI14'] and row['+DI14'] < row['-DI14'])
-
-        if ((entry_conditions.ma_condition is None or ma_condition_met) and 
-            (entry_conditions.rsi_condition is None or rsi_condition_met) and
-            (entry_conditions.macd_condition is None or macd_condition_met) and
-            (entry_conditions.bb_condition is None or bb_condition_met) and
-            (entry_conditions.adx_condition is None or adx_condition_met)):
-            return entry_conditions.trade_direction
-        
-        return None
+    def _cached(self, df: pd.DataFrame, indicator: str, params: tuple, compute):
+        """Indicator computed once per data snapshot and parameters, shared across requests"""
+        return indicator_cache.get_or_compute(df, indicator, params, compute, namespace=__name__)
 
-    def run_backtest(self, request: BacktestRequest) -> Dict[str, Any]:
-        df = self.get_historical_data(request.symbol, request.start_date, request.end_date, request.timeframe)
+    def run_backtest_columns(self, request: BacktestRequest) -> Tuple[Dict[str, Any], TradeLog]:
+        """Backtest results without the trade list, and the trades as a TradeLog"""
+        df = self.get_historical_data(request.symbol, request.start_date, request.end_date, request.timeframe,
+                                      request.data_provider)
         df = self.calculate_indicators(df, request.entry_conditions)
         
-        open_positions = []
-        trades = []
-        equity_curve = [request.initial_capital]
-        cash = request.initial_capital
-        current_capital = request.initial_capital
+        entry_mask = compile_entry_mask(df, request.entry_conditions)
+        trade_direction = request.entry_conditions.trade_direction
         
-        for i in range(1, len(df)):
-            current_row = df.iloc[i]
-            prev_row = df.iloc[i-1]
-            
-            total_position_value = sum(
-                position.initial_value + position.calculate_pnl(current_row['Close'])[0] 
-                for position in open_positions
-            )
-            
-            current_capital = cash + total_position_value
-            
-            for position in open_positions[:]:
-                pnl, pnl_pct = position.calculate_pnl(current_row['Close'])
-                
-                should_exit = False
-                exit_reason = None
-                
-                if position.direction == TradeDirection.BUY:
-                    if pnl_pct <= -request.exit_conditions.stop_loss_pct:
-                        should_exit = True
-                        exit_reason = "Stop Loss"
-                    elif pnl_pct >= request.exit_conditions.take_profit_pct:
-                        should_exit = True
-                        exit_reason = "Take Profit"
-                else:
-                    if pnl_pct <= -request.exit_conditions.stop_loss_pct:
-                        should_exit = True
-                        exit_reason = "Stop Loss"
-                    elif pnl_pct >= request.exit_conditions.take_profit_pct:
-                        should_exit = True
-                        exit_reason = "Take Profit"
-                
-                if should_exit:
-                    cash += position.initial_value + pnl
-                    
-                    trades.append({
-                        'entry_date': position.entry_date.isoformat(),
-                        'exit_date': current_row.name.isoformat(),
-                        'direction': position.direction,
-                        'entry_price': position.entry_price,
-                        'exit_price': current_row['Close'],
-                        'pnl': pnl,
-                        'pnl_pct': pnl_pct,
-                        'exit_reason': exit_reason
-                    })
-                    
-                    if self.debug:
-                        print(f"\nExiting {position.direction} trade at {current_row.name}")
-                        print(f"Exit Price: ${current_row['Close']:.2f}")
-                        print(f"P&L: ${pnl:.2f} ({pnl_pct:.2f}%)")
-                        print(f"Reason: {exit_reason}")
-                    
-                    open_positions.remove(position)
-            
-            trade_direction = self.check_entry_conditions(current_row, prev_row, request.entry_conditions)
-            
-            max_position_value = current_capital * request.exit_conditions.position_size_pct / 100
-            
-            if trade_direction:
-                position_value = max_position_value
-                position_size = position_value / current_row['Close']
-                
-                if position_value <= cash:
-                    cash -= position_value
-                    new_position = Position(
-                        entry_price=current_row['Close'],
-                        entry_date=current_row.name,
-                        size=position_size,
-                        initial_value=position_value,
-                        direction=trade_direction
-                    )
-                    open_positions.append(new_position)
-                    
-                    if self.debug:
-                        print(f"\nEntering {trade_direction} trade at {current_row.name}")
-                        print(f"Entry Price: ${current_row['Close']:.2f}")
-                        print(f"Position Size: {position_size:.2f} shares")
-                        print(f"Position Value: ${position_value:.2f}")
-            
-            equity_curve.append(current_capital)
+        result = run_backtest_kernel(
+            close=df['Close'].to_numpy(),
+            entry_mask=entry_mask,
+            direction=1 if trade_direction == TradeDirection.BUY else -1,
+            initial_capital=request.initial_capital,
+            stop_loss_pct=request.exit_conditions.stop_loss_pct,
+            take_profit_pct=request.exit_conditions.take_profit_pct,
+            position_size_pct=request.exit_conditions.position_size_pct
+        )
+        trade_log = TradeLog.from_kernel(result, df.index, trade_direction)
         
-        if trades:
-            winning_trades = [t for t in trades if t['pnl'] > 0]
-            total_trades = len(trades)
-            
+        if result.total_trades:
             return {
-                'total_trades': total_trades,
-                'winning_trades': len(winning_trades),
-                'losing_trades': total_trades - len(winning_trades),
-                'win_rate': (len(winning_trades) / total_trades) * 100,
-                'initial_capital': request.initial_capital,
-                'final_capital': current_capital,
-                'total_return_pct': ((current_capital - request.initial_capital) / 
-                                request.initial_capital) * 100,
-                'max_drawdown_pct': self._calculate_max_drawdown(equity_curve),
-                'avg_profit': (sum(t['pnl'] for t in winning_trades) / 
-                            len(winning_trades)) if winning_trades else 0,
-                'avg_loss': (sum(t['pnl'] for t in trades if t['pnl'] <= 0) / 
-                        (total_trades - len(winning_trades))) 
-                        if total_trades > len(winning_trades) else 0,
-                'trades': trades,
-                'equity_curve': equity_curve
-            }
+                **summarize_kernel_result(result, request.initial_capital, periods_per_year(request.timeframe)),
+                'equity_curve': result.equity_curve.tolist()
+            }, trade_log
         else:
             return {
                 'message': 'No trades executed during the backtest period',
                 'data_points': len(df),
                 'date_range': f"{df.index[0]} to {df.index[-1]}"
-            }
+            }, trade_log
 
-    def _calculate_max_drawdown(self, equity_curve: List[float]) -> float:
-        if not equity_curve:
-            return 0.0
-            
-        peak = float('-inf')
-        max_drawdown = 0.0
+    def run_backtest(self, request: BacktestRequest) -> Dict[str, Any]:
+        results, trade_log = self.run_backtest_columns(request)
+        if not len(trade_log):
+            return results
         
-        for equity in equity_curve:
-            if equity > peak:
-                peak = equity
-            if peak > 0:  
-                drawdown = (peak - equity) / peak * 100
-                max_drawdown = max(max_drawdown, drawdown)
-                
-        return max_drawdown
+        trades = trade_log.to_dicts()
+        if self.debug:
+            for trade in trades:
+                print(f"\n{trade['direction']} trade {trade['entry_date']} -> {trade['exit_date']}")
+                print(f"Entry Price: ${trade['entry_price']:.2f}, Exit Price: ${trade['exit_price']:.2f}")
+                print(f"P&L: ${trade['pnl']:.2f} ({trade['pnl_pct']:.2f}%)")
+                print(f"Reason: {trade['exit_reason']}")
+        
+        equity_curve = results.pop('equity_curve')
+        return {**results, 'trades': trades, 'equity_curve': equity_curve}
+
+    def _calculate_max_drawdown(self, equity_curve: List[float]) -> float:
+        return max_drawdown_pct(equity_curve)
 
 backtest_service = BacktestService()
 
+# symbols whose bars and Monte Carlo returns are loaded at startup, e.g. "SPY,QQQ,AAPL"
+WARMUP_SYMBOLS = [symbol.strip() for symbol in os.getenv("MONTY_WARMUP_SYMBOLS", "").split(",") if symbol.strip()]
+WARMUP_TIMEFRAMES = os.getenv("MONTY_WARMUP_TIMEFRAMES", "1d").split(",")
+
+@app.on_event("startup")
+def start_warm_up():
+    """Warm the in-process caches with MONTY_WARMUP_SYMBOLS in the background, as warmup.py does"""
+    if not WARMUP_SYMBOLS:
+        return
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=5 * 365)
+
+    def run():
+        report = warm_up(WARMUP_SYMBOLS, WARMUP_TIMEFRAMES, start_date.strftime("%Y-%m-%d"),
+                         end_date.strftime("%Y-%m-%d"), MonteCarloSimulator())
+        print(format_report(report))
+
+    threading.Thread(target=run, daemon=True, name="warm-up").start()
+
 @app.get("/")
 async def root():
     return {
@@ -538,11 +413,111 @@ async def root():
         "docs_url": "/docs",
     }
 
+def trade_log_response(results: Dict[str, Any], trade_log: TradeLog, response_type: str) -> Response:
+    """Trades in a binary format, with the rest of the results as schema metadata"""
+    return Response(content=trade_log.to_bytes(response_type, metadata=results),
+                    media_type=TRADE_LOG_FORMATS[response_type])
+
+def response_options(format: Optional[str], accept: Optional[str], max_points: Optional[int], downsample: str) -> str:
+    """Negotiated response format, after checking the format and equity curve downsampling parameters"""
+    try:
+        check_downsampling(max_points, downsample)
+        return response_format(format, accept)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.post("/backtest", response_model=Dict[str, Any])
-async def run_backtest(request: BacktestRequest):
+async def run_backtest(request: BacktestRequest, format: Optional[str] = None,
+                       max_points: Optional[int] = None, downsample: str = 'lttb',
+                       accept: Optional[str] = Header(None)):
+    """Backtest results; trades come as JSON, or as Arrow IPC/Parquet with ?format= or an Accept header.
+
+    max_points downsamples the equity curve (LTTB, or min/max per bucket with
+    downsample=minmax) and adds equity_curve_index with the bar of each point.
+    """
+    response_type = response_options(format, accept, max_points, downsample)
+    try:
+        if response_type != 'json':
+            results, trade_log = await run_in_threadpool(backtest_service.run_backtest_columns, request)
+            return trade_log_response(downsample_results(results, max_points, downsample), trade_log, response_type)
+
+        results = await run_in_threadpool(
+            result_cache.get_or_compute, "backtest", request.dict(), request.symbol, request.timeframe,
+            lambda: backtest_service.run_backtest(request), live=reaches_today(request.end_date),
+            provider=request.data_provider
+        )
+        return downsample_results(results, max_points, downsample)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/backtest/portfolio", response_model=Dict[str, Any])
+async def run_portfolio_backtest(request: PortfolioBacktestRequest, format: Optional[str] = None,
+                                 max_points: Optional[int] = None, downsample: str = 'lttb',
+                                 accept: Optional[str] = Header(None)):
+    """Run one strategy over several symbols sharing the initial capital"""
+    response_type = response_options(format, accept, max_points, downsample)
+    try:
+        portfolio = PortfolioBacktest(backtest_service)
+        if response_type != 'json':
+            results, trade_log = await run_in_threadpool(portfolio.run_columns, request)
+            return trade_log_response(downsample_results(results, max_points, downsample), trade_log, response_type)
+        results = await run_in_threadpool(portfolio.run, request)
+        return downsample_results(results, max_points, downsample)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+class SweepRequest(BaseModel):
+    backtest_request: BacktestRequest
+    # dotted request paths, each a list of values or {"start", "stop", "step"} (stop included),
+    # e.g. {"exit_conditions.stop_loss_pct": [2, 5], "entry_conditions.ma_condition.period": {"start": 10, "stop": 50, "step": 10}}
+    parameters: Dict[str, Any]
+    rank_by: str = "total_return_pct"
+    ascending: bool = False
+    top_n: Optional[int] = None
+    # the bar loop holds the GIL, so only processes run the grid in parallel (threads for small grids)
+    execution_mode: Literal["thread", "process"] = "process"
+
+@app.post("/backtest/sweep", response_model=Dict[str, Any])
+async def run_backtest_sweep(request: SweepRequest):
     try:
-        results = backtest_service.run_backtest(request)
-        return results
+        sweep = ParameterSweep(backtest_service, BacktestRequest, execution_mode=request.execution_mode)
+        return await run_in_threadpool(
+            sweep.run, request.backtest_request.dict(), request.parameters,
+            rank_by=request.rank_by, ascending=request.ascending, top_n=request.top_n
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+class WalkForwardRequest(BaseModel):
+    backtest_request: BacktestRequest
+    # swept parameters, as for /backtest/sweep
+    parameters: Dict[str, Any]
+    in_sample_bars: int = 252
+    out_of_sample_bars: int = 63
+    # in-sample windows all start at the first bar instead of rolling forward
+    anchored: bool = False
+    rank_by: str = "total_return_pct"
+    ascending: bool = False
+    # as for /backtest/sweep
+    execution_mode: Literal["thread", "process"] = "process"
+
+@app.post("/backtest/walk-forward", response_model=Dict[str, Any])
+async def run_walk_forward(request: WalkForwardRequest, max_points: Optional[int] = None, downsample: str = 'lttb'):
+    """Optimize on rolling in-sample windows and trade the winners on the windows after them.
+
+    Returns the stitched out-of-sample results with one entry per window
+    giving its dates, chosen parameters and in/out-of-sample statistics.
+    """
+    response_options(None, None, max_points, downsample)
+    try:
+        walk_forward = WalkForwardOptimization(backtest_service, BacktestRequest,
+                                               execution_mode=request.execution_mode)
+        results = await run_in_threadpool(
+            walk_forward.run, request.backtest_request.dict(), request.parameters,
+            in_sample_bars=request.in_sample_bars, out_of_sample_bars=request.out_of_sample_bars,
+            anchored=request.anchored, rank_by=request.rank_by, ascending=request.ascending
+        )
+        return downsample_results(results, max_points, downsample)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -550,6 +525,12 @@ class MonteCarloRequest(BaseModel):
     lookback_years: int = 10
     simulation_length_days: int = 252
     num_simulations: int = 500
+    execution_mode: Literal["thread", "process"] = "thread"
+    seed: Optional[int] = None
+    # adaptive mode: stop once the mean return / drawdown confidence intervals are narrower than tolerance
+    tolerance: Optional[float] = None
+    max_simulations: Optional[int] = None
+    confidence: float = 0.95
     backtest_request: BacktestRequest
 
     class Config:
@@ -558,40 +539,72 @@ class MonteCarloRequest(BaseModel):
 @app.post("/montecarlo", response_model=Dict[str, Any])
 async def run_monte_carlo(request: MonteCarloRequest):
     try:
-        simulator = MonteCarloSimulator(
-            lookback_years=request.lookback_years,
-            simulation_length_days=request.simulation_length_days
-        )
+        def run_simulation() -> Dict[str, Any]:
+            simulator = MonteCarloSimulator(
+                lookback_years=request.lookback_years,
+                simulation_length_days=request.simulation_length_days,
+                execution_mode=request.execution_mode
+            )
         
-        backtest_request = BacktestRequest(
-            symbol=request.backtest_request.symbol,
-            start_date=request.backtest_request.start_date,
-            end_date=request.backtest_request.end_date,
-            timeframe=request.backtest_request.timeframe,
-            initial_capital=request.backtest_request.initial_capital,
-            entry_conditions=request.backtest_request.entry_conditions.dict() if hasattr(request.backtest_request.entry_conditions, 'dict') else request.backtest_request.entry_conditions.model_dump(),
-            exit_conditions=request.backtest_request.exit_conditions.dict() if hasattr(request.backtest_request.exit_conditions, 'dict') else request.backtest_request.exit_conditions.model_dump()
-        )
+            backtest_request = BacktestRequest(
+                symbol=request.backtest_request.symbol,
+                start_date=request.backtest_request.start_date,
+                end_date=request.backtest_request.end_date,
+                timeframe=request.backtest_request.timeframe,
+                initial_capital=request.backtest_request.initial_capital,
+                entry_conditions=request.backtest_request.entry_conditions.dict() if hasattr(request.backtest_request.entry_conditions, 'dict') else request.backtest_request.entry_conditions.model_dump(),
+                exit_conditions=request.backtest_request.exit_conditions.dict() if hasattr(request.backtest_request.exit_conditions, 'dict') else request.backtest_request.exit_conditions.model_dump(),
+                data_provider=request.backtest_request.data_provider
+            )
         
-        results = simulator.run_simulations(
-            backtest_request=backtest_request,
-            num_simulations=request.num_simulations
-        )
+            if request.tolerance is not None:
+                results = simulator.run_adaptive_simulations(
+                    backtest_request=backtest_request,
+                    tolerance=request.tolerance,
+                    max_simulations=request.max_simulations or request.num_simulations,
+                    confidence=request.confidence,
+                    seed=request.seed
+                )
+            else:
+                results = simulator.run_simulations(
+                    backtest_request=backtest_request,
+                    num_simulations=request.num_simulations,
+                    seed=request.seed
+                )
         
-        return {
-            "avg_return": round(results.avg_return, 2),
-            "median_return": round(results.median_return, 2),
-            "highest_return": round(results.highest_return, 2),
-            "worst_return": round(results.worst_return, 2),
-            "avg_drawdown": round(results.avg_drawdown, 2),
-            "median_drawdown": round(results.median_drawdown, 2),
-            "worst_drawdown": round(results.worst_drawdown, 2),
-            "win_rate": round(results.win_rate, 2),
-            "sharpe_ratio": round(results.sharpe_ratio, 2),
-            "simulation_count": results.simulation_count,
-            "successful_simulations": results.successful_simulations,
-            "success_rate": round((results.successful_simulations / results.simulation_count) * 100, 2)
-        }
+            return {
+                "avg_return": round(results.avg_return, 2),
+                "median_return": round(results.median_return, 2),
+                "highest_return": round(results.highest_return, 2),
+                "worst_return": round(results.worst_return, 2),
+                "avg_drawdown": round(results.avg_drawdown, 2),
+                "median_drawdown": round(results.median_drawdown, 2),
+                "worst_drawdown": round(results.worst_drawdown, 2),
+                "win_rate": round(results.win_rate, 2),
+                "sharpe_ratio": round(results.sharpe_ratio, 2),
+                "sortino_ratio": round(results.sortino_ratio, 2),
+                "calmar_ratio": round(results.calmar_ratio, 2),
+                "volatility_pct": round(results.volatility_pct, 2),
+                "var_pct": round(results.var_pct, 2),
+                "cvar_pct": round(results.cvar_pct, 2),
+                "avg_drawdown_duration": round(results.avg_drawdown_duration, 2),
+                "simulation_count": results.simulation_count,
+                "successful_simulations": results.successful_simulations,
+                "seed": results.seed,
+                "return_ci_width": results.return_ci_width,
+                "drawdown_ci_width": results.drawdown_ci_width,
+                "converged": results.converged,
+                "success_rate": round((results.successful_simulations / results.simulation_count) * 100, 2)
+            }
+        
+        if request.seed is None:
+            return await run_in_threadpool(run_simulation)
+        # seeded runs are deterministic, so identical requests can share a result
+        return await run_in_threadpool(
+            result_cache.get_or_compute, "montecarlo", request.dict(exclude={'execution_mode'}),
+            request.backtest_request.symbol, "1d", run_simulation, live=True,
+            provider=request.backtest_request.data_provider
+        )
     except Exception as e:
         error_msg = str(e)
         print(f"Monte Carlo simulation failed: {error_msg}")
@@ -613,7 +626,8 @@ async def run_monte_carlo(request: Dict[str, Any]):
         
         mc_simulator = MonteCarloSimulator(
             lookback_years=request.get('lookback_years', 10),
-            simulation_length_days=request.get('simulation_length_days', 252)
+            simulation_length_days=request.get('simulation_length_days', 252),
+            execution_mode=request.get('execution_mode', 'thread')
         )
         
         backtest_request_obj = BacktestRequest(
@@ -623,33 +637,157 @@ async def run_monte_carlo(request: Dict[str, Any]):
             timeframe=backtest_request.get('timeframe', '1d'),
             initial_capital=backtest_request.get('initial_capital', 10000),
             entry_conditions=backtest_request.get('entry_conditions', {}),
-            exit_conditions=backtest_request.get('exit_conditions', {})
+            exit_conditions=backtest_request.get('exit_conditions', {}),
+            data_provider=backtest_request.get('data_provider')
         )
         
-        results = mc_simulator.run_simulations(
-            backtest_request=backtest_request_obj,
-            num_simulations=request.get('num_simulations', 500)
-        )
+        def run_simulation() -> Dict[str, Any]:
+            if request.get('tolerance') is not None:
+                results = mc_simulator.run_adaptive_simulations(
+                    backtest_request=backtest_request_obj,
+                    tolerance=request['tolerance'],
+                    max_simulations=request.get('max_simulations') or request.get('num_simulations', 500),
+                    confidence=request.get('confidence', 0.95),
+                    seed=request.get('seed')
+                )
+            else:
+                results = mc_simulator.run_simulations(
+                    backtest_request=backtest_request_obj,
+                    num_simulations=request.get('num_simulations', 500),
+                    seed=request.get('seed')
+                )
         
-        results_dict = {
-            'avg_return': results.avg_return,
-            'median_return': results.median_return,
-            'highest_return': results.highest_return,
-            'worst_return': results.worst_return,
-            'avg_drawdown': results.avg_drawdown,
-            'median_drawdown': results.median_drawdown,
-            'worst_drawdown': results.worst_drawdown,
-            'win_rate': results.win_rate,
-            'sharpe_ratio': results.sharpe_ratio,
-            'simulation_count': results.simulation_count,
-            'successful_simulations': results.successful_simulations
-        }
+            results_dict = {
+                'avg_return': results.avg_return,
+                'median_return': results.median_return,
+                'highest_return': results.highest_return,
+                'worst_return': results.worst_return,
+                'avg_drawdown': results.avg_drawdown,
+                'median_drawdown': results.median_drawdown,
+                'worst_drawdown': results.worst_drawdown,
+                'win_rate': results.win_rate,
+                'sharpe_ratio': results.sharpe_ratio,
+                'sortino_ratio': results.sortino_ratio,
+                'calmar_ratio': results.calmar_ratio,
+                'volatility_pct': results.volatility_pct,
+                'var_pct': results.var_pct,
+                'cvar_pct': results.cvar_pct,
+                'avg_drawdown_duration': results.avg_drawdown_duration,
+                'simulation_count': results.simulation_count,
+                'successful_simulations': results.successful_simulations,
+                'seed': results.seed,
+                'return_ci_width': results.return_ci_width,
+                'drawdown_ci_width': results.drawdown_ci_width,
+                'converged': results.converged
+            }
         
-        return results_dict
+            return results_dict
+        
+        if request.get('seed') is None:
+            return await run_in_threadpool(run_simulation)
+        # seeded runs are deterministic, so identical requests can share a result
+        return await run_in_threadpool(
+            result_cache.get_or_compute, "monte-carlo",
+            {key: value for key, value in request.items() if key != 'execution_mode'},
+            backtest_request['symbol'], "1d", run_simulation, live=True,
+            provider=backtest_request.get('data_provider')
+        )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/monte-carlo/stream")
+async def stream_monte_carlo(request: MonteCarloRequest, report_every: int = 50):
+    """NDJSON stream of running aggregates every report_every simulations, ending with the full results"""
+    simulator = MonteCarloSimulator(
+        lookback_years=request.lookback_years,
+        simulation_length_days=request.simulation_length_days,
+        execution_mode=request.execution_mode
+    )
+    
+    def events():
+        try:
+            for event in simulator.iter_simulations(
+                backtest_request=request.backtest_request,
+                num_simulations=request.num_simulations,
+                seed=request.seed,
+                report_every=report_every
+            ):
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            yield json.dumps({'type': 'error', 'detail': f"Monte Carlo simulation failed: {str(e)}"}) + "\n"
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+def monte_carlo_job(request: MonteCarloRequest):
+    """Job function running request, reporting progress as simulations complete"""
+    def run(report_progress):
+        simulator = MonteCarloSimulator(
+            lookback_years=request.lookback_years,
+            simulation_length_days=request.simulation_length_days,
+            execution_mode=request.execution_mode
+        )
+        if request.tolerance is not None:
+            max_simulations = request.max_simulations or request.num_simulations
+            report_progress(0, max_simulations)
+            results = simulator.run_adaptive_simulations(
+                backtest_request=request.backtest_request,
+                tolerance=request.tolerance,
+                max_simulations=max_simulations,
+                confidence=request.confidence,
+                seed=request.seed
+            )
+            report_progress(results.simulation_count, results.simulation_count)
+            return asdict(results)
+        
+        report_progress(0, request.num_simulations)
+        for event in simulator.iter_simulations(
+            backtest_request=request.backtest_request,
+            num_simulations=request.num_simulations,
+            seed=request.seed,
+            report_every=max(1, request.num_simulations // 20)
+        ):
+            if event.pop('type') == 'progress':
+                report_progress(event['completed_simulations'], request.num_simulations)
+        report_progress(request.num_simulations, request.num_simulations)
+        return event
+    return run
+
+@app.post("/montecarlo/jobs", status_code=202)
+async def submit_monte_carlo_job(request: MonteCarloRequest):
+    """Queue a Monte Carlo run and return its job id straight away"""
+    try:
+        job = job_manager.submit("montecarlo", monte_carlo_job(request))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"job_id": job.job_id, "status": job.status}
+
+@app.get("/montecarlo/jobs/{job_id}")
+async def get_monte_carlo_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job.status_dict()
+
+@app.get("/montecarlo/jobs/{job_id}/result")
+async def get_monte_carlo_job_result(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    if job.status == JOB_FAILED:
+        raise HTTPException(status_code=500, detail=f"Monte Carlo simulation failed: {job.error}")
+    if job.status != JOB_COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job.status}")
+    return job.result
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        'results': result_cache.stats(),
+        'indicators': indicator_cache.stats(),
+        'market_data': market_data_stats()
+    }
+
 @app.post("/debug-request")
 async def debug_request(request: Dict[str, Any]):
     """Debug endpoint to see what data is being received"""
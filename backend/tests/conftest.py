@@ -0,0 +1,40 @@
+import os
+import sys
+import tempfile
+import pandas as pd
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# bars fetched through the apps go to a throwaway OHLCV cache, not the machine's shared one
+os.environ.setdefault("MONTY_CACHE_DIR", tempfile.mkdtemp(prefix="monty-test-cache-"))
+
+from core.data_providers import SyntheticProvider  # noqa: E402
+
+@pytest.fixture(scope="session")
+def ohlc() -> pd.DataFrame:
+    """About six years of fixed daily OHLCV bars"""
+    return SyntheticProvider(seed=7).fetch("TEST", pd.Timestamp("2010-01-01"), pd.Timestamp("2016-01-01"), "1d")
+
+@pytest.fixture(scope="session")
+def synthetic_provider() -> str:
+    """data_provider of requests served from deterministic synthetic bars, without network access"""
+    return SyntheticProvider.name
+
+@pytest.fixture(scope="session")
+def app():
+    """The local app module (main.py)"""
+    # main.py loads its TLS certificate from the working directory on import
+    cwd = os.getcwd()
+    os.chdir(BACKEND_DIR)
+    try:
+        import main
+    finally:
+        os.chdir(cwd)
+    return main
+
+@pytest.fixture(scope="session")
+def client(app):
+    from fastapi.testclient import TestClient
+    return TestClient(app.app)
@@ -0,0 +1,26 @@
+import pytest
+
+def backtest_request(provider, **entry_conditions):
+    return {
+        'symbol': 'TEST',
+        'start_date': '2015-01-01',
+        'end_date': '2020-01-01',
+        'entry_conditions': {**entry_conditions, 'trade_direction': 'BUY'},
+        'exit_conditions': {'stop_loss_pct': 5, 'take_profit_pct': 10, 'position_size_pct': 50},
+        'data_provider': provider
+    }
+
+@pytest.mark.parametrize("macd_condition", [
+    {'crossover': 'BULLISH'},
+    {'macd_comparison': 'ABOVE_ZERO'},
+    {'histogram_positive': True},
+])
+def test_macd_condition_without_signal_deviation(client, synthetic_provider, macd_condition):
+    response = client.post('/backtest', json=backtest_request(synthetic_provider, macd_condition=macd_condition))
+    assert response.status_code == 200, response.text
+    assert response.json()['total_trades'] > 0
+
+    # no deviation filter is the same as a zero one
+    with_deviation = client.post('/backtest', json=backtest_request(
+        synthetic_provider, macd_condition={**macd_condition, 'macd_signal_deviation_pct': 0}))
+    assert with_deviation.json() == response.json()
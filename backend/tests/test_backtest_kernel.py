@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from core.backtest_kernel import EXIT_REASONS, run_backtest_kernel, run_portfolio_kernel
+from core.helpers.backtest_service import EntryCondition, Position, TradeDirection
+from core.monte_carlo import MonteCarloSimulator
+from core.signals import compile_entry_mask
+
+CONDITIONS = {
+    'sma_cross_above': {'ma_condition': {'period': 20, 'ma_type': 'SMA', 'comparison': 'CROSS_ABOVE', 'deviation_pct': 1}},
+    'ema_below': {'ma_condition': {'period': 50, 'ma_type': 'EMA', 'comparison': 'BELOW', 'deviation_pct': 2}},
+    'rsi_below': {'rsi_condition': {'period': 14, 'comparison': 'BELOW', 'value': 40}},
+    'rsi_above': {'rsi_condition': {'period': 14, 'comparison': 'ABOVE', 'value': 60}},
+    'macd_bullish': {'macd_condition': {'crossover': 'BULLISH'}},
+    'macd_bearish_above_zero': {'macd_condition': {'crossover': 'BEARISH', 'macd_comparison': 'ABOVE_ZERO'}},
+    'bb_below_lower': {'bb_condition': {'period': 20, 'std_dev': 2.0, 'comparison': 'BELOW_LOWER'}},
+    'bb_cross_middle_up': {'bb_condition': {'period': 20, 'std_dev': 2.0, 'comparison': 'CROSS_MIDDLE_UP'}},
+    'adx_above': {'adx_condition': {'period': 14, 'comparison': 'ABOVE', 'value': 20}},
+    'adx_di_cross_above': {'adx_condition': {'period': 14, 'comparison': 'DI_CROSS_ABOVE', 'value': 25}},
+}
+
+# (stop_loss_pct, take_profit_pct, position_size_pct)
+EXITS = [(10, 20, 50), (2, 3, 25), (5, 10, 100)]
+
+def reference_backtest(df, entry_mask, trade_direction, initial_capital, stop_loss_pct, take_profit_pct,
+                       position_size_pct):
+    """The row by row df.iloc loop the services ran before the kernel"""
+    open_positions = []
+    trades = []
+    equity_curve = [initial_capital]
+    cash = initial_capital
+    current_capital = initial_capital
+
+    for i in range(1, len(df)):
+        current_row = df.iloc[i]
+        total_position_value = sum(position.initial_value + position.calculate_pnl(current_row['Close'])[0]
+                                   for position in open_positions)
+        current_capital = cash + total_position_value
+
+        for position in open_positions[:]:
+            pnl, pnl_pct = position.calculate_pnl(current_row['Close'])
+            if pnl_pct <= -stop_loss_pct:
+                exit_reason = "Stop Loss"
+            elif pnl_pct >= take_profit_pct:
+                exit_reason = "Take Profit"
+            else:
+                continue
+            cash += position.initial_value + pnl
+            trades.append((position.entry_date, i, position.entry_price, current_row['Close'], pnl, pnl_pct,
+                           exit_reason))
+            open_positions.remove(position)
+
+        if entry_mask[i]:
+            position_value = current_capital * position_size_pct / 100
+            if position_value <= cash:
+                cash -= position_value
+                open_positions.append(Position(entry_price=current_row['Close'], entry_date=i,
+                                               size=position_value / current_row['Close'],
+                                               initial_value=position_value, direction=trade_direction))
+
+        equity_curve.append(current_capital)
+
+    return trades, equity_curve, current_capital
+
+def kernel_trades(result):
+    return list(zip(result.entry_index.tolist(), result.exit_index.tolist(), result.entry_price.tolist(),
+                    result.exit_price.tolist(), result.pnl.tolist(), result.pnl_pct.tolist(),
+                    [EXIT_REASONS[reason] for reason in result.exit_reason.tolist()]))
+
+@pytest.mark.parametrize("exits", EXITS)
+@pytest.mark.parametrize("trade_direction", [TradeDirection.BUY, TradeDirection.SELL])
+@pytest.mark.parametrize("condition", list(CONDITIONS))
+def test_kernel_matches_row_loop(ohlc, condition, trade_direction, exits):
+    entry_conditions = EntryCondition(**CONDITIONS[condition], trade_direction=trade_direction)
+    df = MonteCarloSimulator().add_indicators(ohlc.copy(), entry_conditions)
+    entry_mask = compile_entry_mask(df, entry_conditions)
+    assert entry_mask.any()
+
+    stop_loss_pct, take_profit_pct, position_size_pct = exits
+    direction = 1 if trade_direction == TradeDirection.BUY else -1
+    result = run_backtest_kernel(df['Close'].to_numpy(), entry_mask, direction, 10000.0,
+                                 stop_loss_pct, take_profit_pct, position_size_pct)
+    trades, equity_curve, final_capital = reference_backtest(df, entry_mask, trade_direction, 10000.0,
+                                                             stop_loss_pct, take_profit_pct, position_size_pct)
+
+    # the same arithmetic in the same order: equal to the last bit, not just close
+    assert kernel_trades(result) == trades
+    assert result.equity_curve.tolist() == equity_curve
+    assert result.final_capital == final_capital
+
+    portfolio = run_portfolio_kernel(df['Close'].to_numpy()[np.newaxis], entry_mask[np.newaxis], direction, 10000.0,
+                                     stop_loss_pct, take_profit_pct, position_size_pct)
+    assert kernel_trades(portfolio) == trades
+    assert portfolio.equity_curve.tolist() == equity_curve
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from core.downsample import DOWNSAMPLE_METHODS, check_downsampling, downsample, downsample_results, lttb_indices
+
+def random_walk(n, seed=11):
+    return 10000 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.01, n)))
+
+def reference_lttb(values, max_points):
+    """LTTB one point at a time, as in Steinarsson's thesis"""
+    n = len(values)
+    every = (n - 2) / (max_points - 2)
+    indices = [0]
+    a = 0
+    for i in range(max_points - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_start, next_end = end, min(int((i + 2) * every) + 1, n)
+        if i == max_points - 3:
+            end, next_start, next_end = n - 1, n - 1, n
+        avg_x = (next_start + next_end - 1) / 2
+        avg_y = values[next_start:next_end].mean()
+        areas = [abs((a - avg_x) * (values[j] - values[a]) - (a - j) * (avg_y - values[a])) for j in range(start, end)]
+        a = start + int(np.argmax(areas))
+        indices.append(a)
+    return indices + [n - 1]
+
+@pytest.mark.parametrize("method", DOWNSAMPLE_METHODS)
+@pytest.mark.parametrize("n, max_points", [(1000, 3), (1000, 4), (1000, 51), (1000, 100), (101, 100), (5000, 257)])
+def test_downsampled_points(method, n, max_points):
+    values = random_walk(n)
+    indices, kept = downsample(values, max_points, method)
+
+    assert len(indices) <= max_points
+    assert indices[0] == 0 and indices[-1] == n - 1
+    assert (np.diff(indices) > 0).all()
+    np.testing.assert_array_equal(kept, values[indices])
+    if method == 'lttb':
+        assert len(indices) == max_points
+
+@pytest.mark.parametrize("n, max_points", [(1000, 4), (1000, 51), (5000, 257), (103, 100)])
+def test_lttb_matches_the_reference(n, max_points):
+    values = random_walk(n, seed=n)
+    assert lttb_indices(values, max_points).tolist() == reference_lttb(values, max_points)
+
+@pytest.mark.parametrize("max_points", [4, 11, 50, 101])
+def test_minmax_keeps_the_extremes(max_points):
+    values = random_walk(2000)
+    indices, kept = downsample(values, max_points, 'minmax')
+    assert values.argmax() in indices and values.argmin() in indices
+    assert (kept.max(), kept.min()) == (values.max(), values.min())
+
+    # and those of every bucket
+    buckets = (max_points - 2) // 2
+    bucket = (np.arange(1, 1999) - 1) * buckets // 1998
+    for b in range(buckets):
+        interior = np.arange(1, 1999)[bucket == b]
+        assert interior[values[interior].argmax()] in indices
+        assert interior[values[interior].argmin()] in indices
+
+@pytest.mark.parametrize("method", DOWNSAMPLE_METHODS)
+def test_short_curves_are_kept_whole(method):
+    values = random_walk(20)
+    indices, kept = downsample(values, 20, method)
+    assert indices.tolist() == list(range(20))
+    np.testing.assert_array_equal(kept, values)
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        check_downsampling(2, 'lttb')
+    with pytest.raises(ValueError):
+        check_downsampling(100, 'average')
+    check_downsampling(None, 'minmax')
+
+def test_downsample_results():
+    results = {'equity_curve': random_walk(500).tolist(), 'final_capital': 1.0}
+    assert downsample_results(results, None) is results
+    reduced = downsample_results(results, 50, 'minmax')
+    assert len(reduced['equity_curve']) == len(reduced['equity_curve_index']) <= 50
+    assert reduced['equity_curve'] == [results['equity_curve'][i] for i in reduced['equity_curve_index']]
+    assert reduced['final_capital'] == 1.0
+
+@pytest.mark.parametrize("method", DOWNSAMPLE_METHODS)
+def test_backtest_equity_curve_is_downsampled(client, synthetic_provider, method):
+    request = {
+        'symbol': 'TEST',
+        'start_date': '2010-01-01',
+        'end_date': '2016-01-01',
+        'entry_conditions': {'rsi_condition': {'period': 14, 'comparison': 'BELOW', 'value': 45},
+                             'trade_direction': 'BUY'},
+        'exit_conditions': {'stop_loss_pct': 4, 'take_profit_pct': 6, 'position_size_pct': 30},
+        'data_provider': synthetic_provider
+    }
+    full = client.post('/backtest', json=request).json()
+    reduced = client.post(f'/backtest?max_points=100&downsample={method}', json=request).json()
+
+    assert len(full['equity_curve']) > 1000
+    assert len(reduced['equity_curve']) <= 100
+    assert reduced['equity_curve'] == [full['equity_curve'][i] for i in reduced['equity_curve_index']]
+    assert reduced['equity_curve'][-1] == full['equity_curve'][-1]
+    assert client.post('/backtest?max_points=2', json=request).status_code == 400
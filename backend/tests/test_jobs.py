@@ -0,0 +1,99 @@
+import threading
+import time
+import pytest
+from core.jobs import (FINISHED_STATES, JOB_COMPLETED, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, InMemoryJobStore, Job,
+                       JobManager, JobQueueFull, SQLiteJobStore)
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryJobStore()
+    return SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+
+def wait_for(manager, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job.status in FINISHED_STATES:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+def test_job_reports_progress_and_result(store):
+    manager = JobManager(store, max_workers=1)
+
+    def run(report_progress):
+        report_progress(3, 4)
+        return {'value': 42, 'items': [1, 2]}
+
+    job = manager.submit("test", run)
+    assert job.status == JOB_QUEUED
+    finished = wait_for(manager, job.job_id)
+    assert finished.status == JOB_COMPLETED
+    assert finished.result == {'value': 42, 'items': [1, 2]}
+    status = finished.status_dict()
+    assert 'result' not in status
+    assert (status['completed'], status['total'], status['progress_pct']) == (3, 4, 75)
+    manager.shutdown()
+
+def test_failed_job_keeps_its_error(store):
+    manager = JobManager(store, max_workers=1)
+
+    def run(report_progress):
+        raise ValueError("no data")
+
+    finished = wait_for(manager, manager.submit("test", run).job_id)
+    assert (finished.status, finished.error, finished.result) == (JOB_FAILED, "no data", None)
+    assert manager.get("missing") is None
+    manager.shutdown()
+
+def test_queue_full(store):
+    manager = JobManager(store, max_workers=1, max_pending=2)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocked(report_progress):
+        started.set()
+        release.wait(5)
+        return {}
+
+    jobs = [manager.submit("test", blocked), manager.submit("test", blocked)]
+    assert started.wait(5)
+    assert manager.get(jobs[0].job_id).status == JOB_RUNNING
+    assert manager.get(jobs[1].job_id).status == JOB_QUEUED
+    with pytest.raises(JobQueueFull):
+        manager.submit("test", blocked)
+
+    release.set()
+    for job in jobs:
+        assert wait_for(manager, job.job_id).status == JOB_COMPLETED
+    # finished jobs free their slots
+    assert wait_for(manager, manager.submit("test", blocked).job_id).status == JOB_COMPLETED
+    manager.shutdown()
+
+def test_sqlite_jobs_survive_a_new_manager(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    first = JobManager(SQLiteJobStore(path), max_workers=1)
+    done = wait_for(first, first.submit("test", lambda report_progress: {'answer': 1}).job_id)
+    now = time.time()
+    # a job the first process was still running when it stopped
+    first.store.create(Job(job_id="interrupted", kind="test", status=JOB_RUNNING, created_at=now, updated_at=now))
+    first.shutdown()
+
+    second = JobManager(SQLiteJobStore(path), max_workers=1)
+    job = second.get(done.job_id)
+    assert (job.status, job.result, job.kind) == (JOB_COMPLETED, {'answer': 1}, "test")
+    interrupted = second.get("interrupted")
+    assert interrupted.status == JOB_FAILED
+    assert interrupted.error == "Interrupted by a server restart"
+    second.shutdown()
+
+def test_memory_store_drops_oldest_finished_jobs():
+    store = InMemoryJobStore(max_jobs=2)
+    now = time.time()
+    for job_id, status in (("a", JOB_COMPLETED), ("b", JOB_RUNNING), ("c", JOB_FAILED), ("d", JOB_QUEUED)):
+        store.create(Job(job_id=job_id, kind="test", status=status, created_at=now, updated_at=now))
+    assert store.get("a") is None
+    assert store.get("c") is None
+    assert store.get("b").status == JOB_RUNNING
+    assert store.get("d").status == JOB_QUEUED
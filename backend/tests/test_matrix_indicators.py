@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+from core.helpers.backtest_service import EntryCondition
+from core.monte_carlo import MonteCarloSimulator
+
+ALL_INDICATORS = {
+    'ma_condition': {'period': 20, 'ma_type': 'SMA', 'comparison': 'ABOVE', 'deviation_pct': 1},
+    'rsi_condition': {'period': 14, 'comparison': 'BELOW', 'value': 30},
+    'macd_condition': {'crossover': 'BULLISH'},
+    'bb_condition': {'period': 20, 'std_dev': 2.0, 'comparison': 'BELOW_LOWER'},
+    'adx_condition': {'period': 14, 'comparison': 'ABOVE', 'value': 25},
+}
+
+@pytest.fixture(scope="module")
+def price_paths(ohlc):
+    simulator = MonteCarloSimulator(simulation_length_days=120)
+    returns = simulator.get_bootstrap_returns(ohlc)
+    return simulator.price_paths_from_returns(returns, float(ohlc['Close'].iloc[-1]), 4, seed=11)
+
+@pytest.mark.parametrize("ma_type", ["SMA", "EMA"])
+def test_matrix_columns_match_per_path_indicators(price_paths, ma_type):
+    entry_conditions = EntryCondition(**{**ALL_INDICATORS,
+                                         'ma_condition': {**ALL_INDICATORS['ma_condition'], 'ma_type': ma_type}},
+                                      trade_direction='BUY')
+    simulator = MonteCarloSimulator()
+    columns = simulator.build_simulated_columns(price_paths, entry_conditions)
+
+    for path in range(len(price_paths)):
+        frame = pd.DataFrame({name: columns[name][path] for name in ('Open', 'High', 'Low', 'Close')})
+        expected = simulator.add_indicators(frame, entry_conditions)
+        for name, values in columns.items():
+            reference = expected[name].to_numpy(dtype=np.float64)
+            # the warm-up rows must be NaN in exactly the same places
+            np.testing.assert_array_equal(np.isnan(values[path]), np.isnan(reference), err_msg=name)
+            np.testing.assert_allclose(values[path], reference, rtol=1e-10, atol=1e-10, equal_nan=True,
+                                       err_msg=name)
+        assert np.isnan(columns['RSI_14'][path, :13]).all()
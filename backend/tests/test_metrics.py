@@ -0,0 +1,38 @@
+import json
+import warnings
+from dataclasses import asdict
+import numpy as np
+import pytest
+from core.metrics import MAX_CALMAR_RATIO, calmar_ratio, curve_metrics, periods_per_year
+from core.monte_carlo import RISK_FIELDS, TRADE_FIELDS, MonteCarloSimulator
+
+# a few bars of a quick gain, which annualize past the float range at intraday timeframes
+SHORT_CURVES = [[10000, 10100, 10050, 10300, 10500], [10000, 9900, 10400], [10000, 9000, 9500, 8000]]
+
+@pytest.mark.parametrize("timeframe", ["1m", "5m", "1h", "1d"])
+def test_short_curves_have_finite_calmar_ratios(timeframe):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        ratios = calmar_ratio(SHORT_CURVES, periods_per_year(timeframe))
+    assert np.isfinite(ratios).all()
+    assert (np.abs(ratios) <= MAX_CALMAR_RATIO).all()
+    # losing curves keep their sign
+    assert ratios[0] > 0 and ratios[2] < 0
+    if timeframe == "1m":
+        assert ratios[0] == MAX_CALMAR_RATIO
+
+def test_calmar_ratio_of_a_year():
+    curve = 10000 * np.exp(np.cumsum(np.random.default_rng(3).normal(0.0004, 0.01, 253)))
+    drawdown = np.max(1 - curve / np.maximum.accumulate(curve)) * 100
+    expected = ((curve[-1] / curve[0]) - 1) * 100 / drawdown
+    assert calmar_ratio(curve)[0] == pytest.approx(expected)
+
+def test_monte_carlo_results_of_short_curves_are_json():
+    risk = curve_metrics(SHORT_CURVES, periods=periods_per_year("1m"))
+    trades = np.tile([5.0, 2.0, 50.0, 3.0, 100.0, -50.0], (len(SHORT_CURVES), 1))
+    metrics = np.column_stack([trades] + [risk[name] for name in RISK_FIELDS])
+    assert metrics.shape[1] == len(TRADE_FIELDS) + len(RISK_FIELDS)
+
+    results = MonteCarloSimulator().aggregate_results(metrics, len(SHORT_CURVES))
+    assert results.successful_simulations == len(SHORT_CURVES)
+    json.dumps(asdict(results), allow_nan=False)
@@ -0,0 +1,54 @@
+from dataclasses import asdict
+import numpy as np
+import pytest
+from core.helpers.backtest_service import BacktestRequest
+from core.monte_carlo import MonteCarloSimulator
+
+SEED = 1234
+NUM_SIMULATIONS = 24
+
+@pytest.fixture(scope="module")
+def backtest_request(synthetic_provider):
+    return BacktestRequest(
+        symbol='TEST',
+        start_date='2020-01-01',
+        end_date='2021-01-01',
+        entry_conditions={
+            'ma_condition': {'period': 10, 'ma_type': 'EMA', 'comparison': 'ABOVE', 'deviation_pct': 0},
+            'rsi_condition': {'period': 14, 'comparison': 'BELOW', 'value': 60},
+            'trade_direction': 'BUY'
+        },
+        exit_conditions={'stop_loss_pct': 3, 'take_profit_pct': 4, 'position_size_pct': 40},
+        data_provider=synthetic_provider
+    )
+
+def simulator(execution_mode="thread", max_workers=1):
+    return MonteCarloSimulator(lookback_years=2, simulation_length_days=80, execution_mode=execution_mode,
+                               max_workers=max_workers)
+
+@pytest.fixture(scope="module")
+def serial_results(backtest_request):
+    return asdict(simulator().run_simulations(backtest_request, NUM_SIMULATIONS, seed=SEED))
+
+@pytest.mark.parametrize("execution_mode, max_workers", [("thread", 4), ("thread", 10), ("process", 3)])
+def test_results_do_not_depend_on_workers(backtest_request, serial_results, execution_mode, max_workers):
+    results = simulator(execution_mode, max_workers).run_simulations(backtest_request, NUM_SIMULATIONS, seed=SEED)
+    assert asdict(results) == serial_results
+
+def test_seeded_runs_have_trades(serial_results):
+    assert serial_results['seed'] == SEED
+    assert serial_results['successful_simulations'] == NUM_SIMULATIONS
+    assert serial_results['avg_return'] != 0
+
+def test_simulation_data_regenerates_a_path(backtest_request):
+    mc = simulator()
+    historical_data = mc.get_historical_data(backtest_request.symbol, backtest_request.data_provider)
+    paths = mc.generate_price_paths(historical_data, 6, seed=SEED)
+
+    for index in (0, 3, 5):
+        frame = mc.generate_simulation_data(historical_data, backtest_request.entry_conditions, seed=SEED,
+                                            simulation_index=index)
+        expected = mc.build_simulated_frame(paths[index], backtest_request.entry_conditions)
+        assert list(frame.columns) == list(expected.columns)
+        np.testing.assert_array_equal(frame.to_numpy(), expected.to_numpy())
+        np.testing.assert_array_equal(frame['Close'].to_numpy(), paths[index][-len(frame):])
@@ -0,0 +1,95 @@
+import threading
+import time
+import pandas as pd
+from core.data_providers import SyntheticProvider
+from core.market_data import OHLCVCache, OHLCV_COLUMNS
+
+class CountingProvider(SyntheticProvider):
+    """Synthetic bars, recording every upstream fetch"""
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__(seed=3)
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def fetch(self, symbol, start, end, interval):
+        with self._lock:
+            self.calls.append((symbol, start, end, interval))
+        time.sleep(self.delay)
+        return super().fetch(symbol, start, end, interval)
+
+def assert_bars(result, provider, start, end):
+    """result holds exactly the provider's bars for start..end (stored bar times are always ns)"""
+    expected = SyntheticProvider.fetch(provider, "TEST", pd.Timestamp(start), pd.Timestamp(end), "1d")
+    pd.testing.assert_frame_equal(result, expected[list(OHLCV_COLUMNS)], check_freq=False, check_index_type=False)
+
+def test_missing_ranges():
+    cache = OHLCVCache(provider=SyntheticProvider())
+    today = pd.Timestamp("2024-06-10")
+    day = pd.Timestamp
+    meta = {'start': "2024-01-01", 'end': "2024-03-01", 'fetched_at': time.time(), 'version': 1}
+
+    assert cache._missing(None, day("2024-01-01"), day("2024-02-01"), today) == [(day("2024-01-01"), day("2024-02-01"))]
+    assert cache._missing(meta, day("2024-01-15"), day("2024-02-15"), today) == []
+    assert cache._missing(meta, day("2023-12-01"), day("2024-04-01"), today) == [
+        (day("2023-12-01"), day("2024-01-01")), (day("2024-03-01"), day("2024-04-01"))]
+
+    # a range covered up to today is only refetched once it is stale
+    live = {**meta, 'end': "2024-06-10"}
+    assert cache._missing(live, day("2024-01-01"), day("2024-06-11"), today) == []
+    stale = {**live, 'fetched_at': time.time() - cache.max_staleness_seconds - 1}
+    assert cache._missing(stale, day("2024-01-01"), day("2024-06-11"), today) == [
+        (day("2024-06-10"), day("2024-06-11"))]
+
+def test_head_and_tail_are_filled(tmp_path):
+    provider = CountingProvider()
+    cache = OHLCVCache(str(tmp_path), provider=provider, coalesce_seconds=0)
+
+    first = cache.get_history("TEST", "2015-01-01", "2015-06-01")
+    assert_bars(first, provider, "2015-01-01", "2015-06-01")
+    assert first.attrs['data_version'] == cache.version("TEST") == 1
+
+    wider = cache.get_history("TEST", "2014-06-01", "2015-09-01")
+    assert [(start.date().isoformat(), end.date().isoformat()) for _, start, end, _ in provider.calls[1:]] == [
+        ("2014-06-01", "2015-01-01"), ("2015-06-01", "2015-09-01")]
+    assert_bars(wider, provider, "2014-06-01", "2015-09-01")
+    # one fill is one new version, however many gaps it fetched
+    assert wider.attrs['data_version'] == cache.version("TEST") == 2
+
+    # a range inside the stored one comes from disk alone
+    inner = cache.get_history("TEST", "2014-08-01", "2015-08-01")
+    assert len(provider.calls) == 3
+    assert inner.attrs['data_version'] == 2
+
+    manifest = cache.manifest()
+    assert list(manifest) == ["1d"]
+    entry = manifest["1d"]["TEST"]
+    assert (entry['start'][:10], entry['end'][:10], entry['version']) == ("2014-06-01", "2015-09-01", 2)
+    assert entry['rows'] == len(wider)
+    assert cache.stats()['upstream_fetches'] == 3
+
+def test_concurrent_requests_share_one_fetch(tmp_path):
+    provider = CountingProvider(delay=0.05)
+    cache = OHLCVCache(str(tmp_path), provider=provider, coalesce_seconds=0.3)
+    ranges = [("2015-01-01", "2015-06-01"), ("2015-03-01", "2015-12-01"), ("2014-06-01", "2015-02-01")] * 3
+    barrier = threading.Barrier(len(ranges))
+    results = [None] * len(ranges)
+
+    def load(i, start, end):
+        barrier.wait()
+        results[i] = cache.get_history("TEST", start, end)
+
+    threads = [threading.Thread(target=load, args=(i, *r)) for i, r in enumerate(ranges)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(provider.calls) == 1
+    _, start, end, _ = provider.calls[0]
+    assert (start, end) == (pd.Timestamp("2014-06-01"), pd.Timestamp("2015-12-01"))
+    assert cache.stats()['upstream_fetches'] == 1
+    assert cache.stats()['coalesced_requests'] == len(ranges) - 1
+    for (start, end), result in zip(ranges, results):
+        assert_bars(result, provider, start, end)
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from core.backtest_kernel import run_backtest_kernel, run_portfolio_kernel
+from core.helpers.backtest_service import EntryCondition
+from core.monte_carlo import MonteCarloSimulator
+from core.signals import compile_entry_mask
+
+ENTRY_CONDITIONS = {
+    'rsi_condition': {'period': 14, 'comparison': 'BELOW', 'value': 45},
+    'trade_direction': 'BUY'
+}
+EXITS = {'stop_loss_pct': 4, 'take_profit_pct': 6, 'position_size_pct': 30}
+
+def kernel_fields(result):
+    return (result.entry_index.tolist(), result.exit_index.tolist(), result.entry_price.tolist(),
+            result.exit_price.tolist(), result.pnl.tolist(), result.pnl_pct.tolist(), result.exit_reason.tolist(),
+            result.equity_curve.tolist(), result.final_capital)
+
+@pytest.fixture(scope="module")
+def single(ohlc):
+    entry_conditions = EntryCondition(**ENTRY_CONDITIONS)
+    df = MonteCarloSimulator().add_indicators(ohlc.copy(), entry_conditions)
+    close = df['Close'].to_numpy()
+    entry_mask = compile_entry_mask(df, entry_conditions)
+    args = (1, 10000.0, EXITS['stop_loss_pct'], EXITS['take_profit_pct'], EXITS['position_size_pct'])
+    return close, entry_mask, args, run_backtest_kernel(close, entry_mask, *args)
+
+def test_one_symbol_portfolio_is_the_single_symbol_kernel(single):
+    close, entry_mask, args, expected = single
+    assert expected.total_trades > 10
+    result = run_portfolio_kernel(close[np.newaxis], entry_mask[np.newaxis], *args)
+    assert kernel_fields(result) == kernel_fields(expected)
+    assert (result.symbol_index == 0).all()
+
+@pytest.mark.parametrize("other", ["no_bars", "no_entries"])
+def test_idle_second_symbol_changes_nothing(single, other):
+    close, entry_mask, args, expected = single
+    other_close = np.full_like(close, np.nan) if other == "no_bars" else close * 2
+    result = run_portfolio_kernel(np.stack([close, other_close]), np.stack([entry_mask, np.zeros_like(entry_mask)]),
+                                  *args)
+    assert kernel_fields(result) == kernel_fields(expected)
+
+def test_portfolio_endpoint_with_one_symbol(client, synthetic_provider):
+    request = {
+        'start_date': '2012-01-01',
+        'end_date': '2016-01-01',
+        'entry_conditions': ENTRY_CONDITIONS,
+        'exit_conditions': EXITS,
+        'data_provider': synthetic_provider
+    }
+    single = client.post('/backtest', json={**request, 'symbol': 'TEST'}).json()
+    portfolio = client.post('/backtest/portfolio', json={**request, 'symbols': ['test']}).json()
+
+    assert portfolio['symbols'] == ['TEST']
+    assert portfolio['failed_symbols'] == {}
+    assert portfolio['per_symbol']['TEST']['total_trades'] == single['total_trades'] > 0
+    assert portfolio['trades'] == [{'symbol': 'TEST', **trade} for trade in single['trades']]
+    for name, value in single.items():
+        if name != 'trades':
+            assert portfolio[name] == value, name
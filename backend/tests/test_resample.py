@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+from core.data_providers import SyntheticProvider
+from core.market_data import OHLCVCache
+from core.resample import parse_timeframe, resample_base, resample_ohlcv, storage_interval
+
+AGGREGATES = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+@pytest.fixture
+def cache(tmp_path):
+    return OHLCVCache(str(tmp_path), provider=SyntheticProvider(seed=5), coalesce_seconds=0)
+
+def test_parse_timeframe():
+    assert parse_timeframe("15m") == (15, "m")
+    assert parse_timeframe("1wk") == (1, "wk")
+    for timeframe in ("", "0h", "4x", "h4", "1.5h", None):
+        with pytest.raises(ValueError):
+            parse_timeframe(timeframe)
+
+@pytest.mark.parametrize("timeframe, base", [
+    ("5m", None), ("1h", None), ("1d", None),
+    ("1m", None), ("7m", None),
+    ("15m", "5m"), ("30m", "5m"),
+    # the coarsest base that divides the timeframe, the base itself included
+    ("60m", "1h"), ("120m", "1h"), ("4h", "1h"),
+    ("2d", "1d"), ("1wk", "1d"), ("1mo", "1d"),
+])
+def test_resample_base(timeframe, base):
+    assert resample_base(timeframe) == base
+    assert storage_interval(timeframe) == (base or timeframe)
+
+def test_intraday_bins_match_groupby(cache):
+    bars = cache.get_history("TEST", "2015-03-02", "2015-03-07", "5m")
+    result = resample_ohlcv(bars, "1h")
+
+    # bins are anchored at each session's first bar
+    session_open = bars.index.normalize() + pd.Timedelta(hours=9, minutes=30)
+    starts = session_open + (bars.index - session_open) // pd.Timedelta(hours=1) * pd.Timedelta(hours=1)
+    expected = bars.groupby(starts).agg(AGGREGATES)
+    pd.testing.assert_frame_equal(result, expected, check_names=False, check_freq=False, check_index_type=False)
+    assert len(result) == 5 * 7
+    assert result.index[:7].strftime("%H:%M").tolist() == ["09:30", "10:30", "11:30", "12:30", "13:30", "14:30",
+                                                           "15:30"]
+
+@pytest.mark.parametrize("timeframe, period", [("1wk", "W"), ("1mo", "M")])
+def test_calendar_bins_match_groupby(cache, timeframe, period):
+    bars = cache.get_history("TEST", "2014-01-01", "2015-01-01", "1d")
+    result = resample_ohlcv(bars, timeframe)
+
+    expected = bars.groupby(bars.index.to_period(period).start_time).agg(AGGREGATES)
+    pd.testing.assert_frame_equal(result, expected, check_names=False, check_freq=False, check_index_type=False)
+    if timeframe == "1wk":
+        assert (result.index.dayofweek == 0).all()
+
+def test_bars_without_a_close_are_dropped(cache):
+    bars = cache.get_history("TEST", "2014-01-01", "2014-03-01", "1d").copy()
+    bars.iloc[3:5, bars.columns.get_loc('Close')] = np.nan
+    result = resample_ohlcv(bars, "1mo")
+    assert result['Close'].notna().all()
+    assert result['Volume'].sum() == bars['Volume'].sum() - bars['Volume'].iloc[3:5].sum()
+
+def test_60m_is_the_stored_1h_bars(cache):
+    direct = cache.get_history("TEST", "2015-03-02", "2015-03-14", "1h")
+    sixty = cache.get_history("TEST", "2015-03-02", "2015-03-14", "60m")
+
+    # bars freshly fetched keep the provider's time unit, stored ones are ns
+    pd.testing.assert_frame_equal(sixty, direct, check_index_type=False)
+    assert sixty.attrs['interval'] == "60m"
+    assert list(cache.manifest()) == ["1h"]
+
+def test_resampled_timeframes_come_from_the_stored_base(cache):
+    four_hours = cache.get_history("TEST", "2015-03-02", "2015-03-14", "4h")
+    hourly = cache.get_history("TEST", "2015-03-02", "2015-03-14", "1h")
+
+    pd.testing.assert_frame_equal(four_hours, resample_ohlcv(hourly, "4h"))
+    assert four_hours.attrs['interval'] == "4h"
+    assert list(cache.manifest()) == ["1h"]
+    assert cache.stats()['upstream_fetches'] == 1
@@ -0,0 +1,71 @@
+import json
+from core.market_data import cache_for, get_history
+from core.result_cache import ResultCache, canonical_json, request_key
+
+PAYLOAD = {'symbol': 'TEST', 'exit_conditions': {'stop_loss_pct': 2, 'take_profit_pct': 4}, 'seed': 7}
+
+def test_request_key_is_stable():
+    reordered = {'seed': 7, 'exit_conditions': {'take_profit_pct': 4, 'stop_loss_pct': 2}, 'symbol': 'TEST'}
+    key = request_key("backtest", PAYLOAD, 3)
+    assert key == request_key("backtest", reordered, 3)
+    assert len(key) == 64 and int(key, 16) >= 0
+    assert canonical_json(PAYLOAD) == canonical_json(reordered)
+
+    assert key != request_key("montecarlo", PAYLOAD, 3)
+    assert key != request_key("backtest", PAYLOAD, 4)
+    assert key != request_key("backtest", {**PAYLOAD, 'seed': 8}, 3)
+
+def test_new_bars_invalidate_results(synthetic_provider):
+    cache = ResultCache()
+    calls = []
+
+    def compute(start):
+        def run():
+            df = get_history("RESULTS", start, "2016-01-01", "1d", synthetic_provider)
+            calls.append(len(df))
+            return {'bars': len(df)}
+        return run
+
+    def get(start):
+        return cache.get_or_compute("backtest", {'start': start}, "RESULTS", "1d", compute(start),
+                                    provider=synthetic_provider)
+
+    assert get("2015-01-01") == get("2015-01-01")
+    assert len(calls) == 1
+    version = cache_for(synthetic_provider).version("RESULTS")
+
+    # another request extends the stored range, which bumps the symbol's data version
+    get_history("RESULTS", "2014-01-01", "2016-01-01", "1d", synthetic_provider)
+    assert cache_for(synthetic_provider).version("RESULTS") == version + 1
+    assert get("2015-01-01") == {'bars': calls[0]}
+    assert len(calls) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_lru_eviction_by_bytes():
+    entry_bytes = len(json.dumps({'value': 'x' * 100}))
+    cache = ResultCache(max_bytes=entry_bytes * 2)
+    cache.put("a", {'value': 'a' * 100})
+    cache.put("b", {'value': 'b' * 100})
+    assert cache.get("a") is not None
+    cache.put("c", {'value': 'c' * 100})
+
+    # "b" was the least recently used
+    assert cache.get("b") is None
+    assert cache.get("a") == {'value': 'a' * 100}
+    assert cache.get("c") == {'value': 'c' * 100}
+    assert cache.stats()['bytes'] == entry_bytes * 2
+
+    cache.put("huge", {'value': 'x' * 1000})
+    assert cache.get("huge") is None
+    assert cache.stats()['entries'] == 2
+
+def test_disk_tier_round_trip(tmp_path):
+    ResultCache(disk_dir=str(tmp_path)).put("k" * 64, {'total_return_pct': 1.5, 'trades': [{'pnl': -2.0}]})
+    ResultCache(disk_dir=str(tmp_path)).put("e" * 64, {'stale': True}, ttl=-1)
+
+    fresh = ResultCache(disk_dir=str(tmp_path))
+    assert fresh.get("k" * 64) == {'total_return_pct': 1.5, 'trades': [{'pnl': -2.0}]}
+    assert fresh.stats()['entries'] == 1
+    # expired entries are not served from disk either
+    assert fresh.get("e" * 64) is None
+    assert fresh.get("0" * 64) is None
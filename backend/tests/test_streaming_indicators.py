@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+from core.signals import compile_entry_mask
+from core.streaming_indicators import StreamingIndicators
+
+CONDITIONS = {
+    'sma': {'ma_condition': {'period': 20, 'ma_type': 'SMA', 'comparison': 'CROSS_ABOVE', 'deviation_pct': 1}},
+    'ema': {'ma_condition': {'period': 50, 'ma_type': 'EMA', 'comparison': 'BELOW', 'deviation_pct': 2}},
+    'rsi': {'rsi_condition': {'period': 14, 'comparison': 'BELOW', 'value': 40}},
+    'macd': {'macd_condition': {'crossover': 'BULLISH', 'macd_signal_deviation_pct': 5}},
+    'bb': {'bb_condition': {'period': 20, 'std_dev': 2.0, 'comparison': 'BELOW_LOWER'}},
+    'adx': {'adx_condition': {'period': 14, 'comparison': 'ABOVE', 'value': 20}},
+    'adx_di_cross': {'adx_condition': {'period': 14, 'comparison': 'DI_CROSS_ABOVE', 'value': 25}},
+    'combined': {'ma_condition': {'period': 10, 'ma_type': 'EMA', 'comparison': 'ABOVE', 'deviation_pct': 0},
+                 'rsi_condition': {'period': 14, 'comparison': 'ABOVE', 'value': 50},
+                 'adx_condition': {'period': 14, 'comparison': 'ABOVE', 'value': 15}},
+}
+
+@pytest.mark.parametrize("trade_direction", ["BUY", "SELL"])
+@pytest.mark.parametrize("condition", list(CONDITIONS))
+def test_streaming_matches_batch(app, ohlc, condition, trade_direction):
+    entry_conditions = app.EntryCondition(**CONDITIONS[condition], trade_direction=trade_direction)
+    bars = ohlc.iloc[:1000]
+    batch = app.BacktestService(debug=False).calculate_indicators(bars.copy(), entry_conditions)
+    batch_signals = compile_entry_mask(batch, entry_conditions)
+
+    streaming = StreamingIndicators(entry_conditions)
+    rows, signals = [], []
+    for open_, high, low, close in bars[['Open', 'High', 'Low', 'Close']].itertuples(index=False):
+        rows.append(streaming.update(open_, high, low, close))
+        signals.append(streaming.entry_signal())
+    streamed = pd.DataFrame(rows, index=bars.index)
+
+    for column in streamed.columns:
+        np.testing.assert_allclose(streamed[column].to_numpy(dtype=np.float64),
+                                   batch[column].to_numpy(dtype=np.float64),
+                                   rtol=1e-10, atol=1e-10, equal_nan=True, err_msg=column)
+    assert signals == batch_signals.tolist()
+    assert any(signals)
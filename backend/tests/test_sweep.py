@@ -0,0 +1,68 @@
+import pytest
+from core import sweep as sweep_module
+from core.sweep import ParameterSweep, apply_parameters
+
+PARAMETERS = {
+    'entry_conditions.ma_condition.period': [10, 20],
+    'entry_conditions.rsi_condition.value': [45, 55],
+    'exit_conditions.stop_loss_pct': {'start': 2, 'stop': 6, 'step': 4},
+}
+
+@pytest.fixture
+def base_request(synthetic_provider):
+    return {
+        'symbol': 'TEST',
+        'start_date': '2012-01-01',
+        'end_date': '2016-01-01',
+        'entry_conditions': {
+            'ma_condition': {'period': 20, 'ma_type': 'SMA', 'comparison': 'ABOVE', 'deviation_pct': 0},
+            'rsi_condition': {'period': 14, 'comparison': 'BELOW', 'value': 50},
+            'trade_direction': 'BUY'
+        },
+        'exit_conditions': {'stop_loss_pct': 5, 'take_profit_pct': 5, 'position_size_pct': 25},
+        'data_provider': synthetic_provider
+    }
+
+class CountingService:
+    """The app's BacktestService, counting calculate_indicators calls"""
+
+    def __init__(self, service):
+        self.service = service
+        self.indicator_calls = 0
+
+    def get_historical_data(self, *args):
+        return self.service.get_historical_data(*args)
+
+    def calculate_indicators(self, df, entry_conditions):
+        self.indicator_calls += 1
+        return self.service.calculate_indicators(df, entry_conditions)
+
+def test_sweep_rows_match_standalone_backtests(app, client, base_request):
+    service = CountingService(app.backtest_service)
+    results = ParameterSweep(service, app.BacktestRequest, execution_mode="thread").run(base_request, PARAMETERS)
+
+    assert results['combinations'] == 8
+    assert [row['rank'] for row in results['results']] == list(range(1, 9))
+    returns = [row['total_return_pct'] for row in results['results']]
+    assert returns == sorted(returns, reverse=True)
+
+    # two MA periods plus one RSI period; the RSI thresholds and stops do not change any column
+    assert results['indicator_configurations'] == 3
+    assert service.indicator_calls == 3
+
+    for row in results['results']:
+        response = client.post('/backtest', json=apply_parameters(base_request, row['parameters']))
+        assert response.status_code == 200, response.text
+        expected = response.json()
+        for name, value in row.items():
+            if name not in ('rank', 'parameters'):
+                assert value == pytest.approx(expected[name], rel=1e-9, abs=1e-12), name
+
+def test_process_pool_matches_threads(app, base_request, monkeypatch):
+    threads = ParameterSweep(app.backtest_service, app.BacktestRequest, execution_mode="thread",
+                             max_workers=2).run(base_request, PARAMETERS)
+    # force the pool for this small grid
+    monkeypatch.setattr(sweep_module, "MIN_PROCESS_BAR_RUNS", 0)
+    processes = ParameterSweep(app.backtest_service, app.BacktestRequest, execution_mode="process",
+                               max_workers=2).run(base_request, PARAMETERS)
+    assert processes == threads
@@ -0,0 +1,116 @@
+import io
+import json
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from core.backtest_kernel import EXIT_REASONS, run_portfolio_kernel
+from core.helpers.backtest_service import EntryCondition
+from core.monte_carlo import MonteCarloSimulator
+from core.signals import compile_entry_mask
+from core.trade_log import TRADE_LOG_FORMATS, TradeLog, response_format
+
+ENTRY_CONDITIONS = {
+    'rsi_condition': {'period': 14, 'comparison': 'BELOW', 'value': 45},
+    'trade_direction': 'BUY'
+}
+EXITS = {'stop_loss_pct': 4, 'take_profit_pct': 6, 'position_size_pct': 30}
+
+def read_table(data, format):
+    if format == 'arrow':
+        return pa.ipc.open_stream(io.BytesIO(data)).read_all()
+    return pq.read_table(io.BytesIO(data))
+
+def table_rows(table):
+    """Rows of a trade table in the format of TradeLog.to_dicts"""
+    rows = table.to_pandas().to_dict('records')
+    for row in rows:
+        row['entry_date'] = row['entry_date'].isoformat()
+        row['exit_date'] = row['exit_date'].isoformat()
+    return rows
+
+@pytest.fixture(scope="module")
+def trade_log(ohlc):
+    entry_conditions = EntryCondition(**ENTRY_CONDITIONS)
+    df = MonteCarloSimulator().add_indicators(ohlc.copy(), entry_conditions)
+    close = df['Close'].to_numpy()
+    entry_mask = compile_entry_mask(df, entry_conditions)
+    result = run_portfolio_kernel(np.stack([close, close[::-1].copy()]), np.stack([entry_mask, entry_mask[::-1]]),
+                                  1, 10000.0, EXITS['stop_loss_pct'], EXITS['take_profit_pct'],
+                                  EXITS['position_size_pct'])
+    return TradeLog.from_kernel(result, df.index, entry_conditions.trade_direction, symbols=['AAA', 'BBB'])
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, 'json'),
+    ('', 'json'),
+    ('text/html, */*', 'json'),
+    ('application/json', 'json'),
+    ('application/vnd.apache.arrow.stream', 'arrow'),
+    ('application/vnd.apache.arrow.file', 'arrow'),
+    ('text/html;q=0.9, Application/VND.Apache.Parquet;q=0.8', 'parquet'),
+    ('application/x-parquet', 'parquet'),
+])
+def test_accept_header(accept, expected):
+    assert response_format(None, accept) == expected
+
+def test_format_wins_over_accept():
+    assert response_format('Parquet', 'application/vnd.apache.arrow.stream') == 'parquet'
+    assert response_format('json', 'application/vnd.apache.parquet') == 'json'
+    with pytest.raises(ValueError):
+        response_format('csv')
+
+def test_dicts(trade_log):
+    rows = trade_log.to_dicts()
+    assert len(rows) == len(trade_log) > 10
+    assert {row['symbol'] for row in rows} == {'AAA', 'BBB'}
+    assert {row['exit_reason'] for row in rows} <= set(EXIT_REASONS)
+    assert rows[0]['entry_date'] == trade_log.entry_date[0].isoformat()
+    assert [row['pnl'] for row in rows] == trade_log.pnl.tolist()
+
+@pytest.mark.parametrize("format", ["arrow", "parquet"])
+def test_binary_round_trip(trade_log, format):
+    metadata = {'final_capital': 12345.5, 'equity_curve': [1.0, 2.5], 'message': None}
+    table = read_table(trade_log.to_bytes(format, metadata=metadata), format)
+
+    assert table.column_names == ['symbol', 'entry_date', 'exit_date', 'direction', 'entry_price', 'exit_price',
+                                  'pnl', 'pnl_pct', 'exit_reason']
+    assert pa.types.is_dictionary(table.schema.field('exit_reason').type)
+    assert table_rows(table) == trade_log.to_dicts()
+    schema_metadata = table.schema.metadata
+    assert {key: json.loads(schema_metadata[key.encode()]) for key in metadata} == metadata
+
+def test_unknown_binary_format(trade_log):
+    with pytest.raises(ValueError):
+        trade_log.to_bytes('json')
+
+@pytest.mark.parametrize("format", ["arrow", "parquet"])
+@pytest.mark.parametrize("negotiation", ["query", "accept"])
+def test_backtest_endpoint_formats(client, synthetic_provider, format, negotiation):
+    request = {
+        'symbol': 'TEST',
+        'start_date': '2010-01-01',
+        'end_date': '2016-01-01',
+        'entry_conditions': ENTRY_CONDITIONS,
+        'exit_conditions': EXITS,
+        'data_provider': synthetic_provider
+    }
+    expected = client.post('/backtest', json=request).json()
+    if negotiation == "query":
+        response = client.post(f'/backtest?format={format}', json=request)
+    else:
+        response = client.post('/backtest', json=request, headers={'Accept': TRADE_LOG_FORMATS[format]})
+
+    assert response.status_code == 200, response.text
+    assert response.headers['content-type'] == TRADE_LOG_FORMATS[format]
+    table = read_table(response.content, format)
+    assert table_rows(table) == expected['trades']
+    metadata = {key.decode(): json.loads(value) for key, value in table.schema.metadata.items()
+                if not key.startswith(b'ARROW')}
+    assert metadata == {name: value for name, value in expected.items() if name != 'trades'}
+
+def test_unknown_format_is_rejected(client, synthetic_provider):
+    response = client.post('/backtest?format=csv', json={
+        'symbol': 'TEST', 'start_date': '2015-01-01', 'end_date': '2016-01-01',
+        'entry_conditions': ENTRY_CONDITIONS, 'exit_conditions': EXITS, 'data_provider': synthetic_provider
+    })
+    assert response.status_code == 400
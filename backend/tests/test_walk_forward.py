@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+from core.backtest_kernel import run_backtest_kernel
+from core.walk_forward import WalkForwardOptimization, walk_forward_windows
+
+PARAMETERS = {
+    'entry_conditions.ma_condition.period': [10, 30],
+    'exit_conditions.take_profit_pct': [3, 8],
+}
+
+@pytest.fixture
+def base_request(synthetic_provider):
+    return {
+        'symbol': 'TEST',
+        'start_date': '2011-01-01',
+        'end_date': '2016-01-01',
+        'entry_conditions': {
+            'ma_condition': {'period': 20, 'ma_type': 'EMA', 'comparison': 'CROSS_ABOVE', 'deviation_pct': 0},
+            'trade_direction': 'BUY'
+        },
+        'exit_conditions': {'stop_loss_pct': 4, 'take_profit_pct': 5, 'position_size_pct': 30},
+        'data_provider': synthetic_provider
+    }
+
+@pytest.mark.parametrize("anchored", [False, True])
+def test_windows(anchored):
+    windows = walk_forward_windows(100, 30, 20, anchored)
+
+    assert [(oos_start, oos_end) for _, _, oos_start, oos_end in windows] == [(30, 50), (50, 70), (70, 90), (90, 100)]
+    for start, end, oos_start, _ in windows:
+        assert end == oos_start
+        assert (start, end - start) == ((0, end) if anchored else (end - 30, 30))
+
+def test_windows_need_room_for_an_out_of_sample_window():
+    assert len(walk_forward_windows(32, 30, 20)) == 1
+    with pytest.raises(ValueError):
+        walk_forward_windows(31, 30, 20)
+
+@pytest.mark.parametrize("anchored", [False, True])
+def test_walk_forward(app, base_request, anchored):
+    walk_forward = WalkForwardOptimization(app.backtest_service, app.BacktestRequest, execution_mode="thread")
+    results = walk_forward.run(base_request, PARAMETERS, in_sample_bars=250, out_of_sample_bars=120,
+                               anchored=anchored)
+    combinations, requests, df, groups = walk_forward.prepare(base_request, PARAMETERS)
+    close = df['Close'].to_numpy()
+    windows = walk_forward_windows(len(df), 250, 120, anchored)
+    assert len(results['windows']) == len(windows) > 3
+
+    entry_masks = {index: (mask, direction) for mask, direction, runs in groups for index, *_ in runs}
+    for report, (start, end, oos_start, oos_end) in zip(results['windows'], windows):
+        assert report['in_sample_start'] == df.index[start].isoformat()
+        assert report['in_sample_end'] == df.index[end - 1].isoformat()
+        assert report['out_of_sample_start'] == df.index[oos_start].isoformat()
+        assert report['out_of_sample_end'] == df.index[oos_end - 1].isoformat()
+
+        # the chosen parameters are the best in-sample run of the grid
+        in_sample_returns = []
+        for index, request in enumerate(requests):
+            mask, direction = entry_masks[index]
+            exits = request.exit_conditions
+            result = run_backtest_kernel(close[start:end], mask[start:end], direction, request.initial_capital,
+                                         exits.stop_loss_pct, exits.take_profit_pct, exits.position_size_pct)
+            in_sample_returns.append(result.final_capital / request.initial_capital)
+        assert report['parameters'] == combinations[int(np.argmax(in_sample_returns))]
+
+    # the out-of-sample windows tile the bars after the first in-sample window
+    assert results['out_of_sample_start'] == df.index[250].isoformat()
+    assert results['out_of_sample_end'] == df.index[-1].isoformat()
+    assert len(results['equity_curve']) == len(df) - 250 + 1
+
+    # every trade is opened and closed out of sample, and the trades account for the whole equity change
+    first_bar = pd.Timestamp(results['out_of_sample_start'])
+    assert all(pd.Timestamp(trade['entry_date']) >= first_bar for trade in results['trades'])
+    assert results['total_trades'] == len(results['trades']) > 0
+    total_pnl = sum(trade['pnl'] for trade in results['trades'])
+    assert results['final_capital'] == pytest.approx(10000.0 + total_pnl, rel=1e-12)
+    assert results['equity_curve'][-1] == results['final_capital']
+
+def test_first_out_of_sample_bar_enters(app, base_request):
+    # RSI above 0 holds on every bar after the warm-up, so each window enters on its first bar
+    base_request['entry_conditions'] = {'rsi_condition': {'period': 14, 'comparison': 'ABOVE', 'value': 0},
+                                        'trade_direction': 'BUY'}
+    results = WalkForwardOptimization(app.backtest_service, app.BacktestRequest, execution_mode="thread").run(
+        base_request, {'exit_conditions.stop_loss_pct': [50]}, in_sample_bars=250, out_of_sample_bars=120)
+
+    entry_dates = {trade['entry_date'] for trade in results['trades']}
+    exits = {(trade['exit_date'], trade['exit_reason']) for trade in results['trades']}
+    for window in results['windows']:
+        assert window['out_of_sample_start'] in entry_dates
+        assert (window['out_of_sample_end'], 'End of Run') in exits
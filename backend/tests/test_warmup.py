@@ -0,0 +1,35 @@
+import threading
+from core.monte_carlo import MonteCarloSimulator
+from core.warmup import format_report, warm_up
+
+def test_warm_up_reports_every_symbol(synthetic_provider):
+    report = warm_up(["test", "TEST", "SPY"], ["1d", "1h"], "2019-01-01", "2020-01-01",
+                     simulator=MonteCarloSimulator(lookback_years=2), provider=synthetic_provider)
+
+    assert report['symbols'] == 2
+    assert report['failed'] == []
+    assert [(row['symbol'], row['timeframe']) for row in report['data']] == [
+        ('TEST', '1d'), ('TEST', '1h'), ('SPY', '1d'), ('SPY', '1h')]
+    assert all(row['bars'] > 0 for row in report['data'])
+    assert all(row['returns'] > 0 for row in report['monte_carlo'])
+    assert "2 symbols x 2 timeframes" in format_report(report)
+
+def test_lambda_warm_up_starts_once(monkeypatch):
+    import main_lambda
+    calls = []
+    done = threading.Event()
+
+    def fake_warm_up(*args, **kwargs):
+        calls.append(args)
+        done.set()
+        return {}
+
+    monkeypatch.setattr(main_lambda, "WARMUP_SYMBOLS", ["TEST"])
+    monkeypatch.setattr(main_lambda, "_warm_up_started", False)
+    monkeypatch.setattr(main_lambda, "warm_up", fake_warm_up)
+    monkeypatch.setattr(main_lambda, "format_report", lambda report: "")
+    for _ in range(3):
+        main_lambda.start_warm_up()
+
+    assert done.wait(5)
+    assert len(calls) == 1
@@ -1,5 +1,6 @@
 from typing import Dict
 import numpy as np
+from core.metrics import max_drawdown_pct, period_returns, sharpe_ratio, summarize_curve
 
 class StrategyAnalyzer:
     def analyze_results(self, results: Dict) -> Dict:
@@ -15,12 +16,14 @@ class StrategyAnalyzer:
     
     def calculate_metrics(self, results: Dict) -> Dict:
         returns = np.array(results['returns'])
+        risk = summarize_curve(returns)
         
         metrics = {
             'total_return': (returns[-1] - returns[0]) / returns[0] * 100,
             'volatility': np.std(returns) * np.sqrt(252),
-            'sharpe_ratio': self.calculate_sharpe_ratio(returns),
-            'max_drawdown': self.calculate_max_drawdown(returns),
+            'volatility_pct': risk['volatility_pct'],
+            'sharpe_ratio': risk['sharpe_ratio'],
+            'max_drawdown': risk['max_drawdown_pct'],
             'win_rate': results.get('statistics', {}).get('win_rate', 0)
         }
         
@@ -28,24 +31,11 @@ class StrategyAnalyzer:
     
     @staticmethod
     def calculate_sharpe_ratio(returns: np.array, risk_free_rate: float = 0.02) -> float:
-        returns_pct = (returns[1:] - returns[:-1]) / returns[:-1]
-        excess_returns = returns_pct - risk_free_rate/252
-        if len(excess_returns) == 0 or np.std(excess_returns) == 0:
-            return 0
-        return np.mean(excess_returns) / np.std(excess_returns) * np.sqrt(252)
+        return float(sharpe_ratio(period_returns(returns), risk_free_rate)[0])
     
     @staticmethod
     def calculate_max_drawdown(returns: np.array) -> float:
-        peak = returns[0]
-        max_drawdown = 0
-        
-        for value in returns:
-            if value > peak:
-                peak = value
-            drawdown = (peak - value) / peak
-            max_drawdown = max(max_drawdown, drawdown)
-            
-        return max_drawdown * 100
+        return float(max_drawdown_pct(returns)[0])
     
     def generate_suggestions(self, results: Dict) -> list:
         metrics = self.calculate_metrics(results)
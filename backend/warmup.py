@@ -0,0 +1,70 @@
+"""Prefetch a symbol universe into the local data cache and print a timing report.
+
+Run on deploy and nightly so requests on the universe start from warm data:
+
+    python warmup.py AAPL MSFT SPY --timeframes 1d,1h --years 5
+    python warmup.py --symbols-file universe.txt --workers 16 --json report.json
+
+Bars go to the on-disk OHLCV cache (MONTY_CACHE_DIR), which API processes
+on the same host or on shared storage read from. Monte Carlo return
+distributions are cached in memory only, so here they are computed just to
+time them; a server warms its own at startup from MONTY_WARMUP_SYMBOLS.
+Indicators are not warmed, see core.warmup.warm_up.
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+from typing import List
+from core.monte_carlo import MonteCarloSimulator
+from core.warmup import MAX_WARMUP_WORKERS, format_report, warm_up
+
+def read_symbols(args) -> List[str]:
+    symbols = list(args.symbols)
+    if args.symbols_file:
+        with open(args.symbols_file) as f:
+            for line in f:
+                line = line.split("#")[0].strip()
+                symbols.extend(symbol for symbol in line.replace(",", " ").split() if symbol)
+    return symbols
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Prefetch market data and Monte Carlo returns")
+    parser.add_argument("symbols", nargs="*", help="symbols to warm up")
+    parser.add_argument("--symbols-file", help="file with more symbols, separated by whitespace or commas, # comments")
+    parser.add_argument("--timeframes", default="1d", help="comma separated timeframes (default: 1d)")
+    parser.add_argument("--start", help="first date to load (default: --years before --end)")
+    parser.add_argument("--end", default=datetime.now().strftime("%Y-%m-%d"), help="last date to load (default: today)")
+    parser.add_argument("--years", type=int, default=5, help="years of history to load without --start (default: 5)")
+    parser.add_argument("--provider", help="data provider (default: MONTY_DATA_PROVIDER)")
+    parser.add_argument("--workers", type=int, default=MAX_WARMUP_WORKERS,
+                        help=f"concurrent loads (default: {MAX_WARMUP_WORKERS})")
+    parser.add_argument("--lookback-years", type=int, default=10,
+                        help="Monte Carlo lookback of the return distributions (default: 10)")
+    parser.add_argument("--no-monte-carlo", action="store_true", help="skip the Monte Carlo return distributions")
+    parser.add_argument("--json", help="also write the full report to this file")
+    args = parser.parse_args(argv)
+
+    symbols = read_symbols(args)
+    if not symbols:
+        parser.error("no symbols given")
+    start = args.start or (datetime.strptime(args.end, "%Y-%m-%d") - timedelta(days=args.years * 365)).strftime(
+        "%Y-%m-%d")
+
+    timeframes = [timeframe.strip() for timeframe in args.timeframes.split(",") if timeframe.strip()]
+    report = warm_up(
+        symbols, timeframes, start, args.end,
+        simulator=None if args.no_monte_carlo else MonteCarloSimulator(lookback_years=args.lookback_years),
+        provider=args.provider,
+        max_workers=args.workers
+    )
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    # a few delisted symbols should not fail a deploy, nothing loading at all should
+    return 1 if len(report['failed']) == report['symbols'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
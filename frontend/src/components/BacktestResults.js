@@ -164,7 +164,10 @@ const BacktestResults = () => {
   }
 
   const chartData = {
-    labels: Array.from({ length: results.equity_curve.length }, (_, i) => i + 1),
+    // downsampled curves carry the bar number of each point
+    labels: results.equity_curve_index
+      ? results.equity_curve_index.map((i) => i + 1)
+      : Array.from({ length: results.equity_curve.length }, (_, i) => i + 1),
     datasets: [
       {
         label: 'Portfolio Value',
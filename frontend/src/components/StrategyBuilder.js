@@ -812,7 +812,10 @@ const StrategyBuilder = () => {
       console.log("Backtest Request Body:", requestBody);
 
       // Send backtest request to the backend
-      const response = await axios.post('https://0e56rmnbl1.execute-api.us-east-1.amazonaws.com/dev/backtest', requestBody);
+      // the chart can't show more points than this, the server downsamples the equity curve to fit
+      const response = await axios.post('https://0e56rmnbl1.execute-api.us-east-1.amazonaws.com/dev/backtest', requestBody, {
+        params: { max_points: 1000 }
+      });
       console.log("Backtest Response:", response.data);
 
       // Navigate to the results page, passing both results and the original request